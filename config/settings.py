@@ -32,6 +32,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Métricas por petición (Server-Timing + log JSON); va primero para medir todo
+    'core.middleware.RendimientoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -71,6 +73,88 @@ DATABASES = {
     }
 }
 
+# Perfil de producción para SQLite (DB_PERFIL=produccion): WAL para que los
+# lectores no se bloqueen con los escritores, pragmas ajustables por entorno,
+# conexiones persistentes y BEGIN IMMEDIATE (el bloqueo de escritura se toma
+# al abrir la transacción, así busy_timeout y los reintentos de
+# core.sqlite.reintentar_si_bloqueada actúan antes de escribir nada).
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'cache_size': os.environ.get('SQLITE_CACHE_SIZE', '-20000'),  # negativo = KiB
+    'mmap_size': os.environ.get('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024)),
+    'busy_timeout': os.environ.get('SQLITE_BUSY_TIMEOUT', '5000'),  # ms
+}
+if os.environ.get('DB_PERFIL') == 'produccion':
+    DATABASES['default'].update({
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {k}={v}' for k, v in SQLITE_PRAGMAS.items()),
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+    })
+
+# Reintentos de escrituras con la base bloqueada (core/sqlite.py)
+DB_REINTENTOS = int(os.environ.get('DB_REINTENTOS', 5))
+DB_REINTENTO_ESPERA_MS = int(os.environ.get('DB_REINTENTO_ESPERA_MS', 50))
+
+# Caché (core/cache_torneos.py): memoria local por defecto. Con varios procesos
+# conviene un backend compartido, p. ej. CACHE_DIR=/var/tmp/gestor-torneos
+if os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'gestor-torneos',
+        }
+    }
+CACHE_TORNEOS_TIMEOUT = 600
+
+# Resultados en vivo (Server-Sent Events, core/eventos.py). Con varios procesos
+# usar core.eventos.CacheBackend y una caché compartida (memcached/redis).
+EVENTOS_BACKEND = os.environ.get('EVENTOS_BACKEND', 'core.eventos.MemoriaBackend')
+EVENTOS_HISTORIAL = 200        # eventos por torneo guardados para reconexiones
+EVENTOS_COLA = 100             # eventos en espera por conexión
+EVENTOS_LATIDO_S = 15          # comentario de latido si no hay eventos
+EVENTOS_REINTENTO_MS = 3000    # espera de EventSource antes de reconectarse
+EVENTOS_INTERVALO_S = 1        # CacheBackend: cada cuánto mira la caché
+EVENTOS_RETENCION_S = 3600     # CacheBackend: vida de cada evento en la caché
+
+# Simulación de lo que falta de las ligas (core/simulacion.py). Con NumPy
+# instalado se simula en bloques vectorizados; sin él, en Python puro.
+SIMULACION_SIMULACIONES = 100_000
+SIMULACION_SIMULACIONES_SIN_NUMPY = 5_000
+# Tope de ?n en la vista (sólo staff) con NumPy; sin NumPy el tope es
+# SIMULACION_SIMULACIONES_SIN_NUMPY
+SIMULACION_MAX = 1_000_000
+# Simulaciones x partidos pendientes a partir de las cuales el comando
+# simular_torneo usa un pool de procesos (SIMULACION_PROCESOS; None = uno
+# por CPU). Las vistas simulan siempre en su propio proceso.
+SIMULACION_UMBRAL_PROCESOS = 20_000_000
+SIMULACION_PROCESOS = None
+
+# Trabajos en segundo plano (core/trabajos.py, `manage.py run_worker`):
+# hilos del trabajador, espera entre búsquedas cuando no hay nada pendiente,
+# plazo del arriendo de un trabajo (se renueva al informar el avance) y
+# cuántas veces se reintenta uno cuyo trabajador dejó de responder. Varios
+# hilos (o procesos) escriben a la vez, así que sólo por defecto con el
+# perfil de producción (BEGIN IMMEDIATE y busy_timeout); sin él chocan.
+TRABAJOS_HILOS = int(os.environ.get('TRABAJOS_HILOS', 2 if os.environ.get('DB_PERFIL') == 'produccion' else 1))
+TRABAJOS_ESPERA_S = 1.0
+TRABAJOS_PLAZO_S = 300
+TRABAJOS_MAX_INTENTOS = 3
+# Archivos subidos que esperan a su trabajo, y días que se conservan los
+# trabajos terminados (run_worker purga los más viejos al arrancar)
+TRABAJOS_DIR_ARCHIVOS = BASE_DIR / 'trabajos'
+TRABAJOS_RETENCION_DIAS = 30
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -105,3 +189,24 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = 'home'       
 LOGOUT_REDIRECT_URL = 'home'
+
+# Rendimiento (core.middleware.RendimientoMiddleware)
+RENDIMIENTO_UMBRAL_LENTO_MS = int(os.environ.get("RENDIMIENTO_UMBRAL_LENTO_MS", 500))
+RENDIMIENTO_DIR_PERFILES = BASE_DIR / 'perfiles'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # Por defecto sólo las peticiones lentas (WARNING); con
+        # RENDIMIENTO_LOG_NIVEL=INFO, una línea por petición
+        'core.rendimiento': {
+            'handlers': ['console'],
+            'level': os.environ.get('RENDIMIENTO_LOG_NIVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
@@ -17,34 +17,65 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from core import views 
+from core import api
+from core import sse
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', views.home, name='home'),
 
     # Torneos (ya los tenías)
+    path('buscar/', views.buscar, name='buscar'),
     path('torneos/', views.torneos_list, name='torneos_list'),
     path('torneos/nuevo/', views.torneo_create, name='torneo_create'),
+    path('torneos/importar/', views.torneos_importar, name='torneos_importar'),
     path('torneos/<int:pk>/', views.torneo_detail, name='torneo_detail'),
     path('torneos/<int:pk>/editar/', views.torneo_update, name='torneo_update'),
     path('torneos/<int:pk>/eliminar/', views.torneo_delete, name='torneo_delete'),
+    path('torneos/<int:pk>/recalcular/', views.torneo_recalcular, name='torneo_recalcular'),
+    path('torneos/<int:pk>/instantanea/', views.torneo_instantanea, name='torneo_instantanea'),
+    path('torneos/<int:pk>/clonar/', views.torneo_clonar, name='torneo_clonar'),
+    path('torneos/<int:pk>/tabla/', views.torneo_tabla, name='torneo_tabla'),
+    path('torneos/<int:pk>/llave/', views.torneo_llave, name='torneo_llave'),
+    path('torneos/<int:pk>/estadisticas/', views.torneo_estadisticas, name='torneo_estadisticas'),
+    path('torneos/<int:pk>/simulacion/', views.torneo_simulacion, name='torneo_simulacion'),
+    path('torneos/<int:pk>/eventos/', sse.torneo_eventos, name='torneo_eventos'),
+    path('torneos/<int:pk>/llave/generar/', views.torneo_llave_generar, name='torneo_llave_generar'),
 
     # Jugadores
     path('jugadores/', views.jugadores_list, name='jugadores_list'),
     path('jugadores/nuevo/', views.jugador_create, name='jugador_create'),
+    path('jugadores/exportar/', views.jugadores_exportar, name='jugadores_exportar'),
 
     # Partidos
     path('partidos/', views.partidos_list, name='partidos_list'),
     path('partidos/nuevo/', views.partido_create, name='partido_create'),
     path('partidos/<int:pk>/editar/', views.partido_update, name='partido_update'),
     path('partidos/<int:pk>/resultado/', views.partido_set_resultado, name='partido_set_resultado'),
+    path('partidos/<int:pk>/eventos/', views.partido_eventos, name='partido_eventos'),
+    path('eventos/<int:pk>/eliminar/', views.evento_delete, name='evento_delete'),
     path('partidos/generar/', views.partidos_generar, name='partidos_generar'),
+    path('partidos/resultados/', views.partidos_resultados, name='partidos_resultados'),
+    path('partidos/exportar/', views.partidos_exportar, name='partidos_exportar'),
     
     # Equipos
     path('equipos/', views.equipos_list, name='equipos_list'),
     path('equipos/nuevo/', views.equipo_create, name='equipo_create'),
+    path('equipos/importar/', views.equipos_importar, name='equipos_importar'),
+    path('equipos/exportar/', views.equipos_exportar, name='equipos_exportar'),
     path('equipos/<int:pk>/editar/', views.equipo_update, name='equipo_update'),
     path('equipos/<int:pk>/eliminar/', views.equipo_delete, name='equipo_delete'),
+
+    path('cache/estadisticas/', views.cache_estadisticas, name='cache_estadisticas'),
+    path('trabajos/<int:pk>/', views.trabajo_detail, name='trabajo_detail'),
+    path('trabajos/<int:pk>/estado/', views.trabajo_estado, name='trabajo_estado'),
+
+    # API JSON de sólo lectura (ETag / Last-Modified, gzip)
+    path('api/torneos/', api.api_torneos, name='api_torneos'),
+    path('api/equipos/', api.api_equipos, name='api_equipos'),
+    path('api/equipos/opciones/', api.api_equipos_opciones, name='api_equipos_opciones'),
+    path('api/jugadores/', api.api_jugadores, name='api_jugadores'),
+    path('api/partidos/', api.api_partidos, name='api_partidos'),
     
     path('admin/', admin.site.urls),
     path('', views.home, name='home'),
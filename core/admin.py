@@ -5,21 +5,27 @@ from .models import Torneo, Equipo, Jugador
 class EquipoInline(admin.TabularInline):
     model = Equipo
     extra = 0
-    max_num = Equipo.MAX_EQUIPOS_POR_TORNEO  # UI limita a 20
+
+    def get_max_num(self, request, obj=None, **kwargs):
+        # UI limita al cupo del torneo
+        return obj.max_equipos if obj else None
 
 class JugadorInline(admin.TabularInline):
     model = Jugador
     extra = 0
-    max_num = Jugador.MAX_JUGADORES_POR_EQUIPO  # UI limita a 15
+
+    def get_max_num(self, request, obj=None, **kwargs):
+        # UI limita al cupo del torneo del equipo
+        return obj.torneo.max_jugadores_por_equipo if obj else None
 
 @admin.register(Torneo)
 class TorneoAdmin(admin.ModelAdmin):
-    list_display = ("nombre", "fecha_inicio", "fecha_fin", "ubicacion")
+    list_display = ("nombre", "fecha_inicio", "fecha_fin", "ubicacion", "equipos_count", "max_equipos")
     inlines = [EquipoInline]
 
 @admin.register(Equipo)
 class EquipoAdmin(admin.ModelAdmin):
-    list_display = ("nombre", "torneo")
+    list_display = ("nombre", "torneo", "jugadores_count", "elo")
     list_filter = ("torneo",)
     search_fields = ("nombre", "torneo__nombre")
     inlines = [JugadorInline]
@@ -0,0 +1,126 @@
+import hashlib
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, require_GET
+
+from . import cache_torneos
+from .busqueda import filtrar_por_texto
+from .exportacion import COLUMNAS_EQUIPOS, COLUMNAS_JUGADORES, COLUMNAS_PARTIDOS
+from .filtros import filtrar_equipos, filtrar_jugadores, filtrar_partidos
+from .models import Torneo, Equipo, Jugador, Partido
+from .paginacion import leer_cursor, paginar
+
+
+COLUMNAS_TORNEOS = [
+    ("id", "id"),
+    ("nombre", "nombre"),
+    ("fecha_inicio", "fecha_inicio"),
+    ("fecha_fin", "fecha_fin"),
+    ("ubicacion", "ubicacion"),
+]
+
+
+def _torneo_filtrado(request):
+    # Mismo parámetro que los listados HTML (también dentro del cursor)
+    filtros, _ = leer_cursor(request, ("torneo",))
+    return filtros["torneo"] or None
+
+
+def _etag(request):
+    """
+    ETag barato: versión del torneo filtrado (o la global) más los
+    parámetros de la consulta. No toca la base de datos.
+    """
+    version = cache_torneos.version(_torneo_filtrado(request))
+    parametros = request.GET.urlencode()
+    return hashlib.md5(f"{version}:{parametros}".encode()).hexdigest()
+
+
+def _ultima_modificacion(request):
+    return cache_torneos.modificado(_torneo_filtrado(request))
+
+
+def api_lectura(vista):
+    """
+    Decorador de los endpoints de la API: sólo GET, con sesión, respuesta
+    comprimida con gzip y condicional. Si el cliente manda If-None-Match /
+    If-Modified-Since vigentes se responde 304 antes de ejecutar la vista,
+    sin consultas ni serialización.
+    """
+    vista = condition(etag_func=_etag, last_modified_func=_ultima_modificacion)(vista)
+    vista = cache_control(private=True, no_cache=True)(vista)
+    return login_required(require_GET(gzip_page(vista)))
+
+
+def _valor(obj, campo):
+    for parte in campo.split("__"):
+        obj = getattr(obj, parte) if obj is not None else None
+    return obj
+
+
+def _respuesta(queryset, campo_orden, columnas, filtros, cursor):
+    pagina = paginar(queryset, campo_orden, cursor, filtros)
+    return JsonResponse({
+        "resultados": [
+            {encabezado: _valor(obj, campo) for encabezado, campo in columnas}
+            for obj in pagina
+        ],
+        "siguiente": pagina.cursor_siguiente,
+        "anterior": pagina.cursor_anterior,
+    })
+
+
+@api_lectura
+def api_torneos(request):
+    filtros, cursor = leer_cursor(request, ("q",))
+    torneos = Torneo.objects.only(*(campo for _, campo in COLUMNAS_TORNEOS))
+    if filtros["q"]:
+        torneos = filtrar_por_texto(torneos, filtros["q"], "torneo")
+    return _respuesta(torneos, "nombre", COLUMNAS_TORNEOS, filtros, cursor)
+
+
+@api_lectura
+def api_equipos(request):
+    filtros, cursor = leer_cursor(request, ("torneo",))
+    # La cantidad de jugadores es el contador del equipo: sin GROUP BY, el
+    # orden (nombre, id) del cursor sale directo del índice
+    equipos = Equipo.objects.select_related("torneo").only("nombre", "jugadores_count", "torneo__nombre")
+    equipos = filtrar_equipos(equipos, filtros["torneo"])
+    return _respuesta(equipos, "nombre", COLUMNAS_EQUIPOS, filtros, cursor)
+
+
+@api_lectura
+def api_equipos_opciones(request):
+    """
+    Equipos de un torneo (id y nombre) para los <select> que dependen del
+    torneo elegido (EquiposPorTorneoSelect). Sale de la caché de opciones y,
+    como el resto de la API, responde 304 con el ETag vigente del torneo.
+    """
+    torneo_id = request.GET.get("torneo") or ""
+    # sin torneo (o con uno inválido) no hay opciones
+    equipos = cache_torneos.opciones_equipos(torneo_id) if torneo_id.isdigit() else []
+    return JsonResponse({"resultados": [{"id": e.id, "nombre": e.nombre} for e in equipos]})
+
+
+@api_lectura
+def api_jugadores(request):
+    filtros, cursor = leer_cursor(request, ("torneo", "equipo"))
+    jugadores = Jugador.objects.select_related("equipo", "equipo__torneo").only(
+        "nombre", "dorsal", "email", "equipo__nombre", "equipo__torneo__nombre"
+    )
+    jugadores = filtrar_jugadores(jugadores, filtros["torneo"], filtros["equipo"])
+    return _respuesta(jugadores, "nombre", COLUMNAS_JUGADORES, filtros, cursor)
+
+
+@api_lectura
+def api_partidos(request):
+    filtros, cursor = leer_cursor(request, ("torneo", "equipo"))
+    partidos = Partido.objects.select_related("torneo", "equipo1", "equipo2").only(
+        "fecha", "sede", "estado", "marcador1", "marcador2",
+        "torneo__nombre", "equipo1__nombre", "equipo2__nombre",
+    )
+    partidos = filtrar_partidos(partidos, filtros["torneo"], filtros["equipo"])
+    return _respuesta(partidos, "fecha", COLUMNAS_PARTIDOS, filtros, cursor)
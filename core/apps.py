@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Invalida la caché por torneo al guardar/borrar (ver core/cache_torneos.py)
+        from . import signals  # noqa: F401
@@ -0,0 +1,152 @@
+import math
+from time import perf_counter
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, get_resolver, reverse
+
+from . import trabajos
+from .models import Job, Partido
+
+
+class Caso:
+    """
+    Una petición a medir. `preparar` se ejecuta antes de cada repetición,
+    fuera del cronómetro; `despues`, justo después de la petición y dentro
+    de él (p. ej. correr el trabajo que la petición encoló).
+    """
+
+    def __init__(self, nombre, url, metodo="get", datos=None, preparar=None, despues=None):
+        self.nombre = nombre
+        self.url = url
+        self.metodo = metodo
+        self.datos = datos or {}
+        self.preparar = preparar
+        self.despues = despues
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano (valores ya ordenados)."""
+    if not valores:
+        return None
+    k = max(0, math.ceil(p / 100 * len(valores)) - 1)
+    return valores[k]
+
+
+def _urls_con_nombre():
+    # Sólo las URL propias (sin include(): admin, accounts)
+    for patron in get_resolver().url_patterns:
+        if isinstance(patron, URLPattern) and patron.name:
+            yield patron
+
+
+def casos_desde_urls(torneo, equipo, partido, torneo_fixture):
+    """
+    Un caso GET por cada URL con nombre de config/urls.py, más las variantes
+    con filtros de los listados y los casos de escritura: generar el fixture
+    de `torneo_fixture` (se borra antes de cada repetición; se mide la
+    petición más el trabajo que encola) y cargar el resultado de `partido`.
+    """
+    objetos = {"torneo": torneo, "equipo": equipo, "partido": partido}
+    casos = []
+    vistos = set()
+    for patron in _urls_con_nombre():
+        if patron.name in vistos:
+            continue
+        vistos.add(patron.name)
+        if "pk" in patron.pattern.converters:
+            # torneo_detail -> torneo, partido_update -> partido, ...
+            prefijo = patron.name.split("_")[0]
+            obj = objetos.get(prefijo)
+            if obj is None:
+                continue
+            url = reverse(patron.name, args=[obj.pk])
+        else:
+            url = reverse(patron.name)
+        if patron.name == "partidos_generar":
+            continue  # se mide abajo con su preparación
+        casos.append(Caso(patron.name, url))
+
+    for nombre in ("equipos_list", "jugadores_list", "partidos_list", "api_equipos_opciones"):
+        casos.append(Caso(f"{nombre}?torneo", reverse(nombre) + f"?torneo={torneo.pk}"))
+    for nombre in ("jugadores_list", "partidos_list"):
+        casos.append(Caso(
+            f"{nombre}?torneo&equipo",
+            reverse(nombre) + f"?torneo={torneo.pk}&equipo={equipo.pk}",
+        ))
+
+    def borrar_fixture():
+        Partido.objects.filter(torneo=torneo_fixture).delete()
+        Job.objects.filter(tipo="generar_fixture", parametros__torneo=torneo_fixture.pk).delete()
+
+    # la vista sólo encola: se mide también el trabajo que genera el fixture
+    casos.append(Caso(
+        "partidos_generar",
+        reverse("partidos_generar") + f"?torneo={torneo_fixture.pk}&ida_vuelta=1",
+        preparar=borrar_fixture,
+        despues=lambda: trabajos.procesar("bench"),
+    ))
+    casos.append(Caso(
+        "partido_set_resultado:POST",
+        reverse("partido_set_resultado", args=[partido.pk]),
+        metodo="post",
+        datos={"marcador1": "2", "marcador2": "1"},
+    ))
+    return casos
+
+
+def medir(client, casos, repeticiones=20):
+    """
+    Ejecuta cada caso `repeticiones` veces con el cliente de pruebas y
+    devuelve, por caso, latencias p50/p95/p99 (ms) y consultas por petición.
+    """
+    resultados = {}
+    for caso in casos:
+        tiempos = []
+        consultas = []
+        estado = None
+        for _ in range(repeticiones):
+            if caso.preparar:
+                caso.preparar()
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = perf_counter()
+                resp = getattr(client, caso.metodo)(caso.url, caso.datos)
+                if caso.despues:
+                    caso.despues()
+                tiempos.append((perf_counter() - inicio) * 1000)
+            consultas.append(len(capturadas))
+            estado = resp.status_code
+        tiempos.sort()
+        resultados[caso.nombre] = {
+            "url": caso.url,
+            "metodo": caso.metodo.upper(),
+            "estado": estado,
+            "p50_ms": round(percentil(tiempos, 50), 2),
+            "p95_ms": round(percentil(tiempos, 95), 2),
+            "p99_ms": round(percentil(tiempos, 99), 2),
+            "consultas": max(consultas),
+        }
+    return resultados
+
+
+def comparar(resultados, base, tolerancia=1.2):
+    """
+    Compara contra una corrida anterior. Marca como regresión los casos cuyo
+    p95 crece más que `tolerancia` veces o que hacen más consultas.
+    """
+    comparacion = {}
+    for nombre, actual in resultados.items():
+        anterior = base.get(nombre)
+        if not anterior:
+            continue
+        ratio = actual["p95_ms"] / anterior["p95_ms"] if anterior["p95_ms"] else None
+        comparacion[nombre] = {
+            "p95_ratio": round(ratio, 2) if ratio is not None else None,
+            "consultas_antes": anterior["consultas"],
+            "consultas_ahora": actual["consultas"],
+            "regresion": bool(
+                (ratio is not None and ratio > tolerancia)
+                or actual["consultas"] > anterior["consultas"]
+            ),
+        }
+    return comparacion
@@ -0,0 +1,157 @@
+from django.db import connection, transaction
+from django.db.models import Q
+
+from . import cache_torneos, cupos
+from .elo import recalcular_elo
+from .estadisticas import recalcular_estadisticas
+from .models import (
+    EstadisticaJugador, Equipo, EventoPartido, HistorialElo, Jugador, Partido, Posicion, Torneo,
+)
+from .posiciones import recalcular_posiciones
+from .sqlite import reintentar_si_bloqueada
+
+
+# Borrado de torneos y equipos sin el colector de Django (que carga en
+# memoria cada fila dependiente y la borra emitiendo señales): cada tabla
+# se vacía con DELETE ... WHERE id IN (SELECT id ... LIMIT n), de las hojas
+# hacia la raíz, y cada lote es su propia transacción, así el escritor de
+# SQLite se libera entre lotes. Si el borrado se corta a mitad, lo que
+# queda es coherente (los hijos se van antes que los padres) y volver a
+# borrar termina el trabajo. Los triggers del índice de búsqueda se
+# disparan igual; la caché y los cupos se actualizan al final.
+
+LOTE = 1000
+
+
+def _contar(**consultas):
+    return {nombre: consulta.count() for nombre, consulta in consultas.items()}
+
+
+def dependientes_torneo(torneo):
+    """Lo que se borra con el torneo (para la página de confirmación)."""
+    return _contar(
+        equipos=Equipo.objects.filter(torneo=torneo),
+        jugadores=Jugador.objects.filter(equipo__torneo=torneo),
+        partidos=Partido.objects.filter(torneo=torneo),
+        eventos=EventoPartido.objects.filter(partido__torneo=torneo),
+    )
+
+
+def dependientes_equipo(equipo):
+    """Lo que se borra con el equipo (para la página de confirmación)."""
+    return _contar(
+        jugadores=Jugador.objects.filter(equipo=equipo),
+        partidos=_partidos_de(equipo),
+        eventos=EventoPartido.objects.filter(partido__in=_partidos_de(equipo)),
+    )
+
+
+def _partidos_de(equipo):
+    return Partido.objects.filter(Q(equipo1=equipo) | Q(equipo2=equipo))
+
+
+@reintentar_si_bloqueada
+def _lote(modelo, sql, params, lote):
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {modelo._meta.db_table} WHERE id IN ({sql} LIMIT {int(lote)})", params
+            )
+            return cursor.rowcount
+
+
+def borrar_en_lotes(*consultas, lote=LOTE):
+    """
+    Borra las filas de cada consulta con DELETE por lotes de `lote` filas,
+    sin cargarlas ni emitir señales. Una consulta por índice en lugar de un
+    OR: cada lote vuelve a buscar desde el índice, no recorre la tabla.
+    Devuelve cuántas filas borró.
+    """
+    total = 0
+    for consulta in consultas:
+        sql, params = consulta.order_by().values("pk").query.sql_with_params()
+        while True:
+            borradas = _lote(consulta.model, sql, params, lote)
+            total += borradas
+            if borradas < lote:
+                break
+    return total
+
+
+@reintentar_si_bloqueada
+def _soltar_siguientes(partidos):
+    # on_delete=SET_NULL de Partido.siguiente: ningún partido que queda
+    # puede apuntar a uno que se borra
+    Partido.objects.filter(siguiente__in=partidos.values("pk")).update(siguiente=None)
+
+
+def borrar_torneo(torneo, lote=LOTE, progreso=None):
+    """
+    Borra el torneo con todos sus equipos, jugadores, partidos y lo que
+    cuelga de ellos. Devuelve las filas borradas por tabla. `progreso`, si
+    se pasa, se llama con (tablas hechas, total) al terminar cada tabla.
+    """
+    torneo_id = torneo.pk
+    partidos = Partido.objects.filter(torneo_id=torneo_id)
+    jugadores = Jugador.objects.filter(equipo__torneo_id=torneo_id)
+    tablas = [
+        # los eventos de sus jugadores en otros torneos también se van con ellos
+        ("eventos", (
+            EventoPartido.objects.filter(partido__torneo_id=torneo_id),
+            EventoPartido.objects.filter(jugador__in=jugadores.values("pk")),
+        )),
+        ("estadisticas", (
+            EstadisticaJugador.objects.filter(torneo_id=torneo_id),
+            EstadisticaJugador.objects.filter(jugador__in=jugadores.values("pk")),
+        )),
+        ("historial_elo", (HistorialElo.objects.filter(partido__torneo_id=torneo_id),)),
+        ("posiciones", (Posicion.objects.filter(torneo_id=torneo_id),)),
+        ("partidos", (partidos,)),
+        ("jugadores", (jugadores,)),
+        ("equipos", (Equipo.objects.filter(torneo_id=torneo_id),)),
+        ("torneos", (Torneo.objects.filter(pk=torneo_id),)),
+    ]
+    _soltar_siguientes(partidos)
+    borradas = {}
+    for hechas, (nombre, consultas) in enumerate(tablas, start=1):
+        borradas[nombre] = borrar_en_lotes(*consultas, lote=lote)
+        if progreso is not None:
+            progreso(hechas, len(tablas))
+    cache_torneos.invalidar(torneo_id)
+    return borradas
+
+
+def borrar_equipo(equipo, lote=LOTE):
+    """
+    Borra el equipo con sus jugadores y sus partidos (y lo que cuelga de
+    ellos), libera su cupo y rehace la tabla, las estadísticas y el Elo del
+    torneo, como Equipo.delete(). Devuelve las filas borradas por tabla.
+    """
+    torneo_id = equipo.torneo_id
+    partidos = _partidos_de(equipo)
+    jugadores = Jugador.objects.filter(equipo=equipo)
+    _soltar_siguientes(partidos)
+    borradas = {
+        "eventos": borrar_en_lotes(
+            EventoPartido.objects.filter(equipo=equipo),
+            EventoPartido.objects.filter(partido__in=partidos.values("pk")),
+            EventoPartido.objects.filter(jugador__in=jugadores.values("pk")),
+            lote=lote,
+        ),
+        "estadisticas": borrar_en_lotes(
+            EstadisticaJugador.objects.filter(jugador__in=jugadores.values("pk")), lote=lote
+        ),
+        "historial_elo": borrar_en_lotes(HistorialElo.objects.filter(partido__in=partidos.values("pk")), lote=lote),
+        "posiciones": borrar_en_lotes(Posicion.objects.filter(equipo=equipo), lote=lote),
+        "partidos": borrar_en_lotes(partidos, lote=lote),
+        "jugadores": borrar_en_lotes(jugadores, lote=lote),
+        "equipos": borrar_en_lotes(Equipo.objects.filter(pk=equipo.pk), lote=lote),
+    }
+    with transaction.atomic():
+        if borradas["equipos"]:
+            cupos.liberar_equipos(torneo_id)
+        recalcular_posiciones(torneo_id)
+        recalcular_estadisticas(torneo_id)
+        recalcular_elo(torneo_id)
+    cache_torneos.invalidar(torneo_id)
+    return borradas
@@ -0,0 +1,116 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from .models import Equipo, Jugador, Torneo
+
+
+# Tabla FTS5 creada en la migración 0008 y mantenida por triggers (una
+# migración que rehaga core_torneo, core_equipo o core_jugador en SQLite
+# tiene que volver a crearlos, como la 0009).
+# rowid = id * MULTIPLO + tipo
+TABLA = "core_busqueda"
+MULTIPLO = 4
+TIPOS = {"torneo": 1, "equipo": 2, "jugador": 3}
+# Peso de las columnas en el ranking bm25 (titulo, texto): el nombre pesa más
+PESOS = (10.0, 1.0)
+LIMITE = 50
+
+_PALABRA = re.compile(r"\w+")
+
+REBUILD = f"""
+    INSERT INTO {TABLA}(rowid, titulo, texto)
+    SELECT id * 4 + 1, nombre, ubicacion || ' ' || descripcion FROM core_torneo
+    UNION ALL
+    SELECT id * 4 + 2, nombre, '' FROM core_equipo
+    UNION ALL
+    SELECT id * 4 + 3, nombre, email FROM core_jugador
+"""
+
+
+def consulta_fts(texto):
+    """
+    Traduce lo que escribe el usuario a una consulta FTS5: cada palabra
+    entre comillas (sin operadores ni sintaxis que pueda romper la
+    consulta) y como prefijo, todas obligatorias. "jose ma" -> '"jose"* "ma"*'.
+    Los acentos no importan: el tokenizador los quita de ambos lados.
+    Devuelve None si no hay palabras.
+    """
+    palabras = _PALABRA.findall(texto or "")
+    if not palabras:
+        return None
+    return " ".join(f'"{p}"*' for p in palabras)
+
+
+def buscar(texto, tipo=None, limite=LIMITE):
+    """
+    Busca en torneos, equipos y jugadores y devuelve [(tipo, objeto)] en
+    orden de relevancia (bm25). Una consulta al índice y una por tipo
+    encontrado para cargar los objetos.
+    """
+    consulta = consulta_fts(texto)
+    if consulta is None:
+        return []
+    sql = f"SELECT rowid FROM {TABLA} WHERE {TABLA} MATCH %s"
+    params = [consulta]
+    if tipo:
+        sql += f" AND rowid %% {MULTIPLO} = %s"
+        params.append(TIPOS[tipo])
+    sql += f" ORDER BY bm25({TABLA}, {PESOS[0]}, {PESOS[1]}) LIMIT %s"
+    params.append(limite)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        filas = [rowid for rowid, in cursor.fetchall()]
+
+    ids = {t: [] for t in TIPOS}
+    nombres = {codigo: t for t, codigo in TIPOS.items()}
+    orden = []
+    for rowid in filas:
+        t = nombres[rowid % MULTIPLO]
+        ids[t].append(rowid // MULTIPLO)
+        orden.append((t, rowid // MULTIPLO))
+    objetos = {
+        "torneo": Torneo.objects.in_bulk(ids["torneo"]) if ids["torneo"] else {},
+        "equipo": (
+            Equipo.objects.select_related("torneo").only("nombre", "torneo__nombre").in_bulk(ids["equipo"])
+            if ids["equipo"] else {}
+        ),
+        "jugador": (
+            Jugador.objects.select_related("equipo", "equipo__torneo")
+            .only("nombre", "email", "dorsal", "equipo__nombre", "equipo__torneo__nombre")
+            .in_bulk(ids["jugador"])
+            if ids["jugador"] else {}
+        ),
+    }
+    return [(t, objetos[t][pk]) for t, pk in orden if pk in objetos[t]]
+
+
+def filtrar_por_texto(queryset, texto, tipo):
+    """
+    Filtra un queryset (de `tipo`) a las filas que coinciden con `texto` en
+    el índice, para usarlo en los listados con su orden y paginación.
+    """
+    consulta = consulta_fts(texto)
+    if consulta is None:
+        return queryset
+    subconsulta = RawSQL(
+        f"SELECT rowid / {MULTIPLO} FROM {TABLA} WHERE {TABLA} MATCH %s AND rowid %% {MULTIPLO} = %s",
+        (consulta, TIPOS[tipo]),
+    )
+    return queryset.filter(pk__in=subconsulta)
+
+
+def reconstruir():
+    """
+    Vuelve a armar el índice desde las tablas (por si se desfasó, p. ej.
+    tras cargar datos con los triggers deshabilitados) y lo compacta.
+    Devuelve la cantidad de filas indexadas.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLA}")
+            cursor.execute(REBUILD)
+            cursor.execute(f"INSERT INTO {TABLA}({TABLA}) VALUES ('optimize')")
+            cursor.execute(f"SELECT count(*) FROM {TABLA}")
+            return cursor.fetchone()[0]
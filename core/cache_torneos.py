@@ -0,0 +1,139 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .filtros import filtrar_equipos
+from .forms import equipos_con_torneo
+from .models import Torneo
+
+
+# Nombres de las entradas cacheadas (para las estadísticas de aciertos/fallos)
+NOMBRES = ("torneos", "torneos_opciones", "equipos_opciones", "equipos", "jugadores", "partidos", "simulacion")
+
+_FALTA = object()
+
+
+def timeout():
+    return getattr(settings, "CACHE_TORNEOS_TIMEOUT", 600)
+
+
+def _clave_version(torneo_id):
+    return f"torneos:v:{torneo_id or 'todos'}"
+
+
+def _version_nueva():
+    # Basada en el reloj (ms): si la clave de versión se pierde (reinicio,
+    # desalojo) no se reutiliza un número viejo cuyas entradas podrían seguir
+    # cacheadas. Además sirve como marca de última modificación (API).
+    return int(time.time() * 1000)
+
+
+def version(torneo_id=None):
+    """Versión actual de un torneo (o la global si torneo_id es None)."""
+    clave = _clave_version(torneo_id)
+    v = cache.get(clave)
+    if v is None:
+        cache.add(clave, _version_nueva(), timeout=None)
+        v = cache.get(clave)
+    return v
+
+
+def _incrementar(clave):
+    # La nueva versión es la hora actual, o la anterior + 1 si el reloj no avanzó
+    anterior = cache.get(clave) or 0
+    cache.set(clave, max(_version_nueva(), anterior + 1), timeout=None)
+
+
+def modificado(torneo_id=None):
+    """Marca de última modificación del torneo (o global) como datetime UTC."""
+    return datetime.fromtimestamp(version(torneo_id) / 1000, tz=timezone.utc)
+
+
+def invalidar(torneo_id=None):
+    """
+    Sube la versión del torneo y la global (los listados sin filtro de
+    torneo mezclan todos). Se repite al confirmar la transacción para que
+    una lectura concurrente no deje cacheados datos previos al commit.
+    """
+    def subir():
+        if torneo_id:
+            _incrementar(_clave_version(torneo_id))
+        _incrementar(_clave_version(None))
+
+    subir()
+    transaction.on_commit(subir)
+
+
+def clave(nombre, torneo_id=None, *partes):
+    """
+    Clave de una entrada cacheada: incluye la versión vigente del torneo
+    (o la global si no se filtra por torneo), así que al invalidar las
+    entradas viejas simplemente dejan de leerse y expiran solas.
+    """
+    extra = hashlib.md5(":".join(str(p) for p in partes).encode()).hexdigest()[:16]
+    return f"torneos:{nombre}:{torneo_id or 'todos'}:{version(torneo_id)}:{extra}"
+
+
+def _contar(nombre, resultado):
+    contador = f"torneos:stats:{nombre}:{resultado}"
+    if not cache.add(contador, 1, timeout=None):
+        try:
+            cache.incr(contador)
+        except ValueError:
+            cache.set(contador, 1, timeout=None)
+
+
+def obtener(clave_entrada, calcular):
+    """Devuelve el valor cacheado bajo `clave_entrada` o lo calcula y lo guarda."""
+    nombre = clave_entrada.split(":")[1]
+    valor = cache.get(clave_entrada, _FALTA)
+    if valor is _FALTA:
+        _contar(nombre, "fallos")
+        valor = calcular()
+        cache.set(clave_entrada, valor, timeout())
+    else:
+        _contar(nombre, "aciertos")
+    return valor
+
+
+def estadisticas():
+    """Aciertos/fallos por tipo de entrada."""
+    claves = [f"torneos:stats:{n}:{r}" for n in NOMBRES for r in ("aciertos", "fallos")]
+    valores = cache.get_many(claves)
+    datos = {}
+    for n in NOMBRES:
+        aciertos = valores.get(f"torneos:stats:{n}:aciertos", 0)
+        fallos = valores.get(f"torneos:stats:{n}:fallos", 0)
+        total = aciertos + fallos
+        datos[n] = {
+            "aciertos": aciertos,
+            "fallos": fallos,
+            "tasa_aciertos": round(aciertos / total, 3) if total else None,
+        }
+    return datos
+
+
+def opciones_torneos():
+    """Torneos para los <select> de filtro."""
+    return obtener(
+        clave("torneos_opciones"),
+        lambda: list(Torneo.objects.only("id", "nombre").order_by("nombre")),
+    )
+
+
+def opciones_equipos(torneo_id="", equipo_id=""):
+    """
+    Equipos de un torneo para los <select> de filtro. Sin torneo no se
+    listan todos (la lista crecería con la base): sólo el equipo ya elegido,
+    si lo hay.
+    """
+    if not torneo_id:
+        return list(equipos_con_torneo().filter(pk=equipo_id)) if str(equipo_id).isdigit() else []
+    return obtener(
+        clave("equipos_opciones", torneo_id),
+        lambda: list(filtrar_equipos(equipos_con_torneo(), torneo_id)),
+    )
@@ -0,0 +1,102 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Equipo, Jugador, Torneo
+
+
+# Los contadores Torneo.equipos_count y Equipo.jugadores_count se mantienen
+# con un UPDATE condicional por alta/baja: el límite se valida en la misma
+# sentencia que reserva el lugar, así dos altas simultáneas no pueden pasar
+# el cupo (la que llega segunda no actualiza ninguna fila) y no hace falta
+# contar filas. Las altas masivas reservan varios lugares de una vez.
+
+
+def reservar_equipos(torneo_id, cantidad=1):
+    """
+    Reserva `cantidad` lugares de equipo en el torneo o lanza
+    ValidationError si no entran todos (y no reserva ninguno).
+    """
+    if not cantidad:
+        return
+    reservados = Torneo.objects.filter(
+        pk=torneo_id, equipos_count__lte=F("max_equipos") - cantidad
+    ).update(equipos_count=F("equipos_count") + cantidad)
+    if not reservados:
+        # sólo al rechazar: una consulta más para armar el mensaje
+        torneo = Torneo.objects.filter(pk=torneo_id).values("nombre", "max_equipos").first()
+        if torneo is None:
+            raise ValidationError("El torneo no existe.")
+        raise ValidationError(
+            f"El torneo '{torneo['nombre']}' ya tiene {torneo['max_equipos']} equipos (límite máximo)."
+        )
+
+
+def liberar_equipos(torneo_id, cantidad=1):
+    if cantidad:
+        Torneo.objects.filter(pk=torneo_id, equipos_count__gte=cantidad).update(
+            equipos_count=F("equipos_count") - cantidad
+        )
+
+
+def reservar_jugadores(equipo_id, cantidad=1):
+    """
+    Como reservar_equipos, para los jugadores de un equipo. El límite es
+    max_jugadores_por_equipo del torneo del equipo, leído en la misma
+    sentencia con una subconsulta.
+    """
+    if not cantidad:
+        return
+    limite = Subquery(Torneo.objects.filter(pk=OuterRef("torneo_id")).values("max_jugadores_por_equipo"))
+    reservados = Equipo.objects.filter(
+        pk=equipo_id, jugadores_count__lte=limite - cantidad
+    ).update(jugadores_count=F("jugadores_count") + cantidad)
+    if not reservados:
+        equipo = (
+            Equipo.objects.filter(pk=equipo_id)
+            .values("nombre", "torneo__nombre", "torneo__max_jugadores_por_equipo")
+            .first()
+        )
+        if equipo is None:
+            raise ValidationError("El equipo no existe.")
+        raise ValidationError(
+            f"El equipo '{equipo['nombre']} ({equipo['torneo__nombre']})' ya tiene "
+            f"{equipo['torneo__max_jugadores_por_equipo']} jugadores (límite máximo)."
+        )
+
+
+def liberar_jugadores(equipo_id, cantidad=1):
+    if cantidad:
+        Equipo.objects.filter(pk=equipo_id, jugadores_count__gte=cantidad).update(
+            jugadores_count=F("jugadores_count") - cantidad
+        )
+
+
+def reconciliar(torneo_id=None):
+    """
+    Recalcula los contadores desde las tablas (por si se desfasaron, p. ej.
+    tras cargar filas sin pasar por el ORM). Un UPDATE por tabla que sólo
+    toca las filas desfasadas. Devuelve (torneos, equipos) corregidos.
+    """
+    def conteo(modelo, campo):
+        filas = modelo.objects.filter(**{campo: OuterRef("pk")}).values(campo)
+        return Coalesce(Subquery(filas.annotate(n=Count("pk")).values("n")), 0)
+
+    torneos = Torneo.objects.all()
+    equipos = Equipo.objects.all()
+    if torneo_id is not None:
+        torneos = torneos.filter(pk=torneo_id)
+        equipos = equipos.filter(torneo_id=torneo_id)
+    with transaction.atomic():
+        n_equipos = (
+            equipos.annotate(real=conteo(Jugador, "equipo"))
+            .exclude(jugadores_count=F("real"))
+            .update(jugadores_count=conteo(Jugador, "equipo"))
+        )
+        n_torneos = (
+            torneos.annotate(real=conteo(Equipo, "torneo"))
+            .exclude(equipos_count=F("real"))
+            .update(equipos_count=conteo(Equipo, "torneo"))
+        )
+    return n_torneos, n_equipos
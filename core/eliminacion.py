@@ -0,0 +1,166 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import cache_torneos
+from .fixture import INTERVALO_JORNADAS, inicio_por_defecto
+from .models import Equipo, Partido
+from .posiciones import equipos_en_orden
+from .sqlite import reintentar_si_bloqueada
+
+
+NOMBRES_RONDA = {1: "Final", 2: "Semifinal", 4: "Cuartos de final", 8: "Octavos de final"}
+
+
+def orden_siembra(tamano):
+    """
+    Cabezas de serie (1 = el mejor) en el orden en que se ubican en la
+    primera ronda de una llave de `tamano` lugares (potencia de 2), de modo
+    que 1 y 2 sólo puedan cruzarse en la final, 1..4 en semifinales, etc.
+    Para 8: [1, 8, 4, 5, 2, 7, 3, 6].
+    """
+    orden = [1]
+    while len(orden) < tamano:
+        n = len(orden) * 2
+        orden = [x for s in orden for x in (s, n + 1 - s)]
+    return orden
+
+
+def nombre_ronda(ronda, total):
+    partidos = 1 << (total - ronda)
+    return NOMBRES_RONDA.get(partidos, f"Ronda {ronda}")
+
+
+def parse_orden(valor):
+    """'3, 1, 2' -> [3, 1, 2] (ids de equipo en orden de siembra)"""
+    ids = []
+    for parte in (valor or "").split(","):
+        parte = parte.strip()
+        if not parte:
+            continue
+        if not parte.isdigit():
+            raise ValueError(f"Id de equipo inválido: '{parte}'.")
+        ids.append(int(parte))
+    if len(set(ids)) != len(ids):
+        raise ValueError("Hay equipos repetidos en el orden de siembra.")
+    return ids
+
+
+def sembrar_equipos(torneo, orden=None, cantidad=None, por_elo=False):
+    """
+    Equipos que entran a la llave, del primer cabeza de serie al último.
+    Con `orden` (ids) la siembra es manual y entran sólo esos equipos; si no,
+    sale de la tabla de posiciones (o del Elo, con `por_elo`). `cantidad`
+    toma sólo los primeros.
+    """
+    if orden:
+        equipos = Equipo.objects.filter(torneo=torneo).in_bulk(orden)
+        faltan = [str(i) for i in orden if i not in equipos]
+        if faltan:
+            raise ValidationError(f"Equipos que no son del torneo: {', '.join(faltan)}.")
+        sembrados = [equipos[i] for i in orden]
+    elif por_elo:
+        sembrados = list(Equipo.objects.filter(torneo=torneo).order_by("-elo", "nombre"))
+    else:
+        sembrados = list(equipos_en_orden(torneo.id))
+    if cantidad:
+        sembrados = sembrados[:cantidad]
+    return sembrados
+
+
+@reintentar_si_bloqueada
+def generar_llave(torneo, equipos, inicio=None, intervalo=INTERVALO_JORNADAS):
+    """
+    Crea la llave de eliminación directa completa de un torneo: todas las
+    rondas de una vez (un bulk_create por ronda, de la final hacia atrás
+    para que cada partido ya tenga el id de su `siguiente`). `equipos` va
+    en orden de siembra. Si no son potencia de 2, los mejores sembrados
+    pasan directo a la segunda ronda (bye) y esos partidos no se crean.
+    Los lugares que se definen más adelante quedan con el equipo vacío.
+    Devuelve la lista de partidos creados.
+    """
+    if len(equipos) < 2:
+        raise ValidationError("Se necesitan al menos 2 equipos para la llave.")
+    if Partido.objects.filter(torneo=torneo, ronda__isnull=False).exists():
+        raise ValidationError("El torneo ya tiene una llave de eliminación.")
+    if inicio is None:
+        inicio = inicio_por_defecto()
+
+    total = (len(equipos) - 1).bit_length()
+    tamano = 1 << total
+    lugares = [equipos[s - 1] if s <= len(equipos) else None for s in orden_siembra(tamano)]
+
+    rondas = []
+    for ronda in range(1, total + 1):
+        fecha = inicio + intervalo * (ronda - 1)
+        rondas.append([
+            Partido(torneo=torneo, ronda=ronda, llave=k + 1, fecha=fecha, estado="pendiente")
+            for k in range(tamano >> ronda)
+        ])
+    for r, partidos in enumerate(rondas[:-1]):
+        for k, p in enumerate(partidos):
+            p.siguiente = rondas[r + 1][k // 2]
+            p.lado_siguiente = k % 2 + 1
+
+    byes = set()
+    for k, p in enumerate(rondas[0]):
+        e1, e2 = lugares[2 * k], lugares[2 * k + 1]
+        if e1 and e2:
+            p.equipo1, p.equipo2 = e1, e2
+        else:
+            # el sembrado sin rival pasa directo a su lugar en la segunda ronda
+            setattr(p.siguiente, "equipo1" if p.lado_siguiente == 1 else "equipo2", e1 or e2)
+            byes.add(k)
+    rondas[0] = [p for k, p in enumerate(rondas[0]) if k not in byes]
+
+    for partidos in rondas:
+        for p in partidos:
+            # torneo y equipos ya en memoria: sin SELECT por FK
+            p.full_clean(exclude=["torneo", "equipo1", "equipo2", "siguiente"])
+
+    creados = []
+    with transaction.atomic():
+        for partidos in reversed(rondas):
+            creados.extend(Partido.objects.bulk_create(partidos))
+        # bulk_create no emite post_save: se invalida la caché a mano
+        cache_torneos.invalidar(torneo.id)
+    return creados
+
+
+def ganador_id(partido):
+    if partido.estado != "jugado" or partido.marcador1 == partido.marcador2:
+        return None
+    return partido.equipo1_id if partido.marcador1 > partido.marcador2 else partido.equipo2_id
+
+
+def avanzar(partido):
+    """
+    Pasa al ganador de `partido` a su lugar en el partido siguiente de la
+    llave: un UPDATE por el enlace guardado, sin recorrer la llave. Debe
+    llamarse dentro de la transacción que guarda el resultado. Si el
+    siguiente ya se jugó con otro equipo en ese lugar, no se cambia.
+    """
+    ganador = ganador_id(partido)
+    if partido.siguiente_id is None or ganador is None:
+        return
+    campo = "equipo1_id" if partido.lado_siguiente == 1 else "equipo2_id"
+    siguiente = Partido.objects.filter(pk=partido.siguiente_id)
+    if siguiente.filter(estado="pendiente").update(**{campo: ganador}):
+        return
+    if siguiente.exclude(**{campo: ganador}).exists():
+        raise ValidationError("El partido siguiente de la llave ya se jugó con otro equipo.")
+
+
+def rondas_de_llave(torneo):
+    """[(nombre de la ronda, [partidos])] de la llave del torneo, en orden."""
+    partidos = list(
+        Partido.objects.filter(torneo=torneo, ronda__isnull=False)
+        .select_related("equipo1", "equipo2")
+        .order_by("ronda", "llave")
+    )
+    if not partidos:
+        return []
+    total = partidos[-1].ronda
+    rondas = {}
+    for p in partidos:
+        rondas.setdefault(p.ronda, []).append(p)
+    return [(nombre_ronda(r, total), rondas[r]) for r in sorted(rondas)]
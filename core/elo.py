@@ -0,0 +1,127 @@
+from django.db import transaction
+from django.db.models import Case, F, When
+
+from .models import ELO_INICIAL, Equipo, HistorialElo, Partido
+
+
+# Rating Elo de cada equipo: sube al ganar y baja al perder, más cuanto más
+# inesperado es el resultado. Cada partido jugado deja su fila en
+# HistorialElo con los ratings previos y el cambio, así un alta, una baja o
+# una corrección se aplican tocando sólo los dos equipos del partido.
+
+# Puntos en juego por partido
+K = 20
+# Diferencia de rating con la que el favorito gana 10 a 1 (escala clásica)
+ESCALA = 400
+LOTE = 2000
+
+
+def _resultado(datos):
+    """
+    Extrae (equipo1_id, equipo2_id, marcador1, marcador2) de un partido o de
+    un dict con CAMPOS_RESULTADO. None si no cuenta (no jugado o sin ambos
+    equipos). Los partidos de la llave también cuentan.
+    """
+    if datos is None:
+        return None
+    if not isinstance(datos, dict):
+        datos = {campo: getattr(datos, campo) for campo in Partido.CAMPOS_RESULTADO}
+    if datos["estado"] != "jugado" or not datos["equipo1_id"] or not datos["equipo2_id"]:
+        return None
+    return datos["equipo1_id"], datos["equipo2_id"], datos["marcador1"] or 0, datos["marcador2"] or 0
+
+
+def esperado(elo1, elo2):
+    """Puntos que se esperan del equipo 1 (1 gana, 0.5 empata) según los ratings."""
+    return 1 / (1 + 10 ** ((elo2 - elo1) / ESCALA))
+
+
+def cambio(elo1, elo2, marcador1, marcador2):
+    """
+    Lo que gana el equipo 1 (y pierde el 2). Las goleadas pesan más: x1.5
+    por dos goles de diferencia y (11 + N) / 8 desde tres.
+    """
+    diferencia = abs(marcador1 - marcador2)
+    peso = 1 if diferencia <= 1 else 1.5 if diferencia == 2 else (11 + diferencia) / 8
+    real = 1 if marcador1 > marcador2 else 0.5 if marcador1 == marcador2 else 0
+    return K * peso * (real - esperado(elo1, elo2))
+
+
+def _sumar(equipo1_id, equipo2_id, delta):
+    # un solo UPDATE para los dos equipos
+    Equipo.objects.filter(pk__in=(equipo1_id, equipo2_id)).update(
+        elo=Case(When(pk=equipo1_id, then=F("elo") + delta), default=F("elo") - delta)
+    )
+
+
+def actualizar_elo(partido_id, anterior, nuevo):
+    """
+    Aplica al rating de los equipos la diferencia entre el resultado anterior
+    y el nuevo de un partido; cualquiera de los dos puede ser None. Revierte
+    el cambio guardado en el historial y calcula el nuevo con los ratings
+    actuales: corregir un resultado viejo es una aproximación hasta el
+    próximo `rebuild_elo`, que rehace el orden exacto.
+    Debe llamarse dentro de la transacción que modifica el partido y, para
+    una baja, antes de borrarlo (el historial se borra con él).
+    """
+    viejo = _resultado(anterior)
+    actual = _resultado(nuevo)
+    if viejo == actual:
+        return
+    if viejo:
+        historial = HistorialElo.objects.filter(partido_id=partido_id).first()
+        if historial is not None:
+            _sumar(viejo[0], viejo[1], -historial.cambio)
+            historial.delete()
+    if actual:
+        e1, e2, m1, m2 = actual
+        elos = dict(Equipo.objects.filter(pk__in=(e1, e2)).values_list("id", "elo"))
+        delta = cambio(elos[e1], elos[e2], m1, m2)
+        _sumar(e1, e2, delta)
+        HistorialElo.objects.create(partido_id=partido_id, elo1=elos[e1], elo2=elos[e2], cambio=delta)
+
+
+def recalcular_elo(torneo_id=None):
+    """
+    Rehace los ratings (de un torneo o de todos) reproduciendo los partidos
+    jugados en orden (fecha, id) en una sola pasada: los partidos se leen
+    con iterator() en lotes, sin cargarlos todos en memoria; sólo se guarda
+    el rating de cada equipo. Devuelve la cantidad de partidos procesados.
+    """
+    partidos = Partido.objects.filter(estado="jugado", equipo1__isnull=False, equipo2__isnull=False)
+    equipos = Equipo.objects.all()
+    historial = HistorialElo.objects.all()
+    if torneo_id is not None:
+        partidos = partidos.filter(torneo_id=torneo_id)
+        equipos = equipos.filter(torneo_id=torneo_id)
+        historial = historial.filter(partido__torneo_id=torneo_id)
+    filas = (
+        partidos.order_by("fecha", "id")
+        .values_list("id", "equipo1_id", "equipo2_id", "marcador1", "marcador2")
+        .iterator(chunk_size=LOTE)
+    )
+
+    elos = {}
+    lote = []
+    procesados = 0
+    with transaction.atomic():
+        historial.delete()
+        for partido_id, e1, e2, m1, m2 in filas:
+            elo1 = elos.get(e1, ELO_INICIAL)
+            elo2 = elos.get(e2, ELO_INICIAL)
+            delta = cambio(elo1, elo2, m1 or 0, m2 or 0)
+            elos[e1] = elo1 + delta
+            elos[e2] = elo2 - delta
+            lote.append(HistorialElo(partido_id=partido_id, elo1=elo1, elo2=elo2, cambio=delta))
+            procesados += 1
+            if len(lote) >= LOTE:
+                HistorialElo.objects.bulk_create(lote)
+                lote = []
+        HistorialElo.objects.bulk_create(lote)
+        # los que no jugaron vuelven al inicial; el resto, en lotes
+        equipos.exclude(elo=ELO_INICIAL).update(elo=ELO_INICIAL)
+        Equipo.objects.bulk_update(
+            [Equipo(pk=equipo_id, elo=elo) for equipo_id, elo in elos.items()], ["elo"], batch_size=500
+        )
+    return procesados
+
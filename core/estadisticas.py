@@ -0,0 +1,151 @@
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import EstadisticaJugador, EventoPartido
+
+
+# Columna de EstadisticaJugador que suma cada tipo de evento (los goles en
+# contra y los cambios sólo cuentan como partido jugado)
+CAMPO_POR_TIPO = {"gol": "goles", "asistencia": "asistencias", "amarilla": "amarillas", "roja": "rojas"}
+
+# Tablas de líderes: nombre -> (título, columnas en orden descendente).
+# Cada una tiene su índice en EstadisticaJugador, del que sale el top N.
+TABLAS = {
+    "goleadores": ("Goleadores", ("goles",)),
+    "asistencias": ("Asistencias", ("asistencias",)),
+    "tarjetas": ("Tarjetas", ("rojas", "amarillas")),
+    "partidos": ("Partidos jugados", ("partidos",)),
+}
+LIMITE = 20
+
+
+def _evento(datos):
+    """
+    Extrae (torneo_id, partido_id, jugador_id, tipo) de un evento o de un
+    dict con CAMPOS_ESTADISTICA y partido__torneo_id. None si no hay evento.
+    """
+    if datos is None:
+        return None
+    if not isinstance(datos, dict):
+        # el partido ya se cargó al validar el evento
+        return datos.partido.torneo_id, datos.partido_id, datos.jugador_id, datos.tipo
+    return datos["partido__torneo_id"], datos["partido_id"], datos["jugador_id"], datos["tipo"]
+
+
+def _otro_evento(partido_id, jugador_id, excluir=None):
+    eventos = EventoPartido.objects.filter(partido_id=partido_id, jugador_id=jugador_id)
+    if excluir is not None:
+        eventos = eventos.exclude(pk=excluir)
+    return eventos.exists()
+
+
+def _aplicar(evento, signo, aparicion):
+    torneo_id, _, jugador_id, tipo = evento
+    deltas = {}
+    campo = CAMPO_POR_TIPO.get(tipo)
+    if campo:
+        deltas[campo] = F(campo) + signo
+    if aparicion:
+        deltas["partidos"] = F("partidos") + signo
+    if not deltas:
+        return
+    EstadisticaJugador.objects.bulk_create(
+        [EstadisticaJugador(torneo_id=torneo_id, jugador_id=jugador_id)], ignore_conflicts=True
+    )
+    EstadisticaJugador.objects.filter(torneo_id=torneo_id, jugador_id=jugador_id).update(**deltas)
+
+
+def actualizar_estadisticas(anterior, nuevo):
+    """
+    Aplica a las estadísticas la diferencia entre el evento anterior y el
+    nuevo. Cualquiera de los dos puede ser None (alta o baja). Debe llamarse
+    dentro de la transacción que modifica el evento, después de escribirlo:
+    el partido cuenta como jugado mientras el jugador tenga algún evento en él.
+    """
+    viejo = _evento(anterior)
+    actual = _evento(nuevo)
+    if viejo == actual:
+        return
+    # mismo jugador en el mismo partido: sólo cambia el tipo
+    mismo_partido = viejo is not None and actual is not None and viejo[:3] == actual[:3]
+    if viejo:
+        _aplicar(viejo, -1, not mismo_partido and not _otro_evento(viejo[1], viejo[2]))
+    if actual:
+        _aplicar(actual, 1, not mismo_partido and not _otro_evento(actual[1], actual[2], excluir=nuevo.pk))
+
+
+def recalcular_estadisticas(torneo_id=None):
+    """
+    Reconstruye las estadísticas de los jugadores (de un torneo o de todos)
+    desde los eventos con una sola consulta agregada. Sirve para corregir
+    cualquier desfase de la actualización incremental.
+    Devuelve la cantidad de filas escritas.
+    """
+    eventos = EventoPartido.objects.all()
+    estadisticas = EstadisticaJugador.objects.all()
+    if torneo_id is not None:
+        eventos = eventos.filter(partido__torneo_id=torneo_id)
+        estadisticas = estadisticas.filter(torneo_id=torneo_id)
+    totales = (
+        eventos.order_by()
+        .values("partido__torneo_id", "jugador_id")
+        .annotate(
+            partidos=Count("partido", distinct=True),
+            **{campo: Count("id", filter=Q(tipo=tipo)) for tipo, campo in CAMPO_POR_TIPO.items()},
+        )
+    )
+    with transaction.atomic():
+        filas = [
+            EstadisticaJugador(
+                torneo_id=t.pop("partido__torneo_id"), jugador_id=t.pop("jugador_id"), **t
+            )
+            for t in totales
+        ]
+        estadisticas.delete()
+        EstadisticaJugador.objects.bulk_create(filas, batch_size=1000)
+    return len(filas)
+
+
+def lideres(torneo_id, tabla, limite=LIMITE):
+    """
+    Top `limite` de una tabla de TABLAS para el torneo, leído de las filas
+    precalculadas en el orden de su índice. Sólo jugadores con algo que
+    mostrar en esa tabla.
+    """
+    columnas = TABLAS[tabla][1]
+    con_valor = Q()
+    for columna in columnas:
+        con_valor |= Q(**{f"{columna}__gt": 0})
+    return (
+        EstadisticaJugador.objects.filter(con_valor, torneo_id=torneo_id)
+        .select_related("jugador", "jugador__equipo")
+        .only(*columnas, "jugador__nombre", "jugador__equipo__nombre")
+        .order_by(*(F(c).desc() for c in columnas), "jugador_id")[:limite]
+    )
+
+
+def marcador_desde_eventos(partido):
+    """
+    (marcador1, marcador2) según los goles cargados: los goles de cada
+    equipo más los goles en contra del rival.
+    """
+    e1, e2 = partido.equipo1_id, partido.equipo2_id
+    return tuple(
+        EventoPartido.objects.filter(partido=partido).aggregate(
+            m1=Count("id", filter=Q(tipo="gol", equipo_id=e1) | Q(tipo="autogol", equipo_id=e2)),
+            m2=Count("id", filter=Q(tipo="gol", equipo_id=e2) | Q(tipo="autogol", equipo_id=e1)),
+        ).values()
+    )
+
+
+def sincronizar_marcador(partido):
+    """
+    Pone en el partido el marcador que dan sus goles y lo guarda (con la
+    tabla de posiciones y la llave). Devuelve True si cambió.
+    """
+    marcador = marcador_desde_eventos(partido)
+    if marcador == (partido.marcador1, partido.marcador2):
+        return False
+    partido.marcador1, partido.marcador2 = marcador
+    partido.save()
+    return True
@@ -0,0 +1,200 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+@dataclass(frozen=True)
+class Evento:
+    id: int
+    torneo_id: int
+    tipo: str
+    datos: dict = field(default_factory=dict)
+
+
+class MemoriaBackend:
+    """
+    Pub/sub dentro del proceso. `publicar` se llama desde código
+    sincrónico (cualquier hilo) y reparte el evento a las colas de los
+    suscriptores, que viven en el event loop del servidor ASGI. Guarda los
+    últimos eventos de cada torneo para que un cliente que se reconecta
+    retome desde su Last-Event-ID.
+
+    Los ids salen de un reloj en milisegundos que nunca retrocede, así
+    siguen creciendo después de reiniciar el proceso.
+    """
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._historial = defaultdict(lambda: deque(maxlen=settings.EVENTOS_HISTORIAL))
+        self._ultimo_id = 0
+        self._suscriptores = defaultdict(set)  # torneo_id -> {(loop, cola)}
+
+    def _nuevo_id(self):
+        self._ultimo_id = max(self._ultimo_id + 1, int(time.time() * 1000))
+        return self._ultimo_id
+
+    def publicar(self, torneo_id, tipo, datos):
+        with self._candado:
+            evento = Evento(self._nuevo_id(), torneo_id, tipo, datos)
+            self._historial[torneo_id].append(evento)
+        self._repartir(evento)
+        return evento
+
+    async def historial(self, torneo_id, desde):
+        """Eventos guardados del torneo con id mayor que `desde`."""
+        with self._candado:
+            return [e for e in self._historial.get(torneo_id, ()) if e.id > desde]
+
+    def _repartir(self, evento):
+        with self._candado:
+            suscriptores = list(self._suscriptores.get(evento.torneo_id, ()))
+        for loop, cola in suscriptores:
+            try:
+                loop.call_soon_threadsafe(_entregar, cola, evento)
+            except RuntimeError:
+                pass  # loop cerrado: la suscripción se limpia al salir
+
+    def _registrar(self, torneo_id, suscripcion):
+        with self._candado:
+            self._suscriptores[torneo_id].add(suscripcion)
+
+    def _quitar(self, torneo_id, suscripcion):
+        with self._candado:
+            suscriptores = self._suscriptores.get(torneo_id)
+            if suscriptores is not None:
+                suscriptores.discard(suscripcion)
+                if not suscriptores:
+                    del self._suscriptores[torneo_id]
+
+    async def suscribir(self, torneo_id, desde=0, latido=None):
+        """
+        Generador asíncrono de los eventos del torneo: primero los guardados
+        posteriores a `desde` y después los nuevos a medida que llegan. Si
+        pasan `latido` segundos sin eventos entrega None (para mantener viva
+        la conexión). No consulta la base: una conexión quieta no cuesta nada.
+        """
+        cola = asyncio.Queue(maxsize=settings.EVENTOS_COLA)
+        suscripcion = (asyncio.get_running_loop(), cola)
+        # se registra antes de leer el historial para no perder lo que llegue en el medio
+        self._registrar(torneo_id, suscripcion)
+        try:
+            ultimo = desde or 0
+            for evento in await self.historial(torneo_id, ultimo):
+                ultimo = evento.id
+                yield evento
+            while True:
+                try:
+                    evento = await asyncio.wait_for(cola.get(), latido)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if evento.id <= ultimo:
+                    continue
+                ultimo = evento.id
+                yield evento
+        finally:
+            self._quitar(torneo_id, suscripcion)
+
+
+class CacheBackend(MemoriaBackend):
+    """
+    Variante para varios procesos: los eventos se guardan en la caché
+    compartida (un contador por torneo y una clave por evento) y cada
+    proceso tiene una sola tarea por torneo con suscriptores que la mira
+    cada EVENTOS_INTERVALO_S segundos y reparte lo nuevo a sus conexiones.
+    La carga sobre la caché no depende de cuántos clientes haya.
+    Necesita una caché compartida con incr() atómico (memcached, redis).
+    """
+
+    PREFIJO = "eventos"
+
+    def __init__(self):
+        super().__init__()
+        self._sondeos = {}  # torneo_id -> tarea
+
+    def _clave(self, torneo_id, evento_id=None):
+        if evento_id is None:
+            return f"{self.PREFIJO}:{torneo_id}:ultimo"
+        return f"{self.PREFIJO}:{torneo_id}:{evento_id}"
+
+    def publicar(self, torneo_id, tipo, datos):
+        contador = self._clave(torneo_id)
+        cache.add(contador, 0, None)
+        evento = Evento(cache.incr(contador), torneo_id, tipo, datos)
+        cache.set(self._clave(torneo_id, evento.id), evento, settings.EVENTOS_RETENCION_S)
+        return evento
+
+    async def historial(self, torneo_id, desde):
+        ultimo = await cache.aget(self._clave(torneo_id), 0)
+        primero = max(desde + 1, ultimo - settings.EVENTOS_HISTORIAL + 1)
+        claves = [self._clave(torneo_id, i) for i in range(primero, ultimo + 1)]
+        guardados = await cache.aget_many(claves) if claves else {}
+        return [guardados[c] for c in claves if c in guardados]
+
+    def _registrar(self, torneo_id, suscripcion):
+        super()._registrar(torneo_id, suscripcion)
+        tarea = self._sondeos.get(torneo_id)
+        if tarea is None or tarea.done():
+            self._sondeos[torneo_id] = asyncio.get_running_loop().create_task(self._sondear(torneo_id))
+
+    async def _sondear(self, torneo_id):
+        ultimo = await cache.aget(self._clave(torneo_id), 0)
+        while self._suscriptores.get(torneo_id):
+            await asyncio.sleep(settings.EVENTOS_INTERVALO_S)
+            for evento in await self.historial(torneo_id, ultimo):
+                ultimo = evento.id
+                self._repartir(evento)
+        self._sondeos.pop(torneo_id, None)
+
+
+def _entregar(cola, evento):
+    # cliente lento: se descarta lo más viejo (puede reconectarse con Last-Event-ID)
+    if cola.full():
+        cola.get_nowait()
+    cola.put_nowait(evento)
+
+
+_backend = None
+
+
+def backend():
+    """Backend configurado en EVENTOS_BACKEND (una instancia por proceso)."""
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.EVENTOS_BACKEND)()
+    return _backend
+
+
+def datos_resultado(partido):
+    # sin __str__ de Equipo, que carga el torneo de cada equipo
+    return {
+        "partido": partido.pk,
+        "equipo1": partido.equipo1.nombre if partido.equipo1_id else None,
+        "equipo2": partido.equipo2.nombre if partido.equipo2_id else None,
+        "marcador1": partido.marcador1,
+        "marcador2": partido.marcador2,
+        "estado": partido.estado,
+        "fecha": partido.fecha.isoformat() if partido.fecha else None,
+    }
+
+
+def publicar_resultados(partidos):
+    """
+    Publica el resultado de cada partido cuando la transacción en curso se
+    confirma (si se revierte, no se publica nada). Los datos se arman
+    ahora, con los equipos ya cargados.
+    """
+    eventos = [(p.torneo_id, datos_resultado(p)) for p in partidos]
+
+    def enviar():
+        for torneo_id, datos in eventos:
+            backend().publicar(torneo_id, "resultado", datos)
+
+    transaction.on_commit(enviar)
@@ -0,0 +1,87 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+FORMATOS_EXPORTACION = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson; charset=utf-8", "ndjson"),
+}
+# Filas por lectura a la base y por trozo enviado al cliente
+TAMANO_LOTE = 2000
+
+# (encabezado, campo para values_list)
+COLUMNAS_PARTIDOS = [
+    ("id", "id"),
+    ("torneo", "torneo__nombre"),
+    ("equipo1", "equipo1__nombre"),
+    ("equipo2", "equipo2__nombre"),
+    ("fecha", "fecha"),
+    ("sede", "sede"),
+    ("estado", "estado"),
+    ("marcador1", "marcador1"),
+    ("marcador2", "marcador2"),
+]
+COLUMNAS_JUGADORES = [
+    ("id", "id"),
+    ("nombre", "nombre"),
+    ("dorsal", "dorsal"),
+    ("email", "email"),
+    ("equipo", "equipo__nombre"),
+    ("torneo", "equipo__torneo__nombre"),
+]
+COLUMNAS_EQUIPOS = [
+    ("id", "id"),
+    ("nombre", "nombre"),
+    ("torneo", "torneo__nombre"),
+    ("jugadores", "jugadores_count"),
+]
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def en_lotes(lineas):
+    # agrupa líneas para no enviar un trozo HTTP por fila
+    lote = []
+    for linea in lineas:
+        lote.append(linea)
+        if len(lote) >= TAMANO_LOTE:
+            yield "".join(lote)
+            lote = []
+    if lote:
+        yield "".join(lote)
+
+
+def lineas_csv(encabezados, filas):
+    escritor = csv.writer(_Eco())
+    # el encabezado sale solo, antes de tocar la base: el primer byte no espera a la consulta
+    yield escritor.writerow(encabezados)
+    yield from en_lotes(escritor.writerow(fila) for fila in filas)
+
+
+def lineas_ndjson(encabezados, filas):
+    codificador = DjangoJSONEncoder(ensure_ascii=False)
+    yield from en_lotes(
+        codificador.encode(dict(zip(encabezados, fila))) + "\n" for fila in filas
+    )
+
+
+def respuesta_exportacion(queryset, columnas, formato, nombre):
+    """
+    Exporta `queryset` en streaming: lee tuplas con values_list() e
+    iterator(chunk_size) y las envía a medida que se generan, así la memoria
+    no crece con la cantidad de filas.
+    """
+    tipo, extension = FORMATOS_EXPORTACION[formato]
+    encabezados = [e for e, _ in columnas]
+    filas = queryset.values_list(*[c for _, c in columnas]).iterator(chunk_size=TAMANO_LOTE)
+    generador = lineas_csv if formato == "csv" else lineas_ndjson
+    respuesta = StreamingHttpResponse(generador(encabezados, filas), content_type=tipo)
+    respuesta["Content-Disposition"] = f'attachment; filename="{nombre}.{extension}"'
+    return respuesta
@@ -0,0 +1,33 @@
+from django.db.models import Q, Subquery
+
+from .models import Equipo
+
+
+# Filtros compartidos por los listados HTML, las exportaciones y la API
+
+def filtrar_jugadores(jugadores, torneo_id="", equipo_id=""):
+    if torneo_id:
+        jugadores = jugadores.filter(equipo__torneo_id=torneo_id)
+    if equipo_id:
+        jugadores = jugadores.filter(equipo_id=equipo_id)
+    return jugadores
+
+
+def filtrar_partidos(partidos, torneo_id="", equipo_id=""):
+    if torneo_id:
+        partidos = partidos.filter(torneo_id=torneo_id)
+    if equipo_id:
+        partidos = partidos.filter(Q(equipo1_id=equipo_id) | Q(equipo2_id=equipo_id))
+        if not torneo_id:
+            # Un partido es del torneo de sus equipos: acotar por torneo deja usar
+            # el índice (torneo, fecha) en vez de unir dos índices y ordenar aparte
+            partidos = partidos.filter(
+                torneo_id=Subquery(Equipo.objects.filter(pk=equipo_id).values("torneo_id")[:1])
+            )
+    return partidos
+
+
+def filtrar_equipos(equipos, torneo_id=""):
+    if torneo_id:
+        equipos = equipos.filter(torneo_id=torneo_id)
+    return equipos
@@ -0,0 +1,184 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache_torneos
+from .models import Equipo, Partido
+from .programacion import programar
+from .sqlite import reintentar_si_bloqueada
+
+
+INTERVALO_JORNADAS = timedelta(days=7)
+# El partido de vuelta se juega en la misma semana que el de ida
+DESFASE_VUELTA = timedelta(days=3)
+
+
+def calcular_jornadas(equipos):
+    """
+    Algoritmo círculo (round-robin) en memoria.
+    Devuelve una lista de jornadas; cada jornada es una lista de parejas
+    (a, b) normalizadas por id. Si hay un número impar de equipos se
+    agrega un "bye" (None) y quien le toque descansa esa jornada.
+    """
+    arr = list(equipos)
+    if len(arr) % 2 == 1:
+        arr.append(None)
+    n = len(arr)
+    mitad = n // 2
+
+    jornadas = []
+    for ronda in range(n - 1):
+        parejas = []
+        for i in range(mitad):
+            a = arr[i]
+            b = arr[-(i + 1)]
+            if a is not None and b is not None:
+                parejas.append((a, b) if a.id < b.id else (b, a))
+        jornadas.append(parejas)
+        # rotación
+        arr = [arr[0]] + [arr[-1]] + arr[1:-1]
+    return jornadas
+
+
+def inicio_por_defecto():
+    # hoy a la hora redondeada
+    return timezone.localtime().replace(microsecond=0, second=0, minute=0)
+
+
+def parse_inicio(valor):
+    """Convierte 'YYYY-MM-DD' o 'YYYY-MM-DDTHH:MM' en datetime con zona horaria."""
+    if not valor:
+        return None
+    try:
+        inicio = datetime.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f"Fecha de inicio inválida: '{valor}'.")
+    if timezone.is_naive(inicio):
+        inicio = timezone.make_aware(inicio)
+    return inicio
+
+
+def parse_intervalo(valor):
+    """Convierte un número de días en timedelta (mínimo 1 día)."""
+    if not valor:
+        return INTERVALO_JORNADAS
+    try:
+        dias = int(valor)
+    except ValueError:
+        raise ValueError(f"Intervalo inválido: '{valor}'.")
+    if dias < 1:
+        raise ValueError("El intervalo entre jornadas debe ser de al menos 1 día.")
+    return timedelta(days=dias)
+
+
+@reintentar_si_bloqueada
+def generar_fixture(torneo, ida_vuelta=False, inicio=None, intervalo=INTERVALO_JORNADAS,
+                    restricciones=None):
+    """
+    Genera el fixture round-robin de un torneo con un número constante de
+    consultas: carga los equipos y las parejas ya existentes una sola vez,
+    arma todas las jornadas en memoria, las valida sin tocar la base y las
+    inserta con bulk_create. Los partidos que ya existen no se duplican.
+    Devuelve la lista de partidos creados.
+
+    Con `restricciones` (ver core/programacion.py) las fechas no salen de
+    `inicio` + `intervalo`: cada partido recibe un turno (fecha, hora y
+    sede) que respeta sedes, horarios, fechas bloqueadas y descanso. Si
+    algún partido no entra, no se crea nada y se informa el motivo.
+    """
+    if inicio is None:
+        inicio = inicio_por_defecto()
+
+    equipos = list(Equipo.objects.filter(torneo=torneo).order_by("id"))
+    for e in equipos:
+        # evita que clean() vuelva a cargar el torneo de cada equipo
+        e.torneo = torneo
+    if len(equipos) < 2:
+        raise ValidationError("Se necesitan al menos 2 equipos en el torneo.")
+
+    existentes = set(
+        Partido.objects.filter(torneo=torneo).values_list("equipo1_id", "equipo2_id")
+    )
+
+    if restricciones is not None:
+        return _generar_con_restricciones(torneo, equipos, existentes, ida_vuelta, restricciones)
+
+    nuevos = []
+
+    def agregar(e1, e2, fecha):
+        if (e1.id, e2.id) in existentes:
+            return
+        existentes.add((e1.id, e2.id))
+        p = Partido(torneo=torneo, equipo1=e1, equipo2=e2, fecha=fecha, estado="pendiente")
+        # los equipos y el torneo ya están en memoria: se omite la validación
+        # de existencia de las FK (un SELECT por campo) y clean() no consulta la base
+        p.full_clean(exclude=["torneo", "equipo1", "equipo2"])
+        nuevos.append(p)
+
+    fecha = inicio
+    for parejas in calcular_jornadas(equipos):
+        for e1, e2 in parejas:
+            agregar(e1, e2, fecha)
+            if ida_vuelta:
+                # segundo partido invertido (otra fecha)
+                agregar(e2, e1, fecha + DESFASE_VUELTA)
+        fecha += intervalo
+
+    with transaction.atomic():
+        Partido.objects.bulk_create(nuevos)
+        # bulk_create no emite post_save: se invalida la caché a mano
+        cache_torneos.invalidar(torneo.id)
+    return nuevos
+
+
+def _generar_con_restricciones(torneo, equipos, existentes, ida_vuelta, restricciones):
+    por_id = {e.id: e for e in equipos}
+    jornadas = calcular_jornadas(equipos)
+    # orden de jornada: todas las idas y después todas las vueltas
+    parejas = [(e1.id, e2.id) for parejas in jornadas for e1, e2 in parejas]
+    if ida_vuelta:
+        parejas += [(e2, e1) for e1, e2 in parejas]
+    parejas = [p for p in parejas if p not in existentes]
+    if not parejas:
+        return []
+
+    # turnos ya tomados en las sedes (por cualquier torneo) y fechas en que
+    # los equipos ya juegan, para no pisarlos
+    desde = timezone.make_aware(datetime.combine(restricciones.inicio, time.min))
+    hasta = timezone.make_aware(datetime.combine(restricciones.limite + timedelta(days=1), time.min))
+    ocupados = set(
+        Partido.objects.filter(fecha__gte=desde, fecha__lt=hasta)
+        .exclude(sede="").values_list("fecha", "sede")
+    )
+    fechas_equipos = defaultdict(list)
+    for e1, e2, fecha in Partido.objects.filter(torneo=torneo, fecha__isnull=False).values_list(
+        "equipo1_id", "equipo2_id", "fecha"
+    ):
+        dia = timezone.localtime(fecha).date()
+        for equipo in (e1, e2):
+            if equipo is not None:
+                fechas_equipos[equipo].append(dia)
+
+    programacion = programar(parejas, restricciones, ocupados, fechas_equipos)
+    if not programacion.completa:
+        raise ValidationError(
+            programacion.problemas
+            + [f"Quedaron {len(programacion.sin_asignar)} de {len(parejas)} partidos sin turno."]
+        )
+
+    nuevos = []
+    for local, visitante, momento, sede in programacion.asignados:
+        p = Partido(
+            torneo=torneo, equipo1=por_id[local], equipo2=por_id[visitante],
+            fecha=momento, sede=sede, estado="pendiente",
+        )
+        p.full_clean(exclude=["torneo", "equipo1", "equipo2"])
+        nuevos.append(p)
+
+    with transaction.atomic():
+        Partido.objects.bulk_create(nuevos)
+        cache_torneos.invalidar(torneo.id)
+    return nuevos
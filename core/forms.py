@@ -1,11 +1,70 @@
 from django import forms
-from .models import Torneo, Equipo, Jugador, Partido
+from django.urls import reverse_lazy
+from .models import Torneo, Equipo, Jugador, Partido, EventoPartido
+
+
+def equipos_con_torneo():
+    """
+    Equipos para usar como opciones de un <select>: Equipo.__str__ muestra el
+    nombre del torneo, así que se trae en la misma consulta.
+    """
+    return Equipo.objects.select_related("torneo").only("id", "nombre", "torneo__nombre").order_by("nombre")
+
+
+class EquiposPorTorneoSelect(forms.Select):
+    """
+    <select> de equipos que depende del campo `campo_torneo` del mismo
+    formulario: se renderiza sólo con los equipos del torneo elegido y, al
+    cambiar el torneo, static/js/equipos_por_torneo.js pide los del nuevo
+    a api_equipos_opciones. El costo de la página no depende de cuántos
+    equipos haya en la base.
+    """
+    class Media:
+        js = ["js/equipos_por_torneo.js"]
+
+    def __init__(self, campo_torneo="torneo", attrs=None):
+        super().__init__({"data-torneo": campo_torneo, "data-url": reverse_lazy("api_equipos_opciones"), **(attrs or {})})
+
+
+class EquipoChoiceField(forms.ModelChoiceField):
+    widget = EquiposPorTorneoSelect
+
+    def label_from_instance(self, obj):
+        # el torneo ya está elegido: sin Equipo.__str__, que lo carga
+        return obj.nombre
+
+
+def equipos_del_torneo(torneo_id, elegido=None):
+    """
+    Opciones de un EquipoChoiceField: los equipos del torneo o, sin torneo,
+    sólo el equipo ya elegido (para validarlo y volver a mostrarlo).
+    """
+    equipos = Equipo.objects.only("id", "nombre", "torneo_id").order_by("nombre")
+    if torneo_id:
+        return equipos.filter(torneo_id=torneo_id)
+    if elegido:
+        return equipos.filter(pk=elegido)
+    return equipos.none()
+
+
+def _elegido(form, nombre):
+    """Id elegido en el campo `nombre`: lo enviado o, si no se envió nada, el valor inicial."""
+    valor = form.data.get(form.add_prefix(nombre)) if form.is_bound else form.initial.get(nombre)
+    valor = str(getattr(valor, "pk", valor) or "")
+    return valor if valor.isdigit() else None
 
 
 class TorneoForm(forms.ModelForm):
     class Meta:
         model = Torneo
-        fields = ["nombre", "fecha_inicio", "fecha_fin", "ubicacion", "descripcion"]
+        fields = [
+            "nombre", "fecha_inicio", "fecha_fin", "ubicacion", "descripcion",
+            "max_equipos", "max_jugadores_por_equipo",
+        ]
+        labels = {
+            "max_equipos": "Máximo de equipos",
+            "max_jugadores_por_equipo": "Máximo de jugadores por equipo",
+        }
         widgets = {
             "fecha_inicio": forms.DateInput(attrs={"type": "date"}),
             "fecha_fin": forms.DateInput(attrs={"type": "date"}),
@@ -16,30 +75,78 @@ class EquipoForm(forms.ModelForm):
         model = Equipo
         fields = ["torneo", "nombre"]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["torneo"].queryset = Torneo.objects.only("id", "nombre")
+
 class JugadorForm(forms.ModelForm):
+    # No es campo del modelo: sólo acota las opciones de equipo
+    torneo = forms.ModelChoiceField(queryset=Torneo.objects.only("id", "nombre").order_by("nombre"), required=False)
+
     class Meta:
         model = Jugador
-        fields = ["equipo", "nombre", "dorsal", "email"]
+        fields = ["torneo", "equipo", "nombre", "dorsal", "email"]
+        field_classes = {"equipo": EquipoChoiceField}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        torneo_id = _elegido(self, "torneo")
+        equipo_id = _elegido(self, "equipo")
+        if not self.is_bound and equipo_id and not torneo_id:
+            # viene con ?equipo: se preselecciona su torneo
+            torneo_id = Equipo.objects.filter(pk=equipo_id).values_list("torneo_id", flat=True).first()
+            self.initial["torneo"] = torneo_id
+        self.fields["equipo"].queryset = equipos_del_torneo(torneo_id, equipo_id)
 
 class PartidoForm(forms.ModelForm):
     class Meta:
         model = Partido
         # Partido entre EQUIPOS (no jugadores)
         fields = ["torneo", "equipo1", "equipo2", "fecha", "estado", "marcador1", "marcador2"]
+        field_classes = {"equipo1": EquipoChoiceField, "equipo2": EquipoChoiceField}
         widgets = {
             "fecha": forms.DateTimeInput(attrs={"type": "datetime-local"}),
         }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.fields["torneo"].queryset = Torneo.objects.only("id", "nombre").order_by("nombre")
+        # Equipos del torneo elegido (en POST, initial o instancia); se recargan al cambiarlo
+        torneo_id = _elegido(self, "torneo")
+        for campo in ("equipo1", "equipo2"):
+            self.fields[campo].queryset = equipos_del_torneo(torneo_id, _elegido(self, campo))
+
+
+class EventoPartidoForm(forms.ModelForm):
+    class Meta:
+        model = EventoPartido
+        fields = ["jugador", "tipo", "minuto"]
+
+    def __init__(self, *args, partido, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.instance.partido = partido
+        # sólo los jugadores de los dos equipos del partido
+        self.fields["jugador"].queryset = (
+            Jugador.objects.filter(equipo_id__in=[partido.equipo1_id, partido.equipo2_id])
+            .select_related("equipo")
+            .only("nombre", "equipo__nombre")
+            .order_by("equipo__nombre", "nombre")
+        )
+        self.fields["jugador"].label_from_instance = lambda j: f"{j.nombre} ({j.equipo.nombre})"
+
+
+class ClonarTorneoForm(forms.Form):
+    nombre = forms.CharField(max_length=150)
+    fecha_inicio = forms.DateField(widget=forms.DateInput(attrs={"type": "date"}, format="%Y-%m-%d"))
+    fecha_fin = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date"}, format="%Y-%m-%d"))
+    jugadores = forms.BooleanField(required=False, initial=True, label="Copiar las plantillas")
+
+
+class InstantaneaForm(forms.Form):
+    archivo = forms.FileField(help_text="Archivo .ndjson.gz exportado desde la página de un torneo.")
+    nombre = forms.CharField(max_length=150, required=False, help_text="Por defecto, el de la instantánea.")
 
-        # Si hay torneo seleccionado (en POST o instancia), filtra los equipos a ese torneo
-        torneo_id = None
-        if self.data.get("torneo"):
-            torneo_id = self.data.get("torneo")
-        elif self.instance and self.instance.pk:
-            torneo_id = self.instance.torneo_id
 
-        if torneo_id:
-            self.fields["equipo1"].queryset = Equipo.objects.filter(torneo_id=torneo_id)
-            self.fields["equipo2"].queryset = Equipo.objects.filter(torneo_id=torneo_id)
+class ImportarForm(forms.Form):
+    archivo = forms.FileField(help_text="Columnas: torneo, equipo, jugador, dorsal, email.")
+    formato = forms.ChoiceField(choices=[("csv", "CSV"), ("json", "JSON (un objeto por línea)")])
@@ -0,0 +1,186 @@
+import csv
+import io
+import json
+from collections import Counter, defaultdict
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from . import cache_torneos, cupos
+from .models import Torneo, Equipo, Jugador
+
+
+FORMATOS = ("csv", "json")
+COLUMNAS = ("torneo", "equipo", "jugador", "dorsal", "email")
+
+
+class ResultadoImportacion:
+    def __init__(self):
+        self.equipos_creados = 0
+        self.jugadores_creados = 0
+        self.errores = []  # (línea, mensaje)
+
+    def error(self, linea, mensaje):
+        self.errores.append((linea, mensaje))
+
+
+def leer_filas(archivo, formato):
+    """
+    Itera (línea, dict) sobre un archivo binario sin cargarlo entero.
+    CSV con encabezado o JSON por líneas (un objeto por línea).
+    """
+    texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+    if formato == "csv":
+        # la línea 1 es el encabezado
+        for linea, fila in enumerate(csv.DictReader(texto), start=2):
+            yield linea, fila
+    elif formato == "json":
+        for linea, crudo in enumerate(texto, start=1):
+            if not crudo.strip():
+                continue
+            try:
+                fila = json.loads(crudo)
+            except ValueError:
+                yield linea, None
+                continue
+            yield linea, fila if isinstance(fila, dict) else None
+    else:
+        raise ValueError(f"Formato no soportado: '{formato}'.")
+
+
+def _limpiar(linea, fila, resultado):
+    """Valida una fila aislada (sin consultas). Devuelve una tupla o None si tiene errores."""
+    if fila is None:
+        resultado.error(linea, "Fila ilegible.")
+        return None
+    datos = {c: str(fila.get(c) or "").strip() for c in COLUMNAS}
+    if not datos["torneo"] or not datos["equipo"]:
+        resultado.error(linea, "Las columnas 'torneo' y 'equipo' son obligatorias.")
+        return None
+    if len(datos["equipo"]) > 120 or len(datos["jugador"]) > 120:
+        resultado.error(linea, "El nombre no puede superar 120 caracteres.")
+        return None
+    dorsal = None
+    if datos["dorsal"]:
+        # isdigit() acepta dígitos Unicode ("²") que int() rechaza
+        try:
+            dorsal = int(datos["dorsal"])
+        except ValueError:
+            dorsal = None
+        if dorsal is None or dorsal < 0:
+            resultado.error(linea, f"Dorsal inválido: '{datos['dorsal']}'.")
+            return None
+    if datos["email"]:
+        try:
+            validate_email(datos["email"])
+        except ValidationError:
+            resultado.error(linea, f"Email inválido: '{datos['email']}'.")
+            return None
+    return linea, datos["torneo"], datos["equipo"], datos["jugador"], dorsal, datos["email"]
+
+
+def importar(filas):
+    """
+    Importa equipos y jugadores desde filas (línea, dict) con las columnas
+    torneo (nombre), equipo, jugador (opcional), dorsal y email. Los equipos
+    que no existen se crean; si la fila trae jugador, se agrega al equipo.
+
+    Los cupos de cada torneo y los nombres únicos se validan para todo el
+    lote con los contadores de core/cupos.py, en vez de full_clean() por
+    fila. Las filas válidas se escriben con bulk_create en una sola
+    transacción, reservando los cupos con un UPDATE condicional por torneo
+    y por equipo existente; las inválidas se reportan por línea. Si otra
+    escritura ocupó los cupos mientras tanto, lanza ValidationError y no
+    se importa nada.
+    """
+    resultado = ResultadoImportacion()
+    limpias = [t for t in (_limpiar(linea, fila, resultado) for linea, fila in filas) if t]
+
+    nombres_torneos = {t[1] for t in limpias}
+    torneos = {}
+    cupos_torneos = {}  # torneo_id -> (max_equipos, max_jugadores_por_equipo)
+    equipos_por_torneo = Counter()
+    for nombre, torneo_id, max_equipos, max_jugadores, equipos_count in Torneo.objects.filter(
+        nombre__in=nombres_torneos
+    ).values_list("nombre", "id", "max_equipos", "max_jugadores_por_equipo", "equipos_count"):
+        torneos[nombre] = torneo_id
+        cupos_torneos[torneo_id] = (max_equipos, max_jugadores)
+        equipos_por_torneo[torneo_id] = equipos_count
+
+    with transaction.atomic():
+        # Equipos existentes de los torneos involucrados y los contadores
+        equipos = {}
+        jugadores_por_equipo = Counter()
+        for equipo_id, torneo_id, nombre, jugadores_count in Equipo.objects.filter(
+            torneo_id__in=torneos.values()
+        ).values_list("id", "torneo_id", "nombre", "jugadores_count"):
+            equipos[(torneo_id, nombre)] = equipo_id
+            jugadores_por_equipo[equipo_id] = jugadores_count
+        nombres_jugadores = {t[3] for t in limpias if t[3]}
+        existentes = set(
+            Jugador.objects.filter(equipo_id__in=equipos.values(), nombre__in=nombres_jugadores)
+            .values_list("equipo_id", "nombre")
+        )
+
+        nuevos_equipos = {}  # (torneo_id, nombre) -> Equipo sin guardar
+        nuevos_jugadores = []  # (clave del equipo, Jugador sin guardar)
+        for linea, torneo, equipo, jugador, dorsal, email in limpias:
+            torneo_id = torneos.get(torneo)
+            if torneo_id is None:
+                resultado.error(linea, f"No existe el torneo '{torneo}'.")
+                continue
+
+            clave = (torneo_id, equipo)
+            if clave not in equipos and clave not in nuevos_equipos:
+                max_equipos = cupos_torneos[torneo_id][0]
+                if equipos_por_torneo[torneo_id] >= max_equipos:
+                    resultado.error(linea, f"El torneo '{torneo}' ya tiene {max_equipos} equipos (límite máximo).")
+                    continue
+                equipos_por_torneo[torneo_id] += 1
+                nuevos_equipos[clave] = Equipo(torneo_id=torneo_id, nombre=equipo)
+
+            if not jugador:
+                continue
+            equipo_id = equipos.get(clave)
+            # los equipos aún no creados se identifican por su clave
+            ref = equipo_id or clave
+            if (ref, jugador) in existentes:
+                resultado.error(linea, f"El jugador '{jugador}' ya existe en el equipo '{equipo}'.")
+                continue
+            max_jugadores = cupos_torneos[torneo_id][1]
+            if jugadores_por_equipo[ref] >= max_jugadores:
+                resultado.error(linea, f"El equipo '{equipo}' ya tiene {max_jugadores} jugadores (límite máximo).")
+                continue
+            existentes.add((ref, jugador))
+            jugadores_por_equipo[ref] += 1
+            nuevos_jugadores.append(
+                (clave, Jugador(equipo_id=equipo_id, nombre=jugador, dorsal=dorsal, email=email))
+            )
+
+        # Cupos: los equipos nuevos nacen con su contador de jugadores; los
+        # existentes y los torneos se reservan en bloque
+        nuevos_por_torneo = Counter(torneo_id for torneo_id, _ in nuevos_equipos)
+        nuevos_por_equipo = defaultdict(int)
+        for clave, j in nuevos_jugadores:
+            if j.equipo_id is None:
+                nuevos_equipos[clave].jugadores_count += 1
+            else:
+                nuevos_por_equipo[j.equipo_id] += 1
+        for torneo_id, cantidad in nuevos_por_torneo.items():
+            cupos.reservar_equipos(torneo_id, cantidad)
+        for equipo_id, cantidad in nuevos_por_equipo.items():
+            cupos.reservar_jugadores(equipo_id, cantidad)
+
+        Equipo.objects.bulk_create(nuevos_equipos.values())
+        for clave, j in nuevos_jugadores:
+            if j.equipo_id is None:
+                j.equipo_id = nuevos_equipos[clave].pk
+        Jugador.objects.bulk_create([j for _, j in nuevos_jugadores], batch_size=1000)
+        # bulk_create no emite post_save: se invalida la caché a mano
+        for torneo_id in {clave[0] for clave in nuevos_equipos} | {clave[0] for clave, _ in nuevos_jugadores}:
+            cache_torneos.invalidar(torneo_id)
+
+    resultado.equipos_creados = len(nuevos_equipos)
+    resultado.jugadores_creados = len(nuevos_jugadores)
+    return resultado
@@ -0,0 +1,364 @@
+import gzip
+import io
+import json
+import zlib
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from . import cache_torneos, cupos
+from .elo import recalcular_elo
+from .exportacion import TAMANO_LOTE, en_lotes
+from .models import ELO_INICIAL, Equipo, Jugador, Partido, Torneo
+from .posiciones import recalcular_posiciones
+from .sqlite import reintentar_si_bloqueada
+
+
+# Instantánea de un torneo: NDJSON comprimido con gzip. La primera línea es
+# la cabecera (versión del formato y cantidad de filas de cada tipo); después
+# una línea por fila, en el orden de COLUMNAS. Las filas llevan el id que
+# tenían en la base de origen y los equipos y partidos se referencian por
+# ese id: al importar se traducen a los nuevos en memoria.
+
+VERSION = 1
+# Filas por bulk_create al importar
+LOTE = 1000
+
+# tipo de fila -> campos (attname) que se guardan, en orden de carga
+COLUMNAS = {
+    "torneo": (
+        "nombre", "fecha_inicio", "fecha_fin", "ubicacion", "descripcion",
+        "max_equipos", "max_jugadores_por_equipo",
+    ),
+    "equipo": ("id", "nombre"),
+    "jugador": ("equipo_id", "nombre", "dorsal", "email"),
+    "partido": (
+        "id", "equipo1_id", "equipo2_id", "fecha", "sede", "ronda", "llave",
+        "siguiente_id", "lado_siguiente", "estado", "marcador1", "marcador2",
+    ),
+}
+TIPOS = tuple(COLUMNAS)
+MODELOS = {"torneo": Torneo, "equipo": Equipo, "jugador": Jugador, "partido": Partido}
+# Las claves foráneas se validan al traducirlas, no con clean_fields (que
+# consultaría la base por cada una)
+FORANEAS = ("torneo", "equipo", "equipo1", "equipo2", "siguiente")
+
+
+def _consultas(torneo):
+    return {
+        "torneo": Torneo.objects.filter(pk=torneo.pk),
+        "equipo": Equipo.objects.filter(torneo=torneo).order_by("id"),
+        "jugador": Jugador.objects.filter(equipo__torneo=torneo).order_by("equipo_id", "id"),
+        "partido": Partido.objects.filter(torneo=torneo).order_by("id"),
+    }
+
+
+def lineas(torneo):
+    """Líneas NDJSON de la instantánea del torneo, leídas de a TAMANO_LOTE filas."""
+    codificador = DjangoJSONEncoder(ensure_ascii=False)
+    consultas = _consultas(torneo)
+    cantidades = {tipo: consulta.count() for tipo, consulta in consultas.items() if tipo != "torneo"}
+    yield codificador.encode(
+        {"tipo": "instantanea", "version": VERSION, "exportado": timezone.now(), **cantidades}
+    ) + "\n"
+    for tipo, consulta in consultas.items():
+        campos = COLUMNAS[tipo]
+        for fila in consulta.values_list(*campos).iterator(chunk_size=TAMANO_LOTE):
+            yield codificador.encode({"tipo": tipo, **dict(zip(campos, fila))}) + "\n"
+
+
+class _Trozos:
+    """Pseudo-archivo para GzipFile: junta lo comprimido hasta que se retira."""
+
+    def __init__(self):
+        self.trozos = []
+
+    def write(self, datos):
+        self.trozos.append(datos)
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def retirar(self):
+        datos = b"".join(self.trozos)
+        self.trozos.clear()
+        return datos
+
+
+def comprimir(lineas):
+    """Comprime con gzip un iterable de líneas y devuelve los bytes a medida que salen."""
+    salida = _Trozos()
+    # mtime=0: la cabecera gzip no lleva la hora (la fecha de exportación va en
+    # la primera línea del NDJSON)
+    with gzip.GzipFile(fileobj=salida, mode="wb", mtime=0) as archivo:
+        for lote in en_lotes(lineas):
+            archivo.write(lote.encode("utf-8"))
+            trozo = salida.retirar()
+            if trozo:
+                yield trozo
+    yield salida.retirar()
+
+
+def leer_lineas(archivo):
+    """
+    Itera (línea, dict) sobre una instantánea (archivo binario comprimido)
+    sin descomprimirla entera. ValidationError si no es gzip o si una línea
+    no es un objeto JSON.
+    """
+    texto = io.TextIOWrapper(gzip.GzipFile(fileobj=archivo), encoding="utf-8")
+    try:
+        for numero, crudo in enumerate(texto, start=1):
+            if not crudo.strip():
+                continue
+            try:
+                fila = json.loads(crudo)
+            except ValueError:
+                fila = None
+            if not isinstance(fila, dict):
+                raise ValidationError(f"Línea {numero}: no es un objeto JSON.")
+            yield numero, fila
+    except (OSError, EOFError, UnicodeDecodeError, zlib.error) as e:
+        raise ValidationError(f"El archivo no es una instantánea válida (gzip): {e}")
+
+
+def _en_linea(numero, error):
+    if hasattr(error, "message_dict"):
+        detalle = "; ".join(f"{campo}: {' '.join(m)}" for campo, m in error.message_dict.items())
+    else:
+        detalle = " ".join(error.messages)
+    return ValidationError(f"Línea {numero}: {detalle}")
+
+
+class _Carga:
+    """
+    Estado de una importación: las filas de un mismo tipo se juntan y se
+    escriben con bulk_create de a LOTE; los ids nuevos quedan en `ids`
+    (id de origen -> id nuevo) para traducir las filas que siguen.
+    """
+
+    def __init__(self, cabecera, nombre, progreso):
+        self.nombre = nombre
+        self.progreso = progreso
+        self.esperadas = {tipo: cabecera.get(tipo) for tipo in ("equipo", "jugador", "partido")}
+        self.total = sum(n for n in self.esperadas.values() if isinstance(n, int))
+        self.torneo = None
+        self.tipo = None
+        self.pendientes = []  # (línea, id de origen, instancia sin guardar)
+        self.ids = {"equipo": {}, "partido": {}}
+        self.jugadores_por_equipo = Counter()
+        self.siguientes = []  # (línea, partido, siguiente de origen)
+        self.cantidades = Counter()
+
+    def _id(self, tipo, numero, origen):
+        if origen is None:
+            return None
+        try:
+            return self.ids[tipo][origen]
+        except (KeyError, TypeError):
+            raise ValidationError(f"Línea {numero}: {tipo} {origen!r} no está en la instantánea.")
+
+    def agregar(self, numero, fila):
+        tipo = fila.get("tipo")
+        if tipo not in COLUMNAS:
+            raise ValidationError(f"Línea {numero}: tipo de fila desconocido: {tipo!r}.")
+        if tipo != self.tipo:
+            if self.tipo is not None and TIPOS.index(tipo) < TIPOS.index(self.tipo):
+                raise ValidationError(f"Línea {numero}: fila de {tipo} después de las de {self.tipo}.")
+            if tipo != "torneo" and self.torneo is None:
+                raise ValidationError(f"Línea {numero}: falta la fila del torneo.")
+            self._vaciar()
+            self.tipo = tipo
+        if tipo == "torneo" and self.torneo is not None:
+            raise ValidationError(f"Línea {numero}: la instantánea tiene más de un torneo.")
+
+        campos = {campo: fila.get(campo) for campo in COLUMNAS[tipo] if campo != "id"}
+        if tipo == "torneo":
+            self._torneo(numero, campos)
+            return
+        if tipo == "equipo":
+            campos["torneo_id"] = self.torneo.pk
+            if self.cantidades["equipo"] + len(self.pendientes) >= self.torneo.max_equipos:
+                raise ValidationError(
+                    f"Línea {numero}: el torneo admite hasta {self.torneo.max_equipos} equipos."
+                )
+        elif tipo == "jugador":
+            campos["equipo_id"] = self._id("equipo", numero, campos["equipo_id"])
+            if campos["equipo_id"] is None:
+                raise ValidationError(f"Línea {numero}: el jugador no tiene equipo.")
+            self.jugadores_por_equipo[campos["equipo_id"]] += 1
+            if self.jugadores_por_equipo[campos["equipo_id"]] > self.torneo.max_jugadores_por_equipo:
+                raise ValidationError(
+                    f"Línea {numero}: el equipo supera los {self.torneo.max_jugadores_por_equipo} "
+                    f"jugadores del torneo."
+                )
+        else:
+            campos["torneo_id"] = self.torneo.pk
+            campos["equipo1_id"] = self._id("equipo", numero, campos["equipo1_id"])
+            campos["equipo2_id"] = self._id("equipo", numero, campos["equipo2_id"])
+            if campos["equipo1_id"] and campos["equipo1_id"] == campos["equipo2_id"]:
+                raise ValidationError(f"Línea {numero}: un partido necesita dos equipos distintos.")
+            # el partido siguiente puede venir después: se enlaza al terminar
+            siguiente = campos.pop("siguiente_id")
+
+        instancia = MODELOS[tipo](**campos)
+        try:
+            instancia.clean_fields(exclude=FORANEAS)
+        except ValidationError as e:
+            raise _en_linea(numero, e)
+        if tipo == "partido" and siguiente is not None:
+            self.siguientes.append((numero, instancia, siguiente))
+        self.pendientes.append((numero, fila.get("id"), instancia))
+        if len(self.pendientes) >= LOTE:
+            self._vaciar()
+
+    def _torneo(self, numero, campos):
+        if self.nombre:
+            campos["nombre"] = self.nombre
+        torneo = Torneo(**campos)
+        try:
+            torneo.full_clean()
+        except ValidationError as e:
+            raise _en_linea(numero, e)
+        torneo.save()
+        self.torneo = torneo
+
+    def _vaciar(self):
+        if not self.pendientes:
+            return
+        instancias = [instancia for _, _, instancia in self.pendientes]
+        try:
+            # savepoint: el error de integridad no invalida la transacción de afuera
+            with transaction.atomic():
+                type(instancias[0]).objects.bulk_create(instancias)
+        except IntegrityError:
+            raise ValidationError(
+                f"Líneas {self.pendientes[0][0]} a {self.pendientes[-1][0]}: hay nombres repetidos."
+            )
+        if self.tipo in self.ids:
+            self.ids[self.tipo].update((origen, instancia.pk) for _, origen, instancia in self.pendientes)
+        self.cantidades[self.tipo] += len(instancias)
+        self.pendientes = []
+        if self.progreso:
+            self.progreso(sum(self.cantidades.values()), self.total)
+
+    def terminar(self):
+        self._vaciar()
+        if self.torneo is None:
+            raise ValidationError("La instantánea no tiene la fila del torneo.")
+        for tipo, esperadas in self.esperadas.items():
+            if esperadas is not None and esperadas != self.cantidades[tipo]:
+                raise ValidationError(
+                    f"La instantánea está incompleta: {self.cantidades[tipo]} filas de {tipo} "
+                    f"de {esperadas}."
+                )
+        if self.siguientes:
+            for numero, partido, origen in self.siguientes:
+                partido.siguiente_id = self._id("partido", numero, origen)
+            Partido.objects.bulk_update(
+                [partido for _, partido, _ in self.siguientes], ["siguiente"], batch_size=LOTE
+            )
+        # bulk_create no pasa por los contadores ni por las tablas derivadas
+        cupos.reconciliar(self.torneo.pk)
+        self.torneo.equipos_count = self.cantidades["equipo"]
+        if self.cantidades["partido"]:
+            recalcular_posiciones(self.torneo.pk)
+            recalcular_elo(self.torneo.pk)
+        cache_torneos.invalidar(self.torneo.pk)
+        return self.torneo, {
+            "equipos": self.cantidades["equipo"],
+            "jugadores": self.cantidades["jugador"],
+            "partidos": self.cantidades["partido"],
+        }
+
+
+def importar_instantanea(archivo, nombre=None, progreso=None):
+    """
+    Crea un torneo nuevo con sus equipos, jugadores y partidos desde una
+    instantánea (archivo binario abierto), leyéndola de a una línea. Cada
+    fila se valida sin consultas (clean_fields); los nombres repetidos los
+    rechazan las restricciones únicas y los cupos se cuentan en memoria.
+    `nombre` reemplaza el del torneo de la instantánea. Todo en una sola
+    transacción: ante cualquier error, ValidationError y no se crea nada.
+    `progreso(filas, total)` se llama después de cada lote.
+    Devuelve (torneo, cantidades).
+    """
+    filas = leer_lineas(archivo)
+    _, cabecera = next(filas, (0, None))
+    if cabecera is None or cabecera.get("tipo") != "instantanea":
+        raise ValidationError("El archivo no es una instantánea de torneo.")
+    if cabecera.get("version") != VERSION:
+        raise ValidationError(
+            f"Versión de instantánea no soportada: {cabecera.get('version')!r} (se admite la {VERSION})."
+        )
+    with transaction.atomic():
+        carga = _Carga(cabecera, nombre, progreso)
+        for numero, fila in filas:
+            carga.agregar(numero, fila)
+        return carga.terminar()
+
+
+def temporada_siguiente(torneo):
+    """Nombre y fechas que se sugieren al clonar el torneo: los mismos, un año después."""
+    def un_anio_despues(fecha):
+        if fecha is None:
+            return None
+        try:
+            return fecha.replace(year=fecha.year + 1)
+        except ValueError:  # 29 de febrero
+            return fecha.replace(year=fecha.year + 1, day=28)
+
+    anio = str(torneo.fecha_inicio.year)
+    siguiente = str(torneo.fecha_inicio.year + 1)
+    nombre = torneo.nombre.replace(anio, siguiente) if anio in torneo.nombre else f"{torneo.nombre} {siguiente}"
+    return {
+        "nombre": nombre[:Torneo._meta.get_field("nombre").max_length],
+        "fecha_inicio": un_anio_despues(torneo.fecha_inicio),
+        "fecha_fin": un_anio_despues(torneo.fecha_fin),
+    }
+
+
+@reintentar_si_bloqueada
+def clonar_torneo(torneo, nombre, fecha_inicio, fecha_fin=None, jugadores=True):
+    """
+    Crea la temporada siguiente del torneo: un torneo nuevo con los mismos
+    datos y cupos y una copia de sus equipos (y, con `jugadores`, de sus
+    plantillas), sin partidos. Los equipos y jugadores se copian con un
+    INSERT ... SELECT cada uno, sin traerlos a Python: los jugadores
+    encuentran su equipo nuevo por (torneo, nombre), que es único. Los
+    equipos arrancan con el Elo inicial.
+    Devuelve (torneo nuevo, cantidades).
+    """
+    equipos = Equipo._meta.db_table
+    nuevo = Torneo(
+        nombre=nombre, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin,
+        ubicacion=torneo.ubicacion, descripcion=torneo.descripcion,
+        max_equipos=torneo.max_equipos, max_jugadores_por_equipo=torneo.max_jugadores_por_equipo,
+    )
+    with transaction.atomic():
+        nuevo.full_clean()
+        nuevo.save()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {equipos} (torneo_id, nombre, jugadores_count, elo) "
+                f"SELECT %s, nombre, 0, %s FROM {equipos} WHERE torneo_id = %s ORDER BY id",
+                [nuevo.pk, ELO_INICIAL, torneo.pk],
+            )
+            cantidades = {"equipos": cursor.rowcount, "jugadores": 0}
+            if jugadores:
+                cursor.execute(
+                    f"INSERT INTO {Jugador._meta.db_table} (equipo_id, nombre, dorsal, email) "
+                    f"SELECT n.id, j.nombre, j.dorsal, j.email FROM {Jugador._meta.db_table} j "
+                    f"JOIN {equipos} o ON o.id = j.equipo_id "
+                    f"JOIN {equipos} n ON n.torneo_id = %s AND n.nombre = o.nombre "
+                    f"WHERE o.torneo_id = %s ORDER BY j.id",
+                    [nuevo.pk, torneo.pk],
+                )
+                cantidades["jugadores"] = cursor.rowcount
+        cupos.reconciliar(nuevo.pk)
+        nuevo.equipos_count = cantidades["equipos"]
+    cache_torneos.invalidar(nuevo.pk)
+    return nuevo, cantidades
@@ -0,0 +1,98 @@
+import json
+import logging
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.bench import casos_desde_urls, comparar, medir
+from core.models import Torneo, Partido
+from core.seed import sembrar
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia (p50/p95/p99) y las consultas de cada URL con el cliente "
+        "de pruebas, sobre una base de pruebas temporal sembrada con datos deterministas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--torneos", type=int, default=20)
+        parser.add_argument("--equipos", type=int, default=20, help="Equipos por torneo")
+        parser.add_argument("--jugadores", type=int, default=15, help="Jugadores por equipo")
+        parser.add_argument("--jugados", type=float, default=0.5)
+        parser.add_argument("--repeticiones", type=int, default=20)
+        parser.add_argument("--semilla", type=int, default=0)
+        parser.add_argument("--salida", help="Archivo donde guardar el JSON (por defecto, stdout)")
+        parser.add_argument("--base", help="JSON de una corrida anterior para comparar")
+        parser.add_argument(
+            "--tolerancia", type=float, default=1.2,
+            help="Crecimiento máximo del p95 frente a --base antes de marcar regresión",
+        )
+
+    def handle(self, *args, **options):
+        base = None
+        if options["base"]:
+            base = json.loads(Path(options["base"]).read_text())["casos"]
+
+        # Nunca se mide sobre la base real: se crea una de pruebas y se descarta al final
+        setup_test_environment()
+        nombre_original = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        # El log por petición del middleware de rendimiento ensuciaría la salida
+        logger = logging.getLogger("core.rendimiento")
+        deshabilitado = logger.disabled
+        logger.disabled = True
+        try:
+            informe = self.correr(options)
+        finally:
+            logger.disabled = deshabilitado
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        if base is not None:
+            informe["comparacion"] = comparar(informe["casos"], base, options["tolerancia"])
+
+        salida = json.dumps(informe, indent=2, ensure_ascii=False)
+        if options["salida"]:
+            Path(options["salida"]).write_text(salida)
+        else:
+            self.stdout.write(salida)
+
+        if base is not None:
+            regresiones = [n for n, c in informe["comparacion"].items() if c["regresion"]]
+            if regresiones:
+                raise CommandError(f"Regresiones: {', '.join(regresiones)}")
+
+    def correr(self, options):
+        n_equipos = options["equipos"]
+        torneos = sembrar(
+            torneos=options["torneos"],
+            equipos_por_torneo=n_equipos,
+            jugadores_por_equipo=options["jugadores"],
+            partidos_por_torneo=n_equipos * (n_equipos - 1) // 2,
+            jugados=options["jugados"],
+            semilla=options["semilla"],
+        )
+        if len(torneos) < 2 or n_equipos < 2:
+            raise CommandError("Se necesitan al menos 2 torneos con 2 equipos.")
+        torneo = Torneo.objects.get(pk=torneos[0].pk)
+        partido = Partido.objects.filter(torneo=torneo).order_by("id").first()
+
+        client = Client()
+        client.force_login(User.objects.create_superuser("bench", password="bench"))
+        casos = casos_desde_urls(torneo, partido.equipo1, partido, torneos[-1])
+        return {
+            "escala": {
+                "torneos": options["torneos"],
+                "equipos_por_torneo": n_equipos,
+                "jugadores_por_equipo": options["jugadores"],
+                "jugados": options["jugados"],
+                "semilla": options["semilla"],
+            },
+            "repeticiones": options["repeticiones"],
+            "casos": medir(client, casos, options["repeticiones"]),
+        }
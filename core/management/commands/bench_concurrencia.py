@@ -0,0 +1,189 @@
+import json
+import logging
+import random
+import tempfile
+import threading
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from core.bench import percentil
+from core.models import Partido
+from core.seed import sembrar
+from core.sqlite import init_command
+
+
+def perfiles():
+    """Configuraciones de conexión a comparar: la de siempre y la de producción."""
+    return {
+        "base": {
+            "OPTIONS": {"init_command": "PRAGMA journal_mode=DELETE"},
+            "CONN_MAX_AGE": 0,
+        },
+        "produccion": {
+            "OPTIONS": {
+                "init_command": init_command(settings.SQLITE_PRAGMAS),
+                "transaction_mode": "IMMEDIATE",
+            },
+            "CONN_MAX_AGE": 600,
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el rendimiento bajo concurrencia: varios hilos leen partidos_list mientras "
+        "otros cargan resultados, sobre una base SQLite temporal en disco, con el perfil "
+        "de conexión de siempre y con el de producción (WAL, pragmas, conexiones "
+        "persistentes, BEGIN IMMEDIATE)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lectores", type=int, default=8)
+        parser.add_argument("--escritores", type=int, default=4)
+        parser.add_argument("--duracion", type=float, default=5.0, help="Segundos por perfil")
+        parser.add_argument("--torneos", type=int, default=5)
+        parser.add_argument("--equipos", type=int, default=20, help="Equipos por torneo")
+        parser.add_argument(
+            "--perfiles", default="base,produccion",
+            help="Perfiles a medir, separados por coma (base, produccion)",
+        )
+        parser.add_argument("--semilla", type=int, default=0)
+        parser.add_argument("--salida", help="Archivo donde guardar el JSON (por defecto, stdout)")
+
+    def handle(self, *args, **options):
+        disponibles = perfiles()
+        elegidos = [p.strip() for p in options["perfiles"].split(",") if p.strip()]
+        desconocidos = [p for p in elegidos if p not in disponibles]
+        if desconocidos:
+            raise CommandError(f"Perfiles desconocidos: {', '.join(desconocidos)}")
+
+        # La concurrencia necesita una base en disco (la de pruebas en memoria
+        # no se comparte entre hilos). El directorio se lleva también -wal/-shm.
+        setup_test_environment()
+        nombre_original = connection.settings_dict["NAME"]
+        config = connection.settings_dict
+        original = {clave: config.get(clave) for clave in ("OPTIONS", "CONN_MAX_AGE")}
+        test_original = dict(config["TEST"])
+        logger = logging.getLogger("core.rendimiento")
+        deshabilitado = logger.disabled
+        logger.disabled = True
+        with tempfile.TemporaryDirectory() as directorio:
+            config["TEST"]["NAME"] = str(Path(directorio) / "bench_concurrencia.sqlite3")
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                informe = self.correr(options, {p: disponibles[p] for p in elegidos})
+            finally:
+                connections.close_all()
+                connection.creation.destroy_test_db(nombre_original, verbosity=0)
+                config.update(original)
+                config["TEST"] = test_original
+                logger.disabled = deshabilitado
+                teardown_test_environment()
+
+        salida = json.dumps(informe, indent=2, ensure_ascii=False)
+        if options["salida"]:
+            Path(options["salida"]).write_text(salida)
+        else:
+            self.stdout.write(salida)
+
+    def correr(self, options, a_medir):
+        n_equipos = options["equipos"]
+        torneos = sembrar(
+            torneos=options["torneos"],
+            equipos_por_torneo=n_equipos,
+            jugadores_por_equipo=1,
+            partidos_por_torneo=n_equipos * (n_equipos - 1) // 2,
+            semilla=options["semilla"],
+        )
+        partidos = list(Partido.objects.values_list("id", flat=True))
+        if not partidos:
+            raise CommandError("Se necesitan al menos 2 equipos por torneo.")
+        User.objects.create_superuser("bench", password="bench")
+
+        informe = {
+            "hilos": {"lectores": options["lectores"], "escritores": options["escritores"]},
+            "duracion_s": options["duracion"],
+            "perfiles": {},
+        }
+        for nombre, perfil in a_medir.items():
+            connections.close_all()
+            connection.settings_dict.update(perfil)
+            informe["perfiles"][nombre] = self.medir(
+                options, [t.pk for t in torneos], partidos, random.Random(options["semilla"])
+            )
+        return informe
+
+    def medir(self, options, torneos, partidos, rng):
+        resultados = {"lecturas": [], "escrituras": []}
+        errores = {"lecturas": 0, "escrituras": 0}
+        candado = threading.Lock()
+        listos = threading.Barrier(options["lectores"] + options["escritores"] + 1)
+        fin = []
+
+        def trabajar(tipo, semilla):
+            azar = random.Random(semilla)
+            client = Client()
+            client.force_login(User.objects.get(username="bench"))
+            tiempos = []
+            fallos = 0
+            listos.wait()
+            try:
+                while not fin:
+                    if tipo == "lecturas":
+                        url = reverse("partidos_list") + f"?torneo={azar.choice(torneos)}"
+                        datos = None
+                    else:
+                        url = reverse("partido_set_resultado", args=[azar.choice(partidos)])
+                        datos = {"marcador1": azar.randint(0, 5), "marcador2": azar.randint(0, 5)}
+                    inicio = perf_counter()
+                    try:
+                        resp = client.post(url, datos) if datos else client.get(url)
+                        ok = resp.status_code < 400
+                    except OperationalError:
+                        ok = False
+                    if ok:
+                        tiempos.append((perf_counter() - inicio) * 1000)
+                    else:
+                        fallos += 1
+            finally:
+                connections.close_all()
+                with candado:
+                    resultados[tipo].extend(tiempos)
+                    errores[tipo] += fallos
+
+        hilos = [
+            threading.Thread(target=trabajar, args=("lecturas", rng.random()))
+            for _ in range(options["lectores"])
+        ] + [
+            threading.Thread(target=trabajar, args=("escrituras", rng.random()))
+            for _ in range(options["escritores"])
+        ]
+        for hilo in hilos:
+            hilo.start()
+        listos.wait()
+        inicio = perf_counter()
+        threading.Event().wait(options["duracion"])
+        fin.append(True)
+        for hilo in hilos:
+            hilo.join()
+        transcurrido = perf_counter() - inicio
+
+        medidas = {}
+        for tipo, tiempos in resultados.items():
+            tiempos.sort()
+            medidas[tipo] = {
+                "operaciones": len(tiempos),
+                "por_segundo": round(len(tiempos) / transcurrido, 1),
+                "errores": errores[tipo],
+                "p50_ms": round(percentil(tiempos, 50), 2) if tiempos else None,
+                "p95_ms": round(percentil(tiempos, 95), 2) if tiempos else None,
+            }
+        return medidas
@@ -0,0 +1,49 @@
+import time
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from core.instantaneas import clonar_torneo, temporada_siguiente
+from core.models import Torneo
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f"Fecha inválida: '{valor}' (formato YYYY-MM-DD).")
+
+
+class Command(BaseCommand):
+    help = "Crea la temporada siguiente de un torneo copiando sus equipos y jugadores."
+
+    def add_arguments(self, parser):
+        parser.add_argument("torneo", type=int, help="ID del torneo")
+        parser.add_argument("--nombre", help="Por defecto, el del torneo con el año siguiente")
+        parser.add_argument("--inicio", help="Fecha de inicio YYYY-MM-DD (por defecto, un año después)")
+        parser.add_argument("--fin", help="Fecha de fin YYYY-MM-DD (por defecto, un año después)")
+        parser.add_argument("--sin-jugadores", action="store_true", help="Copia sólo los equipos")
+
+    def handle(self, *args, **options):
+        try:
+            torneo = Torneo.objects.get(pk=options["torneo"])
+        except Torneo.DoesNotExist:
+            raise CommandError(f"No existe el torneo {options['torneo']}.")
+        sugerido = temporada_siguiente(torneo)
+        inicio = time.perf_counter()
+        try:
+            nuevo, cantidades = clonar_torneo(
+                torneo,
+                options["nombre"] or sugerido["nombre"],
+                _fecha(options["inicio"]) if options["inicio"] else sugerido["fecha_inicio"],
+                _fecha(options["fin"]) if options["fin"] else sugerido["fecha_fin"],
+                jugadores=not options["sin_jugadores"],
+            )
+        except ValidationError as e:
+            raise CommandError(" ".join(e.messages))
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"Torneo '{nuevo.nombre}' (id {nuevo.pk}) creado con {cantidades['equipos']} equipos y "
+            f"{cantidades['jugadores']} jugadores en {segundos:.2f} s."
+        ))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.instantaneas import comprimir, lineas
+from core.models import Torneo
+
+
+class Command(BaseCommand):
+    help = "Exporta la instantánea de un torneo (NDJSON comprimido con gzip)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("torneo", type=int, help="ID del torneo")
+        parser.add_argument("archivo", help="Archivo de salida (.ndjson.gz)")
+
+    def handle(self, *args, **options):
+        try:
+            torneo = Torneo.objects.get(pk=options["torneo"])
+        except Torneo.DoesNotExist:
+            raise CommandError(f"No existe el torneo {options['torneo']}.")
+        inicio = time.perf_counter()
+        try:
+            with open(options["archivo"], "wb") as archivo:
+                for trozo in comprimir(lineas(torneo)):
+                    archivo.write(trozo)
+                tamano = archivo.tell()
+        except OSError as e:
+            raise CommandError(str(e))
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"Instantánea de '{torneo.nombre}': {tamano / 1024:.1f} KiB en {segundos:.2f} s."
+        ))
@@ -0,0 +1,39 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from core.fixture import generar_fixture, parse_inicio, parse_intervalo
+from core.models import Torneo
+from core.programacion import leer_restricciones
+
+
+class Command(BaseCommand):
+    help = "Genera el fixture round-robin de un torneo."
+
+    def add_arguments(self, parser):
+        parser.add_argument("torneo", type=int, help="ID del torneo")
+        parser.add_argument("--ida-vuelta", action="store_true", help="Doble ronda (ida y vuelta)")
+        parser.add_argument("--inicio", help="Fecha de la primera jornada (YYYY-MM-DD[THH:MM])")
+        parser.add_argument("--intervalo", help="Días entre jornadas (por defecto 7)")
+        parser.add_argument("--sedes", help="Sedes separadas por coma; activa la asignación de turnos")
+        parser.add_argument("--horarios", help="Horarios de inicio HH:MM separados por coma")
+        parser.add_argument("--descanso", help="Días mínimos entre partidos de un equipo (por defecto 2)")
+        parser.add_argument("--bloqueadas", help="Fechas sin partidos YYYY-MM-DD separadas por coma")
+        parser.add_argument("--fin", help="Fecha límite del calendario (YYYY-MM-DD)")
+        parser.add_argument("--dias", help="Días de la semana en que se juega (0 = lunes), p. ej. 5,6")
+
+    def handle(self, *args, **options):
+        try:
+            torneo = Torneo.objects.get(pk=options["torneo"])
+        except Torneo.DoesNotExist:
+            raise CommandError(f"No existe el torneo {options['torneo']}.")
+        try:
+            inicio = parse_inicio(options["inicio"])
+            intervalo = parse_intervalo(options["intervalo"])
+            restricciones = leer_restricciones(options, inicio)
+            creados = generar_fixture(
+                torneo, ida_vuelta=options["ida_vuelta"], inicio=inicio, intervalo=intervalo,
+                restricciones=restricciones,
+            )
+        except (ValueError, ValidationError) as e:
+            raise CommandError(" ".join(e.messages) if isinstance(e, ValidationError) else str(e))
+        self.stdout.write(self.style.SUCCESS(f"Fixture generado: {len(creados)} partidos."))
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importacion import FORMATOS, importar, leer_filas
+
+
+class Command(BaseCommand):
+    help = "Importa equipos y jugadores desde un archivo CSV o JSON (un objeto por línea)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo")
+        parser.add_argument(
+            "--formato", choices=FORMATOS,
+            help="Por defecto se deduce de la extensión (.csv, .json/.ndjson)",
+        )
+
+    def handle(self, *args, **options):
+        ruta = Path(options["archivo"])
+        formato = options["formato"] or ("csv" if ruta.suffix.lower() == ".csv" else "json")
+        try:
+            archivo = ruta.open("rb")
+        except OSError as e:
+            raise CommandError(str(e))
+        with archivo:
+            try:
+                resultado = importar(leer_filas(archivo, formato))
+            except ValidationError as e:
+                raise CommandError(" ".join(e.messages))
+
+        for linea, mensaje in resultado.errores:
+            self.stderr.write(f"Línea {linea}: {mensaje}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado.equipos_creados} equipos y {resultado.jugadores_creados} jugadores creados, "
+            f"{len(resultado.errores)} filas con errores."
+        ))
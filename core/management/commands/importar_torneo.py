@@ -0,0 +1,32 @@
+import time
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from core.instantaneas import importar_instantanea
+
+
+class Command(BaseCommand):
+    help = "Crea un torneo desde una instantánea (.ndjson.gz) exportada con exportar_torneo."
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo")
+        parser.add_argument("--nombre", help="Nombre del torneo nuevo (por defecto, el de la instantánea)")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            archivo = Path(options["archivo"]).open("rb")
+        except OSError as e:
+            raise CommandError(str(e))
+        with archivo:
+            try:
+                torneo, cantidades = importar_instantanea(archivo, options["nombre"])
+            except ValidationError as e:
+                raise CommandError(" ".join(e.messages))
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"Torneo '{torneo.nombre}' (id {torneo.pk}) importado con {cantidades['equipos']} equipos, "
+            f"{cantidades['jugadores']} jugadores y {cantidades['partidos']} partidos en {segundos:.2f} s."
+        ))
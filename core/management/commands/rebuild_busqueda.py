@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.busqueda import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda (FTS5) de torneos, equipos y jugadores."
+
+    def handle(self, *args, **options):
+        filas = reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"Índice de búsqueda reconstruido: {filas} filas."))
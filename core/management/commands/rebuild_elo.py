@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.elo import recalcular_elo
+
+
+class Command(BaseCommand):
+    help = "Recalcula el Elo de los equipos reproduciendo en orden los partidos jugados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--torneo", type=int, help="ID del torneo (por defecto, todos)")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        partidos = recalcular_elo(options["torneo"])
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(f"Elo recalculado: {partidos} partidos en {segundos:.2f} s."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.estadisticas import recalcular_estadisticas
+
+
+class Command(BaseCommand):
+    help = "Recalcula las estadísticas de los jugadores a partir de los eventos de los partidos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--torneo", type=int, help="ID del torneo (por defecto, todos)")
+
+    def handle(self, *args, **options):
+        filas = recalcular_estadisticas(options["torneo"])
+        self.stdout.write(self.style.SUCCESS(f"Estadísticas recalculadas: {filas} jugadores."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.posiciones import recalcular_posiciones
+
+
+class Command(BaseCommand):
+    help = "Recalcula la tabla de posiciones a partir de los partidos jugados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--torneo", type=int, help="ID del torneo (por defecto, todos)")
+
+    def handle(self, *args, **options):
+        filas = recalcular_posiciones(options["torneo"])
+        self.stdout.write(self.style.SUCCESS(f"Tabla de posiciones recalculada: {filas} equipos."))
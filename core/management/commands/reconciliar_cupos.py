@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.cupos import reconciliar
+
+
+class Command(BaseCommand):
+    help = "Recalcula los contadores de equipos por torneo y de jugadores por equipo."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--torneo", type=int, help="ID del torneo (por defecto, todos)")
+
+    def handle(self, *args, **options):
+        torneos, equipos = reconciliar(options["torneo"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Contadores corregidos: {torneos} torneos y {equipos} equipos."
+        ))
@@ -0,0 +1,55 @@
+import os
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.trabajos import procesar, purgar
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta los trabajos en segundo plano (core/trabajos.py) con un pool de hilos. "
+        "Se pueden correr varios trabajadores a la vez: cada trabajo lo toma uno solo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hilos", type=int, help="Hilos del trabajador (por defecto TRABAJOS_HILOS)")
+        parser.add_argument("--espera", type=float, help="Segundos entre búsquedas sin trabajos pendientes")
+        parser.add_argument(
+            "--una-vez", action="store_true",
+            help="Ejecuta lo que está pendiente y termina (en el hilo principal si --hilos 1)",
+        )
+
+    def handle(self, *args, **options):
+        hilos = max(1, options["hilos"] or settings.TRABAJOS_HILOS)
+        prefijo = f"{socket.gethostname()}:{os.getpid()}"
+        purgados = purgar()
+        if purgados:
+            self.stdout.write(f"Trabajos viejos purgados: {purgados}.")
+        detener = None if options["una_vez"] else threading.Event()
+        if detener is not None:
+            for senal in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(senal, lambda *_: detener.set())
+            self.stdout.write(f"Trabajador {prefijo} con {hilos} hilos (Ctrl+C para terminar).")
+
+        if hilos == 1:
+            hechos = procesar(f"{prefijo}:0", detener, options["espera"])
+        else:
+            with ThreadPoolExecutor(hilos) as pool:
+                futuros = [
+                    pool.submit(self.hilo, f"{prefijo}:{i}", detener, options["espera"]) for i in range(hilos)
+                ]
+                hechos = sum(f.result() for f in futuros)
+        self.stdout.write(self.style.SUCCESS(f"Trabajos ejecutados: {hechos}."))
+
+    def hilo(self, trabajador, detener, espera):
+        # cada hilo tiene su conexión a la base: se cierra al terminar
+        try:
+            return procesar(trabajador, detener, espera)
+        finally:
+            connection.close()
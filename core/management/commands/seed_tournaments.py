@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Torneo
+from core.seed import sembrar
+
+
+class Command(BaseCommand):
+    help = "Genera datos sintéticos deterministas (torneos, equipos, jugadores y partidos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--torneos", type=int, default=10)
+        parser.add_argument("--equipos", type=int, default=20, help="Equipos por torneo")
+        parser.add_argument("--jugadores", type=int, default=15, help="Jugadores por equipo")
+        parser.add_argument(
+            "--partidos", type=int, default=None,
+            help="Partidos por torneo (por defecto, el round-robin completo)",
+        )
+        parser.add_argument(
+            "--jugados", type=float, default=0.5,
+            help="Fracción de partidos de cada torneo ya jugados (0 a 1)",
+        )
+        parser.add_argument("--semilla", type=int, default=0)
+        parser.add_argument("--prefijo", default="Torneo", help="Prefijo del nombre de los torneos")
+
+    def handle(self, *args, **options):
+        if not 0 <= options["jugados"] <= 1:
+            raise CommandError("--jugados debe estar entre 0 y 1.")
+        prefijo = options["prefijo"]
+        if Torneo.objects.filter(nombre__startswith=f"{prefijo} ").exists():
+            raise CommandError(f"Ya existen torneos con el prefijo '{prefijo}'. Usa otro --prefijo.")
+
+        equipos = options["equipos"]
+        partidos = options["partidos"]
+        if partidos is None:
+            partidos = equipos * (equipos - 1) // 2
+        torneos = sembrar(
+            torneos=options["torneos"],
+            equipos_por_torneo=equipos,
+            jugadores_por_equipo=options["jugadores"],
+            partidos_por_torneo=partidos,
+            jugados=options["jugados"],
+            semilla=options["semilla"],
+            prefijo=prefijo,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Creados {len(torneos)} torneos, {len(torneos) * equipos} equipos, "
+            f"{len(torneos) * equipos * options['jugadores']} jugadores y "
+            f"hasta {len(torneos) * partidos} partidos."
+        ))
@@ -0,0 +1,68 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Torneo
+from core.montecarlo import MOTORES, motor_por_defecto, np, simular
+from core.simulacion import DESCENSOS, cargar_liga, probabilidades, procesos_para
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula lo que falta de la liga de un torneo (Monte Carlo) y muestra las "
+        "probabilidades de campeonato y descenso. No usa la caché."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("torneo", type=int, help="ID del torneo")
+        parser.add_argument("--simulaciones", type=int, help="Cantidad de simulaciones")
+        parser.add_argument("--descensos", type=int, default=DESCENSOS)
+        parser.add_argument("--procesos", type=int, help="Procesos (por defecto, según el tamaño)")
+        parser.add_argument("--semilla", type=int, default=0)
+        parser.add_argument("--motor", choices=MOTORES, help="Por defecto numpy si está instalado")
+        parser.add_argument(
+            "--bench", action="store_true",
+            help="Compara los motores disponibles con 1 proceso y con uno por CPU",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            torneo = Torneo.objects.get(pk=options["torneo"])
+        except Torneo.DoesNotExist:
+            raise CommandError(f"No existe el torneo {options['torneo']}.")
+        motor = options["motor"] or motor_por_defecto()
+        if motor == "numpy" and np is None:
+            raise CommandError("NumPy no está instalado: usá --motor python.")
+        n = options["simulaciones"] or (
+            settings.SIMULACION_SIMULACIONES if motor == "numpy" else settings.SIMULACION_SIMULACIONES_SIN_NUMPY
+        )
+        liga = cargar_liga(torneo.id)
+        self.stdout.write(f"{torneo.nombre}: {len(liga.equipos)} equipos, {len(liga.equipo1)} partidos pendientes.")
+
+        if options["bench"]:
+            motores = [m for m in MOTORES if m == "python" or np is not None]
+            for m in motores:
+                for procesos in sorted({1, os.cpu_count() or 1}):
+                    self.medir(liga, n, options["semilla"], procesos, m)
+            return
+
+        procesos = options["procesos"] or procesos_para(liga, n)
+        conteos = self.medir(liga, n, options["semilla"], procesos, motor)
+        conteos.update(equipos=list(liga.equipos), puntos_actuales=list(liga.puntos))
+        self.stdout.write(f"{'Equipo':30} {'Pts':>4} {'Esp.':>6} {'Campeón':>8} {'Descenso':>9} {'Puesto':>7}")
+        for f in probabilidades(conteos, options["descensos"]):
+            self.stdout.write(
+                f"{f['equipo'][:30]:30} {f['puntos']:>4} {f['puntos_esperados']:>6.1f} "
+                f"{f['campeon']:>8.1%} {f['descenso']:>9.1%} {f['puesto_medio']:>7.2f}"
+            )
+
+    def medir(self, liga, n, semilla, procesos, motor):
+        inicio = time.perf_counter()
+        conteos = simular(liga, n, semilla, procesos, motor)
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(
+            f"{motor} x{procesos}: {n} simulaciones en {segundos:.2f} s ({n / segundos:,.0f} sim/s)"
+        )
+        return conteos
@@ -0,0 +1,168 @@
+import cProfile
+import contextvars
+import functools
+import json
+import logging
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+
+logger = logging.getLogger("core.rendimiento")
+
+# Métricas de la petición en curso (una por hilo/tarea)
+_metricas = contextvars.ContextVar("metricas_rendimiento", default=None)
+
+
+class Metricas:
+    def __init__(self):
+        self.consultas = []  # (sql, params, segundos)
+        self.tiempo_db = 0.0
+        self.tiempo_templates = 0.0
+
+    def registrar_consulta(self, execute, sql, params, many, context):
+        inicio = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = perf_counter() - inicio
+            self.tiempo_db += duracion
+            self.consultas.append((sql, params, duracion))
+
+    def duplicadas(self):
+        """Consultas con el mismo SQL (sin contar parámetros) ejecutadas más de una vez."""
+        repetidas = Counter(sql for sql, _, _ in self.consultas)
+        exactas = Counter((sql, repr(params)) for sql, params, _ in self.consultas)
+        return [
+            {
+                "sql": sql,
+                "veces": veces,
+                "identicas": max(n for (s, _), n in exactas.items() if s == sql),
+            }
+            for sql, veces in repetidas.most_common()
+            if veces > 1
+        ]
+
+
+def _instrumentar_templates():
+    """
+    Envuelve el render de los templates de primer nivel para medir su tiempo.
+    Los {% include %} se renderizan dentro y no se cuentan dos veces.
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, "_instrumentado", False):
+        return
+    original = Template.render
+
+    @functools.wraps(original)
+    def render(self, context=None, request=None):
+        metricas = _metricas.get()
+        if metricas is None:
+            return original(self, context, request)
+        inicio = perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            metricas.tiempo_templates += perf_counter() - inicio
+
+    render._instrumentado = True
+    Template.render = render
+
+
+class RendimientoMiddleware:
+    """
+    Mide cada petición: tiempo total, cantidad y tiempo de consultas, tiempo
+    de templates y tamaño de la respuesta. Lo devuelve como cabecera
+    Server-Timing y lo registra como una línea JSON en el logger
+    "core.rendimiento". Las peticiones más lentas que
+    RENDIMIENTO_UMBRAL_LENTO_MS se registran además con su SQL y las
+    consultas duplicadas.
+
+    Un usuario staff puede agregar ?_perfil=1 a la URL para guardar un
+    volcado de cProfile de esa petición en RENDIMIENTO_DIR_PERFILES.
+    """
+
+    PARAM_PERFIL = "_perfil"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _instrumentar_templates()
+
+    def __call__(self, request):
+        metricas = Metricas()
+        token = _metricas.set(metricas)
+        perfil = self._iniciar_perfil(request)
+        inicio = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conexion in connections.all():
+                    stack.enter_context(conexion.execute_wrapper(metricas.registrar_consulta))
+                response = self.get_response(request)
+        finally:
+            total = perf_counter() - inicio
+            if perfil:
+                perfil.disable()
+            _metricas.reset(token)
+
+        if perfil and getattr(getattr(request, "user", None), "is_staff", False):
+            self._guardar_perfil(request, perfil)
+
+        tamano = None if response.streaming else len(response.content)
+        response["Server-Timing"] = ", ".join(
+            [
+                f"total;dur={total * 1000:.1f}",
+                f'db;dur={metricas.tiempo_db * 1000:.1f};desc="{len(metricas.consultas)} consultas"',
+                f"tpl;dur={metricas.tiempo_templates * 1000:.1f}",
+            ]
+        )
+        self._registrar(request, response, total, metricas, tamano)
+        return response
+
+    def _registrar(self, request, response, total, metricas, tamano):
+        datos = {
+            "metodo": request.method,
+            "ruta": request.path,
+            "estado": response.status_code,
+            "ms": round(total * 1000, 1),
+            "consultas": len(metricas.consultas),
+            "db_ms": round(metricas.tiempo_db * 1000, 1),
+            "tpl_ms": round(metricas.tiempo_templates * 1000, 1),
+            "bytes": tamano,
+        }
+        if total * 1000 < getattr(settings, "RENDIMIENTO_UMBRAL_LENTO_MS", 500):
+            logger.info(json.dumps(datos))
+            return
+        datos["lenta"] = True
+        datos["sql"] = [
+            {"sql": sql, "ms": round(duracion * 1000, 2)} for sql, _, duracion in metricas.consultas
+        ]
+        datos["duplicadas"] = metricas.duplicadas()
+        logger.warning(json.dumps(datos))
+
+    def _iniciar_perfil(self, request):
+        # El permiso (staff) se verifica al final: el usuario todavía no está
+        # resuelto en este punto. Si no es staff, el perfil se descarta.
+        if self.PARAM_PERFIL not in request.GET:
+            return None
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # ya hay otro profiler activo en este proceso
+            return None
+        return perfil
+
+    def _guardar_perfil(self, request, perfil):
+        directorio = Path(getattr(settings, "RENDIMIENTO_DIR_PERFILES", settings.BASE_DIR / "perfiles"))
+        directorio.mkdir(parents=True, exist_ok=True)
+        nombre = request.path.strip("/").replace("/", "_") or "inicio"
+        marca = timezone.now().strftime("%Y%m%d-%H%M%S-%f")
+        ruta = directorio / f"{nombre}-{marca}.pstats"
+        perfil.dump_stats(ruta)
+        logger.info(json.dumps({"perfil": str(ruta), "ruta": request.path}))
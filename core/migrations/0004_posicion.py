@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_alter_jugador_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Posicion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jugados', models.PositiveIntegerField(default=0)),
+                ('ganados', models.PositiveIntegerField(default=0)),
+                ('empatados', models.PositiveIntegerField(default=0)),
+                ('perdidos', models.PositiveIntegerField(default=0)),
+                ('goles_favor', models.PositiveIntegerField(default=0)),
+                ('goles_contra', models.PositiveIntegerField(default=0)),
+                ('puntos', models.PositiveIntegerField(default=0)),
+                ('equipo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='posicion', to='core.equipo')),
+                ('torneo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='posiciones', to='core.torneo')),
+            ],
+            options={
+                'ordering': ['-puntos', '-goles_favor'],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_posicion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipo',
+            index=models.Index(fields=['nombre'], name='equipo_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jugador',
+            index=models.Index(fields=['nombre'], name='jugador_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partido',
+            index=models.Index(fields=['torneo', 'fecha'], name='partido_torneo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partido',
+            index=models.Index(fields=['fecha'], name='partido_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='torneo',
+            index=models.Index(models.OrderBy(models.F('fecha_inicio'), descending=True), models.F('nombre'), name='torneo_inicio_nombre_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_indices_listados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='partido',
+            name='sede',
+            field=models.CharField(blank=True, max_length=120),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_partido_sede'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='partido',
+            name='lado_siguiente',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='partido',
+            name='llave',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='partido',
+            name='ronda',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='partido',
+            name='siguiente',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='anteriores', to='core.partido'),
+        ),
+    ]
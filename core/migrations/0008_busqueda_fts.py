@@ -0,0 +1,99 @@
+from django.db import migrations
+
+
+# Índice FTS5 de búsqueda (ver core/busqueda.py). rowid = id * 4 + tipo
+# (1 torneo, 2 equipo, 3 jugador): los triggers ubican la fila a tocar por
+# rowid, sin recorrer el índice. Los triggers cubren también bulk_create,
+# que no emite señales.
+CREAR = [
+    """
+    CREATE VIRTUAL TABLE core_busqueda USING fts5(
+        titulo, texto,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER core_busqueda_torneo_ai AFTER INSERT ON core_torneo BEGIN
+        INSERT INTO core_busqueda(rowid, titulo, texto)
+        VALUES (NEW.id * 4 + 1, NEW.nombre, NEW.ubicacion || ' ' || NEW.descripcion);
+    END
+    """,
+    """
+    CREATE TRIGGER core_busqueda_torneo_au AFTER UPDATE OF nombre, ubicacion, descripcion ON core_torneo BEGIN
+        UPDATE core_busqueda SET titulo = NEW.nombre, texto = NEW.ubicacion || ' ' || NEW.descripcion
+        WHERE rowid = NEW.id * 4 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER core_busqueda_torneo_ad AFTER DELETE ON core_torneo BEGIN
+        DELETE FROM core_busqueda WHERE rowid = OLD.id * 4 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER core_busqueda_equipo_ai AFTER INSERT ON core_equipo BEGIN
+        INSERT INTO core_busqueda(rowid, titulo, texto) VALUES (NEW.id * 4 + 2, NEW.nombre, '');
+    END
+    """,
+    """
+    CREATE TRIGGER core_busqueda_equipo_au AFTER UPDATE OF nombre ON core_equipo BEGIN
+        UPDATE core_busqueda SET titulo = NEW.nombre WHERE rowid = NEW.id * 4 + 2;
+    END
+    """,
+    """
+    CREATE TRIGGER core_busqueda_equipo_ad AFTER DELETE ON core_equipo BEGIN
+        DELETE FROM core_busqueda WHERE rowid = OLD.id * 4 + 2;
+    END
+    """,
+    """
+    CREATE TRIGGER core_busqueda_jugador_ai AFTER INSERT ON core_jugador BEGIN
+        INSERT INTO core_busqueda(rowid, titulo, texto) VALUES (NEW.id * 4 + 3, NEW.nombre, NEW.email);
+    END
+    """,
+    """
+    CREATE TRIGGER core_busqueda_jugador_au AFTER UPDATE OF nombre, email ON core_jugador BEGIN
+        UPDATE core_busqueda SET titulo = NEW.nombre, texto = NEW.email WHERE rowid = NEW.id * 4 + 3;
+    END
+    """,
+    """
+    CREATE TRIGGER core_busqueda_jugador_ad AFTER DELETE ON core_jugador BEGIN
+        DELETE FROM core_busqueda WHERE rowid = OLD.id * 4 + 3;
+    END
+    """,
+    # lo que ya existe en la base
+    """
+    INSERT INTO core_busqueda(rowid, titulo, texto)
+    SELECT id * 4 + 1, nombre, ubicacion || ' ' || descripcion FROM core_torneo
+    UNION ALL
+    SELECT id * 4 + 2, nombre, '' FROM core_equipo
+    UNION ALL
+    SELECT id * 4 + 3, nombre, email FROM core_jugador
+    """,
+]
+
+BORRAR = [
+    f"DROP TRIGGER IF EXISTS core_busqueda_{tabla}_{evento}"
+    for tabla in ("torneo", "equipo", "jugador")
+    for evento in ("ai", "au", "ad")
+] + ["DROP TABLE IF EXISTS core_busqueda"]
+
+
+def _ejecutar(sentencias):
+    def ejecutar(apps, schema_editor):
+        # FTS5 es de SQLite: en otro motor la búsqueda no se instala
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for sql in sentencias:
+            schema_editor.execute(sql)
+    return ejecutar
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_partido_llave'),
+    ]
+
+    operations = [
+        migrations.RunPython(_ejecutar(CREAR), _ejecutar(BORRAR)),
+    ]
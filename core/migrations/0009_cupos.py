@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:56
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def contar(apps, schema_editor):
+    # Contadores de las filas existentes; el cupo de un torneo que ya tenga
+    # más equipos (o jugadores por equipo) que el límite por defecto sube
+    # hasta lo que hay, para que siga siendo válido.
+    Torneo = apps.get_model("core", "Torneo")
+    Equipo = apps.get_model("core", "Equipo")
+    Jugador = apps.get_model("core", "Jugador")
+
+    jugadores = Jugador.objects.filter(equipo=OuterRef("pk")).values("equipo")
+    Equipo.objects.update(
+        jugadores_count=Coalesce(Subquery(jugadores.annotate(n=Count("id")).values("n")), 0)
+    )
+    equipos = Equipo.objects.filter(torneo=OuterRef("pk")).values("torneo")
+    Torneo.objects.update(
+        equipos_count=Coalesce(Subquery(equipos.annotate(n=Count("id")).values("n")), 0),
+        max_jugadores_por_equipo=Greatest(
+            F("max_jugadores_por_equipo"),
+            Coalesce(Subquery(equipos.annotate(n=models.Max("jugadores_count")).values("n")), 0),
+        ),
+    )
+    Torneo.objects.filter(equipos_count__gt=F("max_equipos")).update(max_equipos=F("equipos_count"))
+
+
+# En SQLite, AddField rehace la tabla y se pierden los triggers del índice de
+# búsqueda (0008) sobre core_torneo y core_equipo: se vuelven a crear.
+busqueda_fts = import_module("core.migrations.0008_busqueda_fts")
+TRIGGERS = [sql for sql in busqueda_fts.CREAR if "CREATE TRIGGER" in sql]
+
+
+def reinstalar_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in busqueda_fts.BORRAR[:-1] + TRIGGERS:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_busqueda_fts'),
+    ]
+
+    operations = [
+        # al volver a 0008, después de quitar los campos
+        migrations.RunPython(migrations.RunPython.noop, reinstalar_triggers),
+        migrations.AddField(
+            model_name='equipo',
+            name='jugadores_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='torneo',
+            name='equipos_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='torneo',
+            name='max_equipos',
+            field=models.PositiveIntegerField(default=20),
+        ),
+        migrations.AddField(
+            model_name='torneo',
+            name='max_jugadores_por_equipo',
+            field=models.PositiveIntegerField(default=15),
+        ),
+        migrations.RunPython(reinstalar_triggers, migrations.RunPython.noop),
+        migrations.RunPython(contar, migrations.RunPython.noop),
+    ]
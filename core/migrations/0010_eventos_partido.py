@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_cupos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaJugador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('goles', models.PositiveIntegerField(default=0)),
+                ('asistencias', models.PositiveIntegerField(default=0)),
+                ('amarillas', models.PositiveIntegerField(default=0)),
+                ('rojas', models.PositiveIntegerField(default=0)),
+                ('partidos', models.PositiveIntegerField(default=0)),
+                ('jugador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas', to='core.jugador')),
+                ('torneo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas', to='core.torneo')),
+            ],
+            options={
+                'indexes': [models.Index(models.F('torneo'), models.OrderBy(models.F('goles'), descending=True), models.F('jugador'), name='estadistica_goles_idx'), models.Index(models.F('torneo'), models.OrderBy(models.F('asistencias'), descending=True), models.F('jugador'), name='estadistica_asist_idx'), models.Index(models.F('torneo'), models.OrderBy(models.F('rojas'), descending=True), models.OrderBy(models.F('amarillas'), descending=True), models.F('jugador'), name='estadistica_tarjetas_idx'), models.Index(models.F('torneo'), models.OrderBy(models.F('partidos'), descending=True), models.F('jugador'), name='estadistica_partidos_idx')],
+                'constraints': [models.UniqueConstraint(fields=('torneo', 'jugador'), name='unique_estadistica_jugador')],
+            },
+        ),
+        migrations.CreateModel(
+            name='EventoPartido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('gol', 'Gol'), ('autogol', 'Gol en contra'), ('asistencia', 'Asistencia'), ('amarilla', 'Tarjeta amarilla'), ('roja', 'Tarjeta roja'), ('cambio', 'Entra de cambio')], max_length=20)),
+                ('minuto', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('equipo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos', to='core.equipo')),
+                ('jugador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos', to='core.jugador')),
+                ('partido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos', to='core.partido')),
+            ],
+            options={
+                'ordering': ['minuto', 'id'],
+                'indexes': [models.Index(fields=['partido', 'jugador'], name='evento_partido_jugador_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:13
+
+from importlib import import_module
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# AddField rehace core_equipo en SQLite: los triggers de búsqueda se
+# vuelven a crear como en 0009.
+reinstalar_triggers = import_module("core.migrations.0009_cupos").reinstalar_triggers
+
+
+# Fórmula de core.elo al escribir esta migración, copiada: la migración no
+# debe cambiar si después cambia la app
+K = 20
+ESCALA = 400
+ELO_INICIAL = 1500.0
+LOTE = 2000
+
+
+def _cambio(elo1, elo2, marcador1, marcador2):
+    diferencia = abs(marcador1 - marcador2)
+    peso = 1 if diferencia <= 1 else 1.5 if diferencia == 2 else (11 + diferencia) / 8
+    real = 1 if marcador1 > marcador2 else 0.5 if marcador1 == marcador2 else 0
+    esperado = 1 / (1 + 10 ** ((elo2 - elo1) / ESCALA))
+    return K * peso * (real - esperado)
+
+
+def calcular(apps, schema_editor):
+    # Ratings de los partidos ya jugados, en orden (como recalcular_elo); el
+    # historial se escribe de a LOTE filas mientras se recorren los partidos
+    Equipo = apps.get_model("core", "Equipo")
+    Partido = apps.get_model("core", "Partido")
+    HistorialElo = apps.get_model("core", "HistorialElo")
+    elos = {}
+    historial = []
+    partidos = (
+        Partido.objects.filter(estado="jugado", equipo1__isnull=False, equipo2__isnull=False)
+        .order_by("fecha", "id")
+        .values_list("id", "equipo1_id", "equipo2_id", "marcador1", "marcador2")
+    )
+    for partido_id, e1, e2, m1, m2 in partidos.iterator(chunk_size=LOTE):
+        elo1, elo2 = elos.get(e1, ELO_INICIAL), elos.get(e2, ELO_INICIAL)
+        delta = _cambio(elo1, elo2, m1 or 0, m2 or 0)
+        elos[e1], elos[e2] = elo1 + delta, elo2 - delta
+        historial.append(HistorialElo(partido_id=partido_id, elo1=elo1, elo2=elo2, cambio=delta))
+        if len(historial) >= LOTE:
+            HistorialElo.objects.bulk_create(historial)
+            historial = []
+    HistorialElo.objects.bulk_create(historial)
+    Equipo.objects.bulk_update(
+        [Equipo(pk=equipo_id, elo=elo) for equipo_id, elo in elos.items()], ["elo"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_eventos_partido'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, reinstalar_triggers),
+        migrations.AddField(
+            model_name='equipo',
+            name='elo',
+            field=models.FloatField(default=1500.0, editable=False),
+        ),
+        migrations.RunPython(reinstalar_triggers, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='HistorialElo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('elo1', models.FloatField()),
+                ('elo2', models.FloatField()),
+                ('cambio', models.FloatField()),
+                ('partido', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='historial_elo', to='core.partido')),
+            ],
+        ),
+        migrations.RunPython(calcular, migrations.RunPython.noop),
+    ]
@@ -1,25 +1,57 @@
 from django.db import models, transaction
 from django.core.exceptions import ValidationError
 
+# Cupos por defecto de un torneo nuevo (cada torneo puede cambiarlos)
+MAX_EQUIPOS_POR_TORNEO = 20
+MAX_JUGADORES_POR_EQUIPO = 15
+# Rating Elo de un equipo que todavía no jugó (ver core/elo.py)
+ELO_INICIAL = 1500.0
+
+
 class Torneo(models.Model):
     nombre = models.CharField(max_length=150, unique=True)
     fecha_inicio = models.DateField()
     fecha_fin = models.DateField(null=True, blank=True)
     ubicacion = models.CharField(max_length=150, blank=True)
     descripcion = models.TextField(blank=True)
+    # Cupos del torneo y cantidad de equipos inscriptos (ver core/cupos.py)
+    max_equipos = models.PositiveIntegerField(default=MAX_EQUIPOS_POR_TORNEO)
+    max_jugadores_por_equipo = models.PositiveIntegerField(default=MAX_JUGADORES_POR_EQUIPO)
+    equipos_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["-fecha_inicio", "nombre"]
+        indexes = [
+            # torneos_list: listado completo en el orden por defecto
+            models.Index(models.F("fecha_inicio").desc(), "nombre", name="torneo_inicio_nombre_idx"),
+        ]
 
     def __str__(self):
         return self.nombre
 
+    def clean(self):
+        super().clean()
+        if self.max_equipos < self.equipos_count:
+            raise ValidationError(
+                {"max_equipos": f"El torneo ya tiene {self.equipos_count} equipos inscriptos."}
+            )
+        if self.pk and not self._state.adding:
+            mayor = self.equipos.aggregate(mayor=models.Max("jugadores_count"))["mayor"] or 0
+            if self.max_jugadores_por_equipo < mayor:
+                raise ValidationError(
+                    {"max_jugadores_por_equipo": f"Hay un equipo con {mayor} jugadores."}
+                )
+
+    def save(self, *args, **kwargs):
+        _sin_contador(self, kwargs, "equipos_count")
+        return super().save(*args, **kwargs)
 
-class Equipo(models.Model):
-    MAX_EQUIPOS_POR_TORNEO = 20
 
+class Equipo(models.Model):
     torneo = models.ForeignKey(Torneo, on_delete=models.CASCADE, related_name="equipos")
     nombre = models.CharField(max_length=120)
+    jugadores_count = models.PositiveIntegerField(default=0, editable=False)
+    elo = models.FloatField(default=ELO_INICIAL, editable=False)
 
     class Meta:
         # Evita dos equipos con el mismo nombre dentro del mismo torneo
@@ -28,44 +60,56 @@ class Equipo(models.Model):
                 fields=["torneo", "nombre"], name="unique_equipo_en_torneo"
             )
         ]
+        # (torneo, nombre) ya lo cubre la restricción única
+        indexes = [models.Index(fields=["nombre"], name="equipo_nombre_idx")]
         ordering = ["nombre"]
 
     def __str__(self):
         return f"{self.nombre} ({self.torneo.nombre})"
 
-    def clean(self):
-        """
-        Valida el límite de 20 equipos por torneo.
-        Se salta la validación si el objeto ya existe y no cambia de torneo,
-        para permitir editar el nombre sin bloquear por el conteo.
-        """
-        super().clean()
-        if self.pk and not self._state.adding:
-            # Si se está editando, sólo validamos si cambiaron de torneo
-            try:
-                original = Equipo.objects.get(pk=self.pk)
-            except Equipo.DoesNotExist:
-                original = None
-            cambio_de_torneo = original and original.torneo_id != self.torneo_id
-            if not cambio_de_torneo:
-                return
-
-        # Nueva creación o cambio de torneo: validar cupo
-        cuenta = Equipo.objects.filter(torneo=self.torneo).exclude(pk=self.pk).count()
-        if cuenta >= self.MAX_EQUIPOS_POR_TORNEO:
-            raise ValidationError(
-                f"El torneo '{self.torneo}' ya tiene {self.MAX_EQUIPOS_POR_TORNEO} equipos (límite máximo)."
-            )
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # torneo con el que se cargó: save() sabe si cambia sin volver a leerlo
+        instancia._torneo_original = instancia.__dict__.get("torneo_id")
+        return instancia
 
     def save(self, *args, **kwargs):
         # Asegura que se ejecute clean() incluso si no se usa ModelForm
         self.full_clean()
-        return super().save(*args, **kwargs)
+        from . import cupos
+        with transaction.atomic():
+            # Cupo en el torneo: UPDATE condicional sobre equipos_count, sin
+            # contar equipos. Si no hay lugar, ValidationError y nada se guarda.
+            anterior = None if self._state.adding else _original(self, "torneo_id", "_torneo_original")
+            if anterior != self.torneo_id:
+                cupos.reservar_equipos(self.torneo_id)
+                if anterior is not None:
+                    cupos.liberar_equipos(anterior)
+            _sin_contador(self, kwargs, "jugadores_count", "elo")
+            # la señal post_save invalida también la caché del torneo que deja
+            self._torneo_anterior = anterior if anterior != self.torneo_id else None
+            resultado = super().save(*args, **kwargs)
+            self._torneo_original = self.torneo_id
+        return resultado
 
+    def delete(self, *args, **kwargs):
+        # Al borrar el equipo se borran sus partidos en cascada: la tabla de
+        # posiciones de los rivales se recalcula en la misma transacción.
+        # El cupo del torneo se libera en la señal post_delete.
+        from .elo import recalcular_elo
+        from .estadisticas import recalcular_estadisticas
+        from .posiciones import recalcular_posiciones
+        with transaction.atomic():
+            torneo_id = self.torneo_id
+            resultado = super().delete(*args, **kwargs)
+            recalcular_posiciones(torneo_id)
+            recalcular_estadisticas(torneo_id)
+            recalcular_elo(torneo_id)
+        return resultado
 
-class Jugador(models.Model):
-    MAX_JUGADORES_POR_EQUIPO = 15
 
+class Jugador(models.Model):
     equipo = models.ForeignKey(Equipo, on_delete=models.CASCADE, related_name="jugadores", null=True, blank=True)
     nombre = models.CharField(max_length=120)
     dorsal = models.PositiveIntegerField(null=True, blank=True)
@@ -78,33 +122,59 @@ class Jugador(models.Model):
                 fields=["equipo", "nombre"], name="unique_jugador_en_equipo"
             )
         ]
+        # (equipo, nombre) ya lo cubre la restricción única
+        indexes = [models.Index(fields=["nombre"], name="jugador_nombre_idx")]
         ordering = ["nombre"]
 
     def __str__(self):
         return f"{self.nombre} - {self.equipo.nombre}"
 
-    def clean(self):
-        super().clean()
-        if self.pk and not self._state.adding:
-            # edición: no validar conteo si no cambia de equipo
-            try:
-                original = Jugador.objects.get(pk=self.pk)
-            except Jugador.DoesNotExist:
-                original = None
-            cambio_de_equipo = original and original.equipo_id != self.equipo_id
-            if not cambio_de_equipo:
-                return
-
-        cuenta = Jugador.objects.filter(equipo=self.equipo).exclude(pk=self.pk).count()
-        if cuenta >= self.MAX_JUGADORES_POR_EQUIPO:
-            raise ValidationError(
-                f"El equipo '{self.equipo}' ya tiene {self.MAX_JUGADORES_POR_EQUIPO} jugadores (límite máximo)."
-            )
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._equipo_original = instancia.__dict__.get("equipo_id")
+        return instancia
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        return super().save(*args, **kwargs)
-    
+        from . import cupos
+        with transaction.atomic():
+            # Cupo en el equipo (límite del torneo), igual que en Equipo.save
+            anterior = None if self._state.adding else _original(self, "equipo_id", "_equipo_original")
+            if anterior != self.equipo_id:
+                if self.equipo_id is not None:
+                    cupos.reservar_jugadores(self.equipo_id)
+                if anterior is not None:
+                    cupos.liberar_jugadores(anterior)
+            self._equipo_anterior = anterior if anterior != self.equipo_id else None
+            resultado = super().save(*args, **kwargs)
+            self._equipo_original = self.equipo_id
+        return resultado
+
+
+def _sin_contador(instancia, kwargs, *contadores):
+    """
+    Al editar, save() escribe todos los campos menos los `contadores`: sólo
+    los cambian los UPDATE de core/cupos.py (y core/elo.py) y el valor de
+    una instancia cargada antes puede estar viejo.
+    """
+    if not instancia._state.adding and kwargs.get("update_fields") is None:
+        kwargs["update_fields"] = [
+            f.name for f in instancia._meta.concrete_fields if not f.primary_key and f.name not in contadores
+        ]
+
+
+def _original(instancia, campo, atributo):
+    """
+    Valor de `campo` guardado en la base: el que se cargó con la instancia
+    (ver from_db) o, si no se cargó, una consulta por pk.
+    """
+    valor = getattr(instancia, atributo, None)
+    if valor is None:
+        valor = type(instancia).objects.filter(pk=instancia.pk).values_list(campo, flat=True).first()
+    return valor
+
+
 class Partido(models.Model):
     ESTADOS = [
         ("pendiente", "Pendiente"),
@@ -119,13 +189,30 @@ class Partido(models.Model):
                             related_name="partidos_equipo2",
                             null=True, blank=True)
     fecha = models.DateTimeField(null=True, blank=True)
+    sede = models.CharField(max_length=120, blank=True)
+    # Llave de eliminación (ver core/eliminacion.py): ronda 1 = primera ronda,
+    # `llave` = posición dentro de la ronda. Los partidos de liga no la usan.
+    ronda = models.PositiveSmallIntegerField(null=True, blank=True)
+    llave = models.PositiveSmallIntegerField(null=True, blank=True)
+    # Partido al que pasa el ganador y en qué lugar (1 = equipo1, 2 = equipo2)
+    siguiente = models.ForeignKey("self", on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name="anteriores")
+    lado_siguiente = models.PositiveSmallIntegerField(null=True, blank=True)
     estado = models.CharField(max_length=20, choices=ESTADOS, default="pendiente")
     # Si luego quieres marcador por equipo:
     marcador1 = models.PositiveIntegerField(null=True, blank=True)
     marcador2 = models.PositiveIntegerField(null=True, blank=True)
 
+    # Campos que determinan el aporte del partido a la tabla de posiciones
+    CAMPOS_RESULTADO = ("torneo_id", "equipo1_id", "equipo2_id", "estado", "marcador1", "marcador2", "ronda")
+
     class Meta:
         ordering = ["-fecha", "-id"]
+        indexes = [
+            # listados paginados por (fecha, id), con y sin filtro de torneo
+            models.Index(fields=["torneo", "fecha"], name="partido_torneo_fecha_idx"),
+            models.Index(fields=["fecha"], name="partido_fecha_idx"),
+        ]
 
     def clean(self):
         # Validaciones: equipos distintos y del mismo torneo
@@ -138,12 +225,252 @@ class Partido(models.Model):
             raise ValidationError("El torneo del partido debe coincidir con el torneo del Equipo 1.")
         if self.torneo and self.equipo2 and self.torneo_id != self.equipo2.torneo_id:
             raise ValidationError("El torneo del partido debe coincidir con el torneo del Equipo 2.")
+        # En la llave siempre tiene que haber un ganador
+        if self.ronda is not None and self.estado == "jugado":
+            if not (self.equipo1_id and self.equipo2_id):
+                raise ValidationError("El partido de la llave todavía no tiene sus dos equipos.")
+            if self.marcador1 == self.marcador2:
+                raise ValidationError("Un partido de eliminación no puede terminar empatado.")
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        return super().save(*args, **kwargs)
+        from .eliminacion import avanzar
+        from .elo import actualizar_elo
+        from .posiciones import actualizar_posiciones
+        with transaction.atomic():
+            # Resultado previo (si lo había) para revertirlo en la tabla de posiciones y en el Elo
+            anterior = None
+            if self.pk and not self._state.adding:
+                anterior = Partido.objects.filter(pk=self.pk).values(*self.CAMPOS_RESULTADO).first()
+            resultado = super().save(*args, **kwargs)
+            actualizar_posiciones(anterior, self)
+            actualizar_elo(self.pk, anterior, self)
+            avanzar(self)
+        return resultado
+
+    def delete(self, *args, **kwargs):
+        from .elo import actualizar_elo
+        from .estadisticas import recalcular_estadisticas
+        from .posiciones import actualizar_posiciones
+        with transaction.atomic():
+            anterior = {campo: getattr(self, campo) for campo in self.CAMPOS_RESULTADO}
+            # los eventos se borran en cascada sin pasar por EventoPartido.delete()
+            con_eventos = self.eventos.exists()
+            # antes del DELETE: el historial de Elo del partido se borra con él
+            actualizar_elo(self.pk, anterior, None)
+            resultado = super().delete(*args, **kwargs)
+            actualizar_posiciones(anterior, None)
+            if con_eventos:
+                recalcular_estadisticas(anterior["torneo_id"])
+        return resultado
 
     def __str__(self):
         if self.equipo1_id and self.equipo2_id:
             return f"{self.equipo1.nombre} vs {self.equipo2.nombre} ({self.torneo.nombre})"
         return f"Partido {self.pk or ''}"
+
+
+class EventoPartido(models.Model):
+    """
+    Algo que pasó en un partido y se le atribuye a un jugador: gol,
+    asistencia, tarjeta o cambio. `equipo` es el equipo por el que jugaba
+    (el jugador puede cambiar de equipo después). Los goles definen el
+    marcador (ver core/estadisticas.py).
+    """
+    TIPOS = [
+        ("gol", "Gol"),
+        ("autogol", "Gol en contra"),
+        ("asistencia", "Asistencia"),
+        ("amarilla", "Tarjeta amarilla"),
+        ("roja", "Tarjeta roja"),
+        ("cambio", "Entra de cambio"),
+    ]
+
+    partido = models.ForeignKey(Partido, on_delete=models.CASCADE, related_name="eventos")
+    jugador = models.ForeignKey(Jugador, on_delete=models.CASCADE, related_name="eventos")
+    equipo = models.ForeignKey(Equipo, on_delete=models.CASCADE, related_name="eventos")
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    minuto = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    # Campos que determinan el aporte del evento a las estadísticas
+    CAMPOS_ESTADISTICA = ("partido_id", "jugador_id", "tipo")
+
+    class Meta:
+        ordering = ["minuto", "id"]
+        indexes = [
+            # apariciones: ¿el jugador tiene otro evento en el partido?
+            models.Index(fields=["partido", "jugador"], name="evento_partido_jugador_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.jugador.nombre}"
+
+    def clean(self):
+        if not self.partido_id or not self.jugador_id:
+            return
+        if self.equipo_id is None:
+            if self.jugador.equipo_id is None:
+                raise ValidationError("El jugador no tiene equipo.")
+            self.equipo_id = self.jugador.equipo_id
+        if self.equipo_id not in (self.partido.equipo1_id, self.partido.equipo2_id):
+            raise ValidationError("El jugador no es de ninguno de los dos equipos del partido.")
+
+    def save(self, *args, **kwargs):
+        self.full_clean(exclude=["equipo"])
+        from .estadisticas import actualizar_estadisticas
+        with transaction.atomic():
+            anterior = None
+            if self.pk and not self._state.adding:
+                anterior = (
+                    EventoPartido.objects.filter(pk=self.pk)
+                    .values("partido__torneo_id", *self.CAMPOS_ESTADISTICA).first()
+                )
+            resultado = super().save(*args, **kwargs)
+            actualizar_estadisticas(anterior, self)
+        return resultado
+
+    def delete(self, *args, **kwargs):
+        from .estadisticas import actualizar_estadisticas
+        with transaction.atomic():
+            anterior = {campo: getattr(self, campo) for campo in self.CAMPOS_ESTADISTICA}
+            anterior["partido__torneo_id"] = self.partido.torneo_id
+            resultado = super().delete(*args, **kwargs)
+            actualizar_estadisticas(anterior, None)
+        return resultado
+
+
+class EstadisticaJugador(models.Model):
+    """
+    Totales de un jugador en un torneo (goles, asistencias, tarjetas y
+    partidos con algún evento). Se actualiza de forma incremental al
+    guardar/borrar eventos (ver core/estadisticas.py) y se puede
+    reconstruir con `rebuild_estadisticas`. Cada tabla de líderes tiene su
+    índice (torneo, valor desc, jugador): el top N se lee del índice.
+    """
+    torneo = models.ForeignKey(Torneo, on_delete=models.CASCADE, related_name="estadisticas")
+    jugador = models.ForeignKey(Jugador, on_delete=models.CASCADE, related_name="estadisticas")
+    goles = models.PositiveIntegerField(default=0)
+    asistencias = models.PositiveIntegerField(default=0)
+    amarillas = models.PositiveIntegerField(default=0)
+    rojas = models.PositiveIntegerField(default=0)
+    partidos = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["torneo", "jugador"], name="unique_estadistica_jugador")
+        ]
+        indexes = [
+            models.Index("torneo", models.F("goles").desc(), "jugador", name="estadistica_goles_idx"),
+            models.Index("torneo", models.F("asistencias").desc(), "jugador", name="estadistica_asist_idx"),
+            models.Index(
+                "torneo", models.F("rojas").desc(), models.F("amarillas").desc(), "jugador",
+                name="estadistica_tarjetas_idx",
+            ),
+            models.Index("torneo", models.F("partidos").desc(), "jugador", name="estadistica_partidos_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.jugador_id}: {self.goles} goles"
+
+
+class Posicion(models.Model):
+    """
+    Fila materializada de la tabla de posiciones de un equipo en su torneo.
+    Se actualiza de forma incremental al guardar/borrar partidos
+    (ver core/posiciones.py) y se puede reconstruir con `rebuild_standings`.
+    """
+    torneo = models.ForeignKey(Torneo, on_delete=models.CASCADE, related_name="posiciones")
+    equipo = models.OneToOneField(Equipo, on_delete=models.CASCADE, related_name="posicion")
+    jugados = models.PositiveIntegerField(default=0)
+    ganados = models.PositiveIntegerField(default=0)
+    empatados = models.PositiveIntegerField(default=0)
+    perdidos = models.PositiveIntegerField(default=0)
+    goles_favor = models.PositiveIntegerField(default=0)
+    goles_contra = models.PositiveIntegerField(default=0)
+    puntos = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-puntos", "-goles_favor"]
+
+    def __str__(self):
+        return f"{self.equipo_id}: {self.puntos} pts"
+
+    @property
+    def diferencia(self):
+        return self.goles_favor - self.goles_contra
+
+
+class HistorialElo(models.Model):
+    """
+    Cambio de rating que produjo un partido jugado: el Elo de ambos equipos
+    antes del partido y lo que ganó el equipo 1 (el 2 pierde lo mismo). Con
+    esta fila el partido se revierte sin recalcular el resto (ver
+    core/elo.py); se reconstruye con `rebuild_elo`.
+    """
+    partido = models.OneToOneField(Partido, on_delete=models.CASCADE, related_name="historial_elo")
+    elo1 = models.FloatField()
+    elo2 = models.FloatField()
+    cambio = models.FloatField()
+
+    def __str__(self):
+        return f"Partido {self.partido_id}: {self.cambio:+.1f}"
+
+    @property
+    def elo1_despues(self):
+        return self.elo1 + self.cambio
+
+    @property
+    def elo2_despues(self):
+        return self.elo2 - self.cambio
+
+
+class Job(models.Model):
+    """
+    Trabajo en segundo plano (ver core/trabajos.py): lo encola una vista,
+    que responde enseguida, y lo ejecuta un hilo de `run_worker`. El
+    trabajador que lo toma lo arrienda hasta `vence` y renueva el plazo al
+    informar el avance; si deja de responder, otro lo vuelve a tomar.
+    """
+    ESTADOS = [
+        ("pendiente", "Pendiente"),
+        ("en_curso", "En curso"),
+        ("terminado", "Terminado"),
+        ("error", "Error"),
+    ]
+
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default="pendiente")
+    hechos = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    resultado = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    trabajador = models.CharField(max_length=100, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    inicio = models.DateTimeField(null=True, blank=True)
+    fin = models.DateTimeField(null=True, blank=True)
+    vence = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+        indexes = [
+            # el trabajador busca el pendiente más antiguo (o un arriendo vencido)
+            models.Index(fields=["estado", "id"], name="job_estado_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.estado})"
+
+    @property
+    def terminado(self):
+        return self.estado in ("terminado", "error")
+
+    @property
+    def progreso(self):
+        """Porcentaje hecho, o None si el trabajo no informó un total."""
+        if self.estado == "terminado":
+            return 100
+        if not self.total:
+            return None
+        return min(100, self.hechos * 100 // self.total)
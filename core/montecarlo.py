@@ -0,0 +1,188 @@
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él se simula en Python puro (más lento)
+    np = None
+
+
+# Motor de simulación de lo que falta de una liga. No usa Django: los
+# procesos del pool sólo reciben la Liga (datos planos) y devuelven conteos.
+
+MOTORES = ("numpy", "python")
+# Goles por equipo y partido cuando todavía no se jugó nada
+MEDIA_GOLES = 1.3
+# Partidos "ficticios" con la media de la liga que suaviza la fuerza de cada
+# equipo (con pocos partidos jugados todos se parecen a la media)
+PARTIDOS_PREVIOS = 5
+# Simulaciones por bloque del motor NumPy (acota la memoria: bloque x partidos)
+BLOQUE = 10_000
+# Clave de desempate: puntos, diferencia de gol, goles a favor y orden por
+# nombre, empaquetados en un entero (base suficiente para los goles de una liga)
+BASE = 4096
+
+
+@dataclass(frozen=True)
+class Liga:
+    """
+    Estado de una liga para simularla: por equipo (en orden de nombre, el
+    último desempate) sus puntos y goles actuales; por partido pendiente
+    los índices de ambos equipos y sus goles esperados.
+    """
+    equipos: tuple
+    puntos: tuple
+    goles_favor: tuple
+    goles_contra: tuple
+    equipo1: tuple
+    equipo2: tuple
+    esperados1: tuple
+    esperados2: tuple
+    victoria: int = 3
+    empate: int = 1
+
+
+def motor_por_defecto():
+    return "numpy" if np is not None else "python"
+
+
+def goles_esperados(jugados, goles_favor, goles_contra, equipo1, equipo2):
+    """
+    Goles esperados de cada equipo en cada partido pendiente (modelo de
+    Poisson): la media de la liga por el ataque de uno y la defensa del
+    otro, ambos relativos a la media y suavizados con PARTIDOS_PREVIOS.
+    """
+    total = sum(jugados)
+    media = sum(goles_favor) / total if total else MEDIA_GOLES
+    media = media or MEDIA_GOLES
+    ataque = [(gf + PARTIDOS_PREVIOS * media) / (pj + PARTIDOS_PREVIOS) / media
+              for gf, pj in zip(goles_favor, jugados)]
+    defensa = [(gc + PARTIDOS_PREVIOS * media) / (pj + PARTIDOS_PREVIOS) / media
+               for gc, pj in zip(goles_contra, jugados)]
+    esperados1 = tuple(media * ataque[a] * defensa[b] for a, b in zip(equipo1, equipo2))
+    esperados2 = tuple(media * ataque[b] * defensa[a] for a, b in zip(equipo1, equipo2))
+    return esperados1, esperados2
+
+
+def _vacio(t):
+    return {"simulaciones": 0, "posiciones": [[0] * t for _ in range(t)], "puntos": [0] * t}
+
+
+def _simular_numpy(liga, n, semilla):
+    rng = np.random.default_rng(semilla)
+    t, m = len(liga.equipos), len(liga.equipo1)
+    conteo = np.zeros((t, t), dtype=np.int64)
+    puntos_totales = np.zeros(t, dtype=np.int64)
+    # Incidencia partido -> equipo: los puntos y goles de cada equipo salen
+    # de un producto de matrices (float64 usa BLAS y es exacto con enteros)
+    uno = np.zeros((m, t))
+    uno[np.arange(m), liga.equipo1] = 1
+    dos = np.zeros((m, t))
+    dos[np.arange(m), liga.equipo2] = 1
+    esperados1 = np.asarray(liga.esperados1)
+    esperados2 = np.asarray(liga.esperados2)
+    desempate = t - 1 - np.arange(t)
+
+    hechas = 0
+    while hechas < n:
+        b = min(BLOQUE, n - hechas)
+        g1 = rng.poisson(esperados1, size=(b, m)).astype(np.float64)
+        g2 = rng.poisson(esperados2, size=(b, m)).astype(np.float64)
+        empate = (g1 == g2) * liga.empate
+        p1 = (g1 > g2) * liga.victoria + empate
+        p2 = (g2 > g1) * liga.victoria + empate
+        puntos = np.asarray(liga.puntos) + (p1 @ uno + p2 @ dos).astype(np.int64)
+        gf = np.asarray(liga.goles_favor) + (g1 @ uno + g2 @ dos).astype(np.int64)
+        gc = np.asarray(liga.goles_contra) + (g2 @ uno + g1 @ dos).astype(np.int64)
+        clave = ((puntos * BASE + (gf - gc + BASE // 2)) * BASE + gf) * t + desempate
+        orden = np.argsort(-clave, axis=1)  # equipo en cada puesto, por simulación
+        for puesto in range(t):
+            conteo[:, puesto] += np.bincount(orden[:, puesto], minlength=t)
+        puntos_totales += puntos.sum(axis=0)
+        hechas += b
+    return {"simulaciones": n, "posiciones": conteo.tolist(), "puntos": puntos_totales.tolist()}
+
+
+def _poisson(rng, esperado):
+    # Knuth: suficiente para medias chicas como las de goles
+    limite = math.exp(-esperado)
+    k, p = 0, rng.random()
+    while p > limite:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+def _simular_python(liga, n, semilla):
+    rng = random.Random(semilla)
+    t = len(liga.equipos)
+    resultado = _vacio(t)
+    conteo, puntos_totales = resultado["posiciones"], resultado["puntos"]
+    partidos = list(zip(liga.equipo1, liga.equipo2, liga.esperados1, liga.esperados2))
+    for _ in range(n):
+        puntos = list(liga.puntos)
+        gf = list(liga.goles_favor)
+        gc = list(liga.goles_contra)
+        for a, b, e1, e2 in partidos:
+            g1, g2 = _poisson(rng, e1), _poisson(rng, e2)
+            gf[a] += g1
+            gc[a] += g2
+            gf[b] += g2
+            gc[b] += g1
+            if g1 > g2:
+                puntos[a] += liga.victoria
+            elif g2 > g1:
+                puntos[b] += liga.victoria
+            else:
+                puntos[a] += liga.empate
+                puntos[b] += liga.empate
+        orden = sorted(range(t), key=lambda i: (-puntos[i], gc[i] - gf[i], -gf[i], i))
+        for puesto, i in enumerate(orden):
+            conteo[i][puesto] += 1
+        for i in range(t):
+            puntos_totales[i] += puntos[i]
+    resultado["simulaciones"] = n
+    return resultado
+
+
+def _lote(liga, n, semilla, motor):
+    if motor == "numpy":
+        return _simular_numpy(liga, n, semilla)
+    return _simular_python(liga, n, f"{semilla[0]}:{semilla[1]}")
+
+
+def _sumar(resultados, t):
+    total = _vacio(t)
+    for r in resultados:
+        total["simulaciones"] += r["simulaciones"]
+        for i in range(t):
+            total["puntos"][i] += r["puntos"][i]
+            for puesto in range(t):
+                total["posiciones"][i][puesto] += r["posiciones"][i][puesto]
+    return total
+
+
+def simular(liga, n, semilla=0, procesos=1, motor=None):
+    """
+    Simula `n` veces lo que falta de la liga y devuelve, por equipo, en
+    cuántas simulaciones terminó en cada puesto (posiciones[equipo][puesto])
+    y la suma de sus puntos finales. Con `procesos` > 1 reparte las
+    simulaciones en un ProcessPoolExecutor (cada proceso con su propia
+    semilla derivada de `semilla`); los resultados son reproducibles para
+    los mismos parámetros.
+    """
+    motor = motor or motor_por_defecto()
+    if motor not in MOTORES or (motor == "numpy" and np is None):
+        raise ValueError(f"Motor de simulación no disponible: '{motor}'.")
+    t = len(liga.equipos)
+    procesos = max(1, min(procesos, n))
+    if procesos == 1:
+        return _sumar([_lote(liga, n, (semilla, 0), motor)], t)
+    partes = [n // procesos + (1 if i < n % procesos else 0) for i in range(procesos)]
+    with ProcessPoolExecutor(procesos) as pool:
+        resultados = pool.map(
+            _lote, [liga] * procesos, partes, [(semilla, i) for i in range(procesos)], [motor] * procesos
+        )
+        return _sumar(list(resultados), t)
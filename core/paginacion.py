@@ -0,0 +1,122 @@
+import base64
+import binascii
+import json
+
+from django.db.models import F, Q
+
+
+TAMANO_PAGINA = 50
+
+
+class PaginaCursor:
+    """
+    Página de resultados por cursor (keyset). Expone la misma interfaz que
+    usan los templates con django.core.paginator.Page (object_list, has_next,
+    has_previous, has_other_pages) pero sin COUNT(*) ni OFFSET: cada página
+    es un WHERE sobre la clave de orden + LIMIT.
+    """
+
+    def __init__(self, object_list, cursor_siguiente=None, cursor_anterior=None):
+        self.object_list = object_list
+        self.cursor_siguiente = cursor_siguiente
+        self.cursor_anterior = cursor_anterior
+
+    def has_next(self):
+        return self.cursor_siguiente is not None
+
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, indice):
+        return self.object_list[indice]
+
+
+def codificar(datos):
+    crudo = json.dumps(datos, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decodificar(cursor):
+    if not cursor:
+        return None
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        datos = json.loads(crudo)
+        if len(datos["k"]) != 2 or datos["d"] not in ("sig", "ant") or not isinstance(datos["f"], dict):
+            return None
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None
+    return datos
+
+
+def leer_cursor(request, nombres):
+    """
+    Devuelve (filtros, cursor) de la petición. El cursor lleva los filtros
+    con los que se generó; si la URL trae otros filtros explícitos, el
+    cursor se descarta y se vuelve a la primera página.
+    """
+    filtros = {n: request.GET.get(n) or "" for n in nombres}
+    datos = decodificar(request.GET.get("cursor"))
+    if datos is None:
+        return filtros, None
+    if any(filtros.values()) and filtros != datos["f"]:
+        return filtros, None
+    return {n: str(datos["f"].get(n) or "") for n in nombres}, datos
+
+
+def _despues_de(campo, valor, pk):
+    # Orden ascendente con NULL primero (como SQLite): (valor, pk) > (v, p)
+    if valor is None:
+        return Q(**{f"{campo}__isnull": True, "pk__gt": pk}) | Q(**{f"{campo}__isnull": False})
+    return Q(**{f"{campo}__gt": valor}) | Q(**{campo: valor, "pk__gt": pk})
+
+
+def _antes_de(campo, valor, pk):
+    if valor is None:
+        return Q(**{f"{campo}__isnull": True, "pk__lt": pk})
+    return Q(**{f"{campo}__isnull": True}) | Q(**{f"{campo}__lt": valor}) | Q(**{campo: valor, "pk__lt": pk})
+
+
+def paginar(queryset, campo, cursor=None, filtros=None, tamano=TAMANO_PAGINA):
+    """
+    Pagina `queryset` ordenado por (campo, id) usando la última/primera fila
+    visible como cursor. `filtros` se guarda dentro de los cursores generados
+    para que los enlaces de la página siguiente/anterior los conserven.
+    """
+    filtros = filtros or {}
+    hacia_atras = bool(cursor) and cursor["d"] == "ant"
+
+    if cursor:
+        valor, pk = cursor["k"]
+        condicion = _antes_de if hacia_atras else _despues_de
+        queryset = queryset.filter(condicion(campo, valor, pk))
+
+    if hacia_atras:
+        orden = [F(campo).desc(nulls_last=True), "-pk"]
+    else:
+        orden = [F(campo).asc(nulls_first=True), "pk"]
+    filas = list(queryset.order_by(*orden)[:tamano + 1])
+    hay_mas = len(filas) > tamano
+    filas = filas[:tamano]
+    if hacia_atras:
+        filas.reverse()
+
+    def cursor_de(fila, direccion):
+        return codificar({"k": [getattr(fila, campo), fila.pk], "d": direccion, "f": filtros})
+
+    siguiente = anterior = None
+    if filas:
+        if hay_mas or hacia_atras:
+            siguiente = cursor_de(filas[-1], "sig")
+        if (hay_mas and hacia_atras) or (cursor and not hacia_atras):
+            anterior = cursor_de(filas[0], "ant")
+    return PaginaCursor(filas, siguiente, anterior)
@@ -0,0 +1,40 @@
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+# Líneas de EXPLAIN QUERY PLAN que indican un recorrido completo de la tabla
+# (sin índice) o un ordenamiento en memoria. "SCAN t USING INDEX i" no cuenta:
+# es el recorrido ordenado de un índice que se corta con el LIMIT del cursor.
+_SCAN_COMPLETO = re.compile(r"^SCAN (\w+)$")
+_TEMP_BTREE = re.compile(r"USE TEMP B-TREE")
+
+
+@contextmanager
+def capturar_consultas(tablas_prefijo="core_"):
+    """
+    Junta (sql, params) de los SELECT que tocan tablas de la app mientras
+    dura el bloque (las de sesión/usuario no interesan para los índices).
+    """
+    consultas = []
+
+    def registrar(execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith("SELECT") and f'"{tablas_prefijo}' in sql:
+            consultas.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(registrar):
+        yield consultas
+
+
+def plan(sql, params=()):
+    """Detalle de EXPLAIN QUERY PLAN (SQLite) de una consulta, una línea por paso."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [fila[-1] for fila in cursor.fetchall()]
+
+
+def problemas(detalles):
+    """Pasos del plan que recorren una tabla entera o que ordenan en un B-tree temporal."""
+    return [d for d in detalles if _SCAN_COMPLETO.match(d.strip()) or _TEMP_BTREE.search(d)]
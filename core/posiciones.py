@@ -0,0 +1,154 @@
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Equipo, Partido, Posicion
+
+
+PUNTOS_VICTORIA = 3
+PUNTOS_EMPATE = 1
+
+
+def _resultado(datos):
+    """
+    Extrae (torneo_id, equipo1_id, equipo2_id, marcador1, marcador2) de un
+    partido o de un dict con CAMPOS_RESULTADO. Devuelve None si el partido no
+    cuenta para la tabla (no jugado, sin ambos equipos o de la llave de
+    eliminación, que no suma puntos).
+    """
+    if datos is None:
+        return None
+    if not isinstance(datos, dict):
+        datos = {campo: getattr(datos, campo) for campo in Partido.CAMPOS_RESULTADO}
+    if datos["estado"] != "jugado" or not datos["equipo1_id"] or not datos["equipo2_id"]:
+        return None
+    if datos["ronda"] is not None:
+        return None
+    return (
+        datos["torneo_id"],
+        datos["equipo1_id"],
+        datos["equipo2_id"],
+        datos["marcador1"] or 0,
+        datos["marcador2"] or 0,
+    )
+
+
+def _deltas(gf, gc, signo):
+    ganado = gf > gc
+    empatado = gf == gc
+    return {
+        "jugados": F("jugados") + signo,
+        "ganados": F("ganados") + signo * int(ganado),
+        "empatados": F("empatados") + signo * int(empatado),
+        "perdidos": F("perdidos") + signo * int(gf < gc),
+        "goles_favor": F("goles_favor") + signo * gf,
+        "goles_contra": F("goles_contra") + signo * gc,
+        "puntos": F("puntos") + signo * (PUNTOS_VICTORIA if ganado else PUNTOS_EMPATE if empatado else 0),
+    }
+
+
+def aplicar_resultado(resultado, signo=1):
+    """Suma (signo=1) o resta (signo=-1) un resultado a las filas de ambos equipos."""
+    torneo_id, e1, e2, m1, m2 = resultado
+    Posicion.objects.bulk_create(
+        [Posicion(torneo_id=torneo_id, equipo_id=e) for e in (e1, e2)],
+        ignore_conflicts=True,
+    )
+    Posicion.objects.filter(equipo_id=e1).update(**_deltas(m1, m2, signo))
+    Posicion.objects.filter(equipo_id=e2).update(**_deltas(m2, m1, signo))
+
+
+def actualizar_posiciones(anterior, nuevo):
+    """
+    Aplica a la tabla la diferencia entre el resultado anterior y el nuevo
+    de un partido. Cualquiera de los dos puede ser None (alta o baja).
+    Debe llamarse dentro de la misma transacción que modifica el partido.
+    """
+    viejo = _resultado(anterior)
+    actual = _resultado(nuevo)
+    if viejo == actual:
+        return
+    if viejo:
+        aplicar_resultado(viejo, signo=-1)
+    if actual:
+        aplicar_resultado(actual, signo=1)
+
+
+SQL_TABLA = """
+    SELECT torneo_id, equipo_id,
+           COUNT(*),
+           SUM(CASE WHEN gf > gc THEN 1 ELSE 0 END),
+           SUM(CASE WHEN gf = gc THEN 1 ELSE 0 END),
+           SUM(CASE WHEN gf < gc THEN 1 ELSE 0 END),
+           SUM(gf),
+           SUM(gc)
+    FROM (
+        SELECT torneo_id, equipo1_id AS equipo_id,
+               COALESCE(marcador1, 0) AS gf, COALESCE(marcador2, 0) AS gc
+        FROM {tabla}
+        WHERE estado = 'jugado' AND equipo1_id IS NOT NULL AND equipo2_id IS NOT NULL
+              AND ronda IS NULL {filtro}
+        UNION ALL
+        SELECT torneo_id, equipo2_id AS equipo_id,
+               COALESCE(marcador2, 0) AS gf, COALESCE(marcador1, 0) AS gc
+        FROM {tabla}
+        WHERE estado = 'jugado' AND equipo1_id IS NOT NULL AND equipo2_id IS NOT NULL
+              AND ronda IS NULL {filtro}
+    ) AS resultados
+    GROUP BY torneo_id, equipo_id
+"""
+
+
+def equipos_en_orden(torneo_id):
+    """
+    Equipos del torneo en el orden de la tabla (puntos, diferencia, goles a
+    favor, nombre), con su fila de posiciones. Los que no jugaron van al final.
+    """
+    return (
+        Equipo.objects.filter(torneo_id=torneo_id)
+        .select_related("posicion")
+        .annotate(dif=F("posicion__goles_favor") - F("posicion__goles_contra"))
+        .order_by(
+            F("posicion__puntos").desc(nulls_last=True),
+            F("dif").desc(nulls_last=True),
+            F("posicion__goles_favor").desc(nulls_last=True),
+            "nombre",
+        )
+    )
+
+
+def recalcular_posiciones(torneo_id=None):
+    """
+    Reconstruye la tabla de posiciones (de un torneo o de todos) a partir de
+    los partidos jugados con una sola consulta agregada. Sirve para corregir
+    cualquier desfase de la actualización incremental.
+    Devuelve la cantidad de filas escritas.
+    """
+    filtro = ""
+    params = []
+    if torneo_id is not None:
+        filtro = "AND torneo_id = %s"
+        params = [torneo_id, torneo_id]
+    sql = SQL_TABLA.format(tabla=Partido._meta.db_table, filtro=filtro)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            stats = {fila[1]: fila for fila in cursor.fetchall()}
+
+        equipos = Equipo.objects.all()
+        posiciones = Posicion.objects.all()
+        if torneo_id is not None:
+            equipos = equipos.filter(torneo_id=torneo_id)
+            posiciones = posiciones.filter(torneo_id=torneo_id)
+        posiciones.delete()
+
+        filas = []
+        for equipo_id, equipo_torneo_id in equipos.values_list("id", "torneo_id"):
+            fila = stats.get(equipo_id)
+            p = Posicion(torneo_id=equipo_torneo_id, equipo_id=equipo_id)
+            if fila:
+                _, _, p.jugados, p.ganados, p.empatados, p.perdidos, p.goles_favor, p.goles_contra = fila
+                p.puntos = p.ganados * PUNTOS_VICTORIA + p.empatados * PUNTOS_EMPATE
+            filas.append(p)
+        Posicion.objects.bulk_create(filas)
+    return len(filas)
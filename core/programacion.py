@@ -0,0 +1,415 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+
+
+# Días mínimos entre dos partidos del mismo equipo (1 = puede jugar al día siguiente)
+DESCANSO_DIAS = 2
+# Sin fecha límite, el calendario no se extiende más allá de esto
+HORIZONTE_MAXIMO = timedelta(days=3 * 365)
+# Turnos que revisa la reparación en total (acota el tiempo cuando sobra mucho)
+PRESUPUESTO_REPARACION = 50_000
+# Partidos pendientes de cada equipo que mira el paso voraz al buscar rival disponible
+VENTANA_BUSQUEDA = 8
+
+
+def parse_sedes(valor):
+    """'Cancha 1, Cancha 2' -> ['Cancha 1', 'Cancha 2']"""
+    sedes = [s.strip() for s in (valor or "").split(",") if s.strip()]
+    if len(set(sedes)) != len(sedes):
+        raise ValueError("Hay sedes repetidas.")
+    return sedes
+
+
+def parse_horarios(valor):
+    """'18:00, 20:30' -> [time(18, 0), time(20, 30)] (ordenados)"""
+    horarios = []
+    for parte in (valor or "").split(","):
+        parte = parte.strip()
+        if not parte:
+            continue
+        try:
+            horarios.append(time.fromisoformat(parte))
+        except ValueError:
+            raise ValueError(f"Horario inválido: '{parte}' (use HH:MM).")
+    return sorted(set(horarios))
+
+
+def parse_fechas(valor):
+    """'2025-03-01, 2025-03-08' -> {date, date} (fechas bloqueadas)"""
+    fechas = set()
+    for parte in (valor or "").split(","):
+        parte = parte.strip()
+        if not parte:
+            continue
+        try:
+            fechas.add(date.fromisoformat(parte))
+        except ValueError:
+            raise ValueError(f"Fecha bloqueada inválida: '{parte}' (use YYYY-MM-DD).")
+    return fechas
+
+
+def parse_dias_semana(valor):
+    """'5,6' -> {5, 6} (0 = lunes). Vacío = todos los días."""
+    dias = set()
+    for parte in (valor or "").split(","):
+        parte = parte.strip()
+        if not parte:
+            continue
+        if not parte.isdigit() or int(parte) > 6:
+            raise ValueError(f"Día de la semana inválido: '{parte}' (0 = lunes ... 6 = domingo).")
+        dias.add(int(parte))
+    return dias or set(range(7))
+
+
+def parse_descanso(valor):
+    if valor in (None, ""):
+        return DESCANSO_DIAS
+    try:
+        dias = int(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"Descanso inválido: '{valor}'.")
+    if dias < 1:
+        raise ValueError("El descanso debe ser de al menos 1 día (un partido por día por equipo).")
+    return dias
+
+
+class Restricciones:
+    """
+    Condiciones del calendario: sedes (canchas) y horarios de inicio
+    disponibles cada día habilitado, fechas bloqueadas, días de la semana
+    en que se juega y descanso mínimo (en días) entre partidos de un equipo.
+    """
+
+    def __init__(self, sedes, horarios, inicio, fin=None, bloqueadas=(), descanso=DESCANSO_DIAS,
+                 dias_semana=None):
+        if not sedes:
+            raise ValueError("Indique al menos una sede.")
+        if not horarios:
+            raise ValueError("Indique al menos un horario.")
+        if fin is not None and fin < inicio:
+            raise ValueError("La fecha límite es anterior al inicio.")
+        self.sedes = list(sedes)
+        self.horarios = sorted(horarios)
+        self.inicio = inicio
+        self.fin = fin
+        self.bloqueadas = set(bloqueadas)
+        self.descanso = descanso
+        self.dias_semana = set(dias_semana) if dias_semana else set(range(7))
+
+    @property
+    def limite(self):
+        return self.fin or self.inicio + HORIZONTE_MAXIMO
+
+    def dias(self):
+        """Días habilitados entre inicio y el límite, en orden."""
+        dia = self.inicio
+        while dia <= self.limite:
+            if dia.weekday() in self.dias_semana and dia not in self.bloqueadas:
+                yield dia
+            dia += timedelta(days=1)
+
+    @property
+    def turnos(self):
+        """Turnos (hora, sede) de cada día habilitado, en orden de hora."""
+        return [(hora, sede) for hora in self.horarios for sede in self.sedes]
+
+
+def leer_restricciones(datos, inicio=None):
+    """
+    Arma las Restricciones desde un dict de texto (GET del formulario u
+    opciones del comando): sedes, horarios, descanso, bloqueadas, fin y dias.
+    Sin sedes ni horarios devuelve None (fixture por jornadas, sin turnos).
+    """
+    sedes = parse_sedes(datos.get("sedes"))
+    horarios = parse_horarios(datos.get("horarios"))
+    if not sedes and not horarios:
+        return None
+    fin = datos.get("fin")
+    try:
+        fin = date.fromisoformat(fin) if fin else None
+    except ValueError:
+        raise ValueError(f"Fecha límite inválida: '{fin}' (use YYYY-MM-DD).")
+    inicio = timezone.localtime(inicio).date() if inicio else timezone.localdate()
+    return Restricciones(
+        sedes,
+        horarios,
+        inicio,
+        fin=fin,
+        bloqueadas=parse_fechas(datos.get("bloqueadas")),
+        descanso=parse_descanso(datos.get("descanso")),
+        dias_semana=parse_dias_semana(datos.get("dias")),
+    )
+
+
+class Programacion:
+    def __init__(self):
+        self.asignados = []  # (local, visitante, datetime, sede)
+        self.sin_asignar = []  # (local, visitante)
+        self.problemas = []  # restricciones que no se pueden cumplir
+
+    @property
+    def completa(self):
+        return not self.sin_asignar
+
+
+class _Calendario:
+    """Estado del armado: turnos ocupados y fechas de juego de cada equipo."""
+
+    def __init__(self, restricciones, ocupados=(), fechas_equipos=None):
+        self.r = restricciones
+        self.ocupados = set(ocupados)  # (datetime, sede)
+        self.fechas = defaultdict(list)  # equipo -> [date] ordenadas
+        for equipo, fechas in (fechas_equipos or {}).items():
+            self.fechas[equipo] = sorted(fechas)
+
+    def libre(self, equipo, dia):
+        """¿Respeta `dia` el descanso frente a los demás partidos del equipo?"""
+        fechas = self.fechas[equipo]
+        i = bisect_left(fechas, dia)
+        # basta mirar el partido anterior y el siguiente
+        if i > 0 and (dia - fechas[i - 1]).days < self.r.descanso:
+            return False
+        if i < len(fechas) and (fechas[i] - dia).days < self.r.descanso:
+            return False
+        return True
+
+    def ocupar(self, local, visitante, momento, sede):
+        self.ocupados.add((momento, sede))
+        insort(self.fechas[local], momento.date())
+        insort(self.fechas[visitante], momento.date())
+
+    def liberar(self, local, visitante, momento, sede):
+        self.ocupados.discard((momento, sede))
+        self.fechas[local].remove(momento.date())
+        self.fechas[visitante].remove(momento.date())
+
+
+def _momento(dia, hora, zona=None):
+    return timezone.make_aware(datetime.combine(dia, hora), zona)
+
+
+def diagnosticar(parejas, restricciones, dias):
+    """Cotas simples que, si no se cumplen, hacen imposible el calendario."""
+    problemas = []
+    if not dias:
+        problemas.append("No hay días habilitados entre el inicio y la fecha límite.")
+        return problemas
+    por_equipo = defaultdict(int)
+    for local, visitante in parejas:
+        por_equipo[local] += 1
+        por_equipo[visitante] += 1
+    capacidad = len(restricciones.horarios) * len(restricciones.sedes)
+    # cada equipo juega a lo sumo una vez por día
+    por_dia = min(capacidad, len(por_equipo) // 2)
+    if por_dia * len(dias) < len(parejas):
+        problemas.append(
+            f"Hay {len(dias)} días habilitados con {capacidad} turnos cada uno "
+            f"({por_dia} partidos por día como máximo): no alcanzan para {len(parejas)} partidos."
+        )
+    if restricciones.fin is not None and por_equipo:
+        maximo = max(por_equipo.values())
+        necesarios = (maximo - 1) * restricciones.descanso + 1
+        rango = (dias[-1] - dias[0]).days + 1
+        if necesarios > rango:
+            problemas.append(
+                f"Con {restricciones.descanso} días de descanso, un equipo con {maximo} partidos "
+                f"necesita al menos {necesarios} días y el rango disponible es de {rango}."
+            )
+    return problemas
+
+
+def _voraz(pendientes, restricciones, calendario, dias, programacion):
+    """
+    Recorre los días en orden y llena los turnos de cada día con los
+    partidos pendientes (en orden de jornada) cuyos dos equipos ya
+    cumplieron el descanso. Cada equipo guarda la cola de sus partidos
+    pendientes, así que un día sólo mira los equipos disponibles en vez de
+    recorrer todo lo pendiente. Devuelve los partidos que no entraron.
+    """
+    colocado = [False] * len(pendientes)
+    colas = defaultdict(list)  # equipo -> índices de sus partidos pendientes, en orden
+    for i, (local, visitante) in enumerate(pendientes):
+        colas[local].append(i)
+        colas[visitante].append(i)
+    frente = dict.fromkeys(colas, 0)  # primer índice de la cola aún no colocado
+    restantes = len(pendientes)
+
+    def siguiente(equipo, disponibles):
+        """Primer partido pendiente del equipo cuyo rival también puede jugar hoy."""
+        cola = colas[equipo]
+        while frente[equipo] < len(cola) and colocado[cola[frente[equipo]]]:
+            frente[equipo] += 1
+        for k in range(frente[equipo], min(len(cola), frente[equipo] + VENTANA_BUSQUEDA)):
+            i = cola[k]
+            if colocado[i]:
+                continue
+            local, visitante = pendientes[i]
+            rival = visitante if local == equipo else local
+            if rival in disponibles:
+                return i
+        return None
+
+    zona = timezone.get_current_timezone()
+    for dia in dias:
+        if not restantes:
+            break
+        turnos = [
+            (momento, sede)
+            for momento, sede in ((_momento(dia, hora, zona), sede) for hora, sede in restricciones.turnos)
+            if (momento, sede) not in calendario.ocupados
+        ]
+        disponibles = {e for e in colas if frente[e] < len(colas[e]) and calendario.libre(e, dia)}
+        t = 0
+        while t < len(turnos) and len(disponibles) >= 2:
+            candidatos = sorted({
+                i for i in (siguiente(e, disponibles) for e in disponibles) if i is not None
+            })
+            if not candidatos:
+                break
+            for i in candidatos:
+                if t == len(turnos):
+                    break
+                local, visitante = pendientes[i]
+                if local not in disponibles or visitante not in disponibles:
+                    continue  # uno de los dos ya juega hoy
+                momento, sede = turnos[t]
+                calendario.ocupar(local, visitante, momento, sede)
+                programacion.asignados.append((local, visitante, momento, sede))
+                disponibles -= {local, visitante}
+                colocado[i] = True
+                restantes -= 1
+                t += 1
+    return [p for p, ok in zip(pendientes, colocado) if not ok]
+
+
+def _reparar(sobrantes, restricciones, calendario, dias, programacion):
+    """
+    Reparación de los partidos que el paso voraz no ubicó. Para cada uno se
+    prueba, en orden de fecha:
+      1. un turno libre donde ambos equipos respeten el descanso hacia
+         atrás y hacia adelante;
+      2. un turno (libre o no) donde lo único que estorba es otro partido:
+         se lo quita, se ubica el sobrante y se busca un turno libre para el
+         desplazado. Si el desplazado no entra en ningún lado se deshace.
+    """
+    zona = timezone.get_current_timezone()
+    libres = {
+        (_momento(dia, hora, zona), sede)
+        for dia in dias for hora, sede in restricciones.turnos
+    } - calendario.ocupados
+    asignados = programacion.asignados
+    # turno -> índice en asignados (para encontrar al que estorba)
+    por_turno = {(momento, sede): n for n, (_, _, momento, sede) in enumerate(asignados)}
+    por_equipo = defaultdict(set)  # equipo -> índices de sus partidos en asignados
+    for n, (local, visitante, _, _) in enumerate(asignados):
+        por_equipo[local].add(n)
+        por_equipo[visitante].add(n)
+    descanso = timedelta(days=restricciones.descanso - 1)
+
+    def primer_libre(local, visitante):
+        for momento, sede in sorted(libres):
+            dia = momento.date()
+            if calendario.libre(local, dia) and calendario.libre(visitante, dia):
+                return momento, sede
+        return None
+
+    def colocar(local, visitante, momento, sede, n=None):
+        libres.discard((momento, sede))
+        calendario.ocupar(local, visitante, momento, sede)
+        if n is None:
+            n = len(asignados)
+            asignados.append(None)
+        asignados[n] = (local, visitante, momento, sede)
+        por_turno[(momento, sede)] = n
+        por_equipo[local].add(n)
+        por_equipo[visitante].add(n)
+        return n
+
+    def quitar(n):
+        local, visitante, momento, sede = asignados[n]
+        calendario.liberar(local, visitante, momento, sede)
+        del por_turno[(momento, sede)]
+        por_equipo[local].discard(n)
+        por_equipo[visitante].discard(n)
+        libres.add((momento, sede))
+
+    def estorbos(local, visitante, dia):
+        """Partidos de los dos equipos a menos del descanso de `dia`."""
+        return {
+            n for n in por_equipo[local] | por_equipo[visitante]
+            if abs(asignados[n][2].date() - dia) <= descanso
+        }
+
+    quedan = []
+    revisados = 0
+    for local, visitante in sobrantes:
+        if revisados >= PRESUPUESTO_REPARACION:
+            quedan.append((local, visitante))
+            continue
+        turno = primer_libre(local, visitante)
+        if turno:
+            colocar(local, visitante, *turno)
+            continue
+
+        resuelto = False
+        for momento, sede in sorted(set(por_turno) | libres):
+            revisados += 1
+            if revisados >= PRESUPUESTO_REPARACION:
+                break
+            dia = momento.date()
+            ocupante = por_turno.get((momento, sede))
+            molestos = estorbos(local, visitante, dia)
+            if ocupante is not None:
+                molestos.add(ocupante)
+            if len(molestos) != 1:
+                continue
+            n = molestos.pop()
+            desplazado = asignados[n]
+            quitar(n)
+            if not (calendario.libre(local, dia) and calendario.libre(visitante, dia)):
+                colocar(*desplazado, n=n)
+                continue
+            colocar(local, visitante, momento, sede, n=n)
+            otro = primer_libre(desplazado[0], desplazado[1])
+            if otro:
+                colocar(desplazado[0], desplazado[1], *otro)
+                resuelto = True
+                break
+            # el desplazado no entra en otro lado: se deshace
+            quitar(n)
+            colocar(*desplazado, n=n)
+        if not resuelto:
+            quedan.append((local, visitante))
+    return quedan
+
+
+def programar(parejas, restricciones, ocupados=(), fechas_equipos=None):
+    """
+    Asigna a cada pareja (local, visitante) un turno concreto (fecha, hora,
+    sede). `parejas` va en orden de jornada y ese orden se respeta en lo
+    posible. `ocupados` son turnos (datetime, sede) ya tomados y
+    `fechas_equipos` las fechas en que cada equipo ya juega.
+
+    Paso voraz día por día y luego reparación de los sobrantes. Lo que no
+    se pueda ubicar queda en `sin_asignar`, con el motivo en `problemas`;
+    nunca se apilan dos partidos en el mismo turno.
+    """
+    programacion = Programacion()
+    dias = list(restricciones.dias())
+    programacion.problemas = diagnosticar(parejas, restricciones, dias)
+    calendario = _Calendario(restricciones, ocupados, fechas_equipos)
+
+    sobrantes = _voraz(list(parejas), restricciones, calendario, dias, programacion)
+    if sobrantes:
+        sobrantes = _reparar(sobrantes, restricciones, calendario, dias, programacion)
+    programacion.sin_asignar = sobrantes
+    if sobrantes and not programacion.problemas:
+        programacion.problemas.append(
+            f"{len(sobrantes)} partidos no tienen turno que respete el descanso de "
+            f"{restricciones.descanso} días antes del {restricciones.limite:%Y-%m-%d}."
+        )
+    programacion.asignados.sort(key=lambda a: (a[2], restricciones.sedes.index(a[3])))
+    return programacion
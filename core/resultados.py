@@ -0,0 +1,138 @@
+from datetime import date, datetime, time, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache_torneos, eventos
+from .eliminacion import avanzar
+from .fixture import INTERVALO_JORNADAS
+from .models import Partido
+from .elo import recalcular_elo
+from .posiciones import recalcular_posiciones
+from .sqlite import reintentar_si_bloqueada
+
+
+def parse_fecha(valor):
+    """Convierte 'YYYY-MM-DD' en date (None si viene vacío)."""
+    if not valor:
+        return None
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f"Fecha inválida: '{valor}'.")
+
+
+def rango_jornada(torneo, desde=None, hasta=None):
+    """
+    Completa el rango de fechas de la planilla. Sin `desde`, empieza en la
+    fecha del primer partido pendiente del torneo; sin `hasta`, abarca una
+    jornada (INTERVALO_JORNADAS) desde `desde`.
+    """
+    if desde is None:
+        primero = (
+            Partido.objects.filter(torneo=torneo, estado="pendiente", fecha__isnull=False)
+            .order_by("fecha").values_list("fecha", flat=True).first()
+        )
+        desde = timezone.localtime(primero).date() if primero else timezone.localdate()
+    if hasta is None:
+        hasta = desde + INTERVALO_JORNADAS - timedelta(days=1)
+    return desde, hasta
+
+
+def partidos_de_jornada(torneo, desde, hasta):
+    """Partidos del torneo entre `desde` y `hasta` (inclusive), con sus equipos."""
+    inicio = timezone.make_aware(datetime.combine(desde, time.min))
+    fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+    return list(
+        Partido.objects.filter(torneo=torneo, fecha__gte=inicio, fecha__lt=fin)
+        .select_related("equipo1", "equipo2")
+        .order_by("fecha", "id")
+    )
+
+
+def _titulo(p):
+    # sin __str__ de Equipo, que carga el torneo de cada equipo
+    nombres = [e.nombre if e else "—" for e in (p.equipo1, p.equipo2)]
+    return " vs ".join(nombres)
+
+
+def _marcador(valor):
+    valor = (valor or "").strip()
+    if not valor:
+        return None
+    if not valor.isdigit():
+        raise ValueError(f"Marcador inválido: '{valor}'.")
+    return int(valor)
+
+
+def leer_marcadores(datos, partidos):
+    """
+    Lee marcador1_<id> / marcador2_<id> del POST para cada partido. Las filas
+    con ambos marcadores vacíos se omiten. Devuelve ({id: (m1, m2)}, errores).
+    """
+    marcadores = {}
+    errores = []
+    for p in partidos:
+        try:
+            m1 = _marcador(datos.get(f"marcador1_{p.pk}"))
+            m2 = _marcador(datos.get(f"marcador2_{p.pk}"))
+        except ValueError as e:
+            errores.append(f"{_titulo(p)}: {e}")
+            continue
+        if m1 is None and m2 is None:
+            continue
+        if m1 is None or m2 is None:
+            errores.append(f"{_titulo(p)}: faltan marcadores.")
+            continue
+        marcadores[p.pk] = (m1, m2)
+    return marcadores, errores
+
+
+def cargar_resultados(torneo, partidos, marcadores):
+    """
+    Marca como jugados los `partidos` (ya cargados con sus equipos) que
+    tienen marcador en `marcadores` ({id: (m1, m2)}). Se validan todos en
+    memoria y, si alguno falla, no se escribe nada. Se guardan con un único
+    bulk_update y la tabla de posiciones se recalcula una vez por lote (en
+    vez de una actualización por partido). Devuelve los partidos modificados.
+    """
+    modificados = []
+    errores = []
+    for p in partidos:
+        if p.pk not in marcadores:
+            continue
+        nuevo = marcadores[p.pk]
+        if p.estado == "jugado" and (p.marcador1, p.marcador2) == nuevo:
+            continue
+        p.torneo = torneo
+        p.marcador1, p.marcador2 = nuevo
+        p.estado = "jugado"
+        try:
+            # equipos y torneo ya en memoria: clean() no consulta la base
+            p.full_clean(exclude=["torneo", "equipo1", "equipo2"])
+        except ValidationError as e:
+            errores.extend(f"{_titulo(p)}: {m}" for m in e.messages)
+            continue
+        modificados.append(p)
+    if errores:
+        raise ValidationError(errores)
+    if not modificados:
+        return []
+
+    _guardar(torneo, modificados)
+    return modificados
+
+
+@reintentar_si_bloqueada
+def _guardar(torneo, partidos):
+    with transaction.atomic():
+        # bulk_update no pasa por Partido.save(): la tabla y el Elo se arman una vez al final
+        Partido.objects.bulk_update(partidos, ["marcador1", "marcador2", "estado"])
+        recalcular_posiciones(torneo.id)
+        recalcular_elo(torneo.id)
+        # los ganadores de la llave pasan al partido siguiente
+        for p in partidos:
+            avanzar(p)
+        cache_torneos.invalidar(torneo.id)
+        eventos.publicar_resultados(partidos)
@@ -0,0 +1,98 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache_torneos
+from .fixture import INTERVALO_JORNADAS, calcular_jornadas
+from .models import MAX_EQUIPOS_POR_TORNEO, MAX_JUGADORES_POR_EQUIPO, Torneo, Equipo, Jugador, Partido
+from .elo import recalcular_elo
+from .posiciones import recalcular_posiciones
+
+
+# Distribución de goles por equipo en los resultados sintéticos
+GOLES = [0, 1, 2, 3, 4, 5]
+PESOS_GOLES = [25, 33, 23, 12, 5, 2]
+
+
+def sembrar(
+    torneos=50,
+    equipos_por_torneo=20,
+    jugadores_por_equipo=15,
+    partidos_por_torneo=0,
+    jugados=0.0,
+    semilla=0,
+    prefijo="Torneo",
+):
+    """
+    Inserta datos sintéticos deterministas con bulk_create (sin full_clean
+    por fila). Los partidos se toman, en orden, del fixture round-robin de
+    cada torneo (una jornada por semana); la fracción `jugados` de cada
+    torneo se marca como jugada con marcadores pseudoaleatorios a partir de
+    `semilla`. Devuelve la lista de torneos creados.
+    """
+    rng = random.Random(semilla)
+    inicio = date(2025, 1, 1)
+    with transaction.atomic():
+        nuevos_torneos = Torneo.objects.bulk_create(
+            [
+                Torneo(
+                    nombre=f"{prefijo} {t:04d}",
+                    fecha_inicio=inicio + timedelta(days=t),
+                    ubicacion=f"Sede {t % 10}",
+                    # bulk_create no pasa por core/cupos.py: los contadores van ya puestos
+                    max_equipos=max(MAX_EQUIPOS_POR_TORNEO, equipos_por_torneo),
+                    max_jugadores_por_equipo=max(MAX_JUGADORES_POR_EQUIPO, jugadores_por_equipo),
+                    equipos_count=equipos_por_torneo,
+                )
+                for t in range(torneos)
+            ]
+        )
+        equipos = Equipo.objects.bulk_create(
+            [
+                Equipo(torneo=torneo, nombre=f"Equipo {t:04d}-{e:02d}", jugadores_count=jugadores_por_equipo)
+                for t, torneo in enumerate(nuevos_torneos)
+                for e in range(equipos_por_torneo)
+            ],
+            batch_size=1000,
+        )
+        Jugador.objects.bulk_create(
+            [
+                Jugador(
+                    equipo=equipo,
+                    nombre=f"Jugador {i:06d}-{j:02d}",
+                    dorsal=j + 1,
+                    email=f"jugador{i}.{j}@example.com",
+                )
+                for i, equipo in enumerate(equipos)
+                for j in range(jugadores_por_equipo)
+            ],
+            batch_size=1000,
+        )
+
+        if partidos_por_torneo:
+            partidos = []
+            for t, torneo in enumerate(nuevos_torneos):
+                del_torneo = equipos[t * equipos_por_torneo:(t + 1) * equipos_por_torneo]
+                primera = timezone.make_aware(datetime.combine(torneo.fecha_inicio, time(18, 0)))
+                calendario = [
+                    (e1, e2, primera + INTERVALO_JORNADAS * j)
+                    for j, jornada in enumerate(calcular_jornadas(del_torneo))
+                    for e1, e2 in jornada
+                ][:partidos_por_torneo]
+                n_jugados = round(len(calendario) * jugados)
+                for k, (e1, e2, fecha) in enumerate(calendario):
+                    p = Partido(torneo=torneo, equipo1=e1, equipo2=e2, fecha=fecha)
+                    if k < n_jugados:
+                        p.estado = "jugado"
+                        p.marcador1, p.marcador2 = rng.choices(GOLES, PESOS_GOLES, k=2)
+                    partidos.append(p)
+            Partido.objects.bulk_create(partidos, batch_size=1000)
+            if jugados:
+                # bulk_create no pasa por Partido.save(): la tabla y el Elo se arman de una vez
+                recalcular_posiciones()
+                recalcular_elo()
+        # bulk_create no emite post_save; los torneos son nuevos, basta la versión global
+        cache_torneos.invalidar()
+    return nuevos_torneos
@@ -0,0 +1,69 @@
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cupos
+from .cache_torneos import invalidar
+from .models import Torneo, Equipo, Jugador, Partido
+
+
+def _torneo_de(instance):
+    if isinstance(instance, Torneo):
+        return instance.pk
+    if isinstance(instance, Jugador):
+        if not instance.equipo_id:
+            return None
+        if Jugador.equipo.is_cached(instance):
+            return instance.equipo.torneo_id
+        return Equipo.objects.filter(pk=instance.equipo_id).values_list("torneo_id", flat=True).first()
+    return instance.torneo_id
+
+
+def _torneo_anterior(instance):
+    """Torneo que deja un equipo (o el equipo de un jugador) al cambiar, según save()."""
+    if isinstance(instance, Equipo):
+        return instance.__dict__.pop("_torneo_anterior", None)
+    if isinstance(instance, Jugador):
+        equipo_id = instance.__dict__.pop("_equipo_anterior", None)
+        if equipo_id is not None:
+            return Equipo.objects.filter(pk=equipo_id).values_list("torneo_id", flat=True).first()
+    return None
+
+
+@receiver(post_save, sender=Torneo)
+@receiver(post_save, sender=Equipo)
+@receiver(post_save, sender=Jugador)
+@receiver(post_save, sender=Partido)
+def invalidar_al_guardar(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    torneo_id = _torneo_de(instance)
+    invalidar(torneo_id)
+    # Al mover la fila a otro torneo, los listados del anterior también cambian
+    anterior = _torneo_anterior(instance)
+    if anterior is not None and anterior != torneo_id:
+        invalidar(anterior)
+
+
+@receiver(post_delete, sender=Torneo)
+@receiver(post_delete, sender=Equipo)
+@receiver(post_delete, sender=Jugador)
+@receiver(post_delete, sender=Partido)
+def invalidar_al_borrar(sender, instance, origin=None, **kwargs):
+    # En un borrado en cascada basta con invalidar una vez, desde el objeto de origen
+    if isinstance(origin, Model) and origin is not instance:
+        return
+    invalidar(_torneo_de(instance))
+
+
+@receiver(post_delete, sender=Equipo)
+@receiver(post_delete, sender=Jugador)
+def liberar_cupo(sender, instance, origin=None, **kwargs):
+    # Si el borrado viene en cascada del torneo (o del equipo), el contador
+    # se va con él: sólo se libera el cupo al borrar equipos o jugadores
+    if getattr(origin, "model", type(origin)) is not sender:
+        return
+    if sender is Equipo:
+        cupos.liberar_equipos(instance.torneo_id)
+    elif instance.equipo_id:
+        cupos.liberar_jugadores(instance.equipo_id)
@@ -0,0 +1,109 @@
+import os
+
+from django.conf import settings
+
+from . import cache_torneos
+from .models import Equipo, Partido
+from .montecarlo import Liga, goles_esperados, motor_por_defecto, simular
+from .posiciones import PUNTOS_EMPATE, PUNTOS_VICTORIA
+
+
+DESCENSOS = 2
+
+
+def cargar_liga(torneo_id):
+    """
+    Arma la Liga de un torneo con dos consultas: los equipos con su fila de
+    la tabla de posiciones (los partidos jugados ya están sumados ahí) y los
+    partidos de liga pendientes con sus dos equipos definidos.
+    """
+    filas = list(
+        Equipo.objects.filter(torneo_id=torneo_id).order_by("nombre", "id").values_list(
+            "id", "posicion__jugados", "posicion__puntos", "posicion__goles_favor", "posicion__goles_contra"
+        )
+    )
+    indice = {fila[0]: i for i, fila in enumerate(filas)}
+    pendientes = Partido.objects.filter(
+        torneo_id=torneo_id, estado="pendiente", ronda__isnull=True,
+        equipo1__isnull=False, equipo2__isnull=False,
+    ).values_list("equipo1_id", "equipo2_id")
+    equipo1, equipo2 = [], []
+    for e1, e2 in pendientes:
+        equipo1.append(indice[e1])
+        equipo2.append(indice[e2])
+
+    columnas = list(zip(*filas)) or [()] * 5
+    ids, jugados, puntos, goles_favor, goles_contra = (tuple(v or 0 for v in c) for c in columnas)
+    esperados1, esperados2 = goles_esperados(jugados, goles_favor, goles_contra, equipo1, equipo2)
+    return Liga(
+        equipos=ids, puntos=puntos, goles_favor=goles_favor, goles_contra=goles_contra,
+        equipo1=tuple(equipo1), equipo2=tuple(equipo2), esperados1=esperados1, esperados2=esperados2,
+        victoria=PUNTOS_VICTORIA, empate=PUNTOS_EMPATE,
+    )
+
+
+def procesos_para(liga, n):
+    """
+    Procesos a usar en el comando simular_torneo: uno salvo que la
+    simulación sea grande (simulaciones x partidos pendientes por encima de
+    SIMULACION_UMBRAL_PROCESOS), porque arrancar el pool cuesta más que
+    simular una liga chica.
+    """
+    if n * len(liga.equipo1) < settings.SIMULACION_UMBRAL_PROCESOS:
+        return 1
+    return settings.SIMULACION_PROCESOS or os.cpu_count() or 1
+
+
+def maximo_simulaciones(motor):
+    """Tope de simulaciones de simular_torneo: sin NumPy, el valor por defecto."""
+    return settings.SIMULACION_MAX if motor == "numpy" else settings.SIMULACION_SIMULACIONES_SIN_NUMPY
+
+
+def simular_torneo(torneo, n=None, semilla=0, motor=None):
+    """
+    Conteos de la simulación del torneo (ver montecarlo.simular), cacheados
+    con la versión del torneo: se recalculan sólo cuando cambia un resultado
+    o un partido, no en cada visita. Corre en el proceso que la pide (sin
+    pool: se usa desde las vistas) y con `n` acotado por maximo_simulaciones.
+    """
+    motor = motor or motor_por_defecto()
+    if not n:
+        n = settings.SIMULACION_SIMULACIONES if motor == "numpy" else settings.SIMULACION_SIMULACIONES_SIN_NUMPY
+    n = min(n, maximo_simulaciones(motor))
+
+    def calcular():
+        liga = cargar_liga(torneo.id)
+        conteos = simular(liga, n, semilla, 1, motor)
+        conteos["equipos"] = list(liga.equipos)
+        conteos["puntos_actuales"] = list(liga.puntos)
+        conteos["pendientes"] = len(liga.equipo1)
+        return conteos
+
+    return cache_torneos.obtener(cache_torneos.clave("simulacion", torneo.id, n, semilla, motor), calcular)
+
+
+def probabilidades(conteos, descensos=DESCENSOS):
+    """
+    Por equipo: puntos actuales y esperados, probabilidad de salir campeón
+    y de terminar en los últimos `descensos` puestos, y puesto medio.
+    Ordenado por puesto medio.
+    """
+    n = conteos["simulaciones"]
+    t = len(conteos["equipos"])
+    if not n or not t:
+        return []
+    descensos = min(descensos, t)
+    nombres = dict(Equipo.objects.filter(pk__in=conteos["equipos"]).values_list("id", "nombre"))
+    filas = []
+    for i, equipo_id in enumerate(conteos["equipos"]):
+        puestos = conteos["posiciones"][i]
+        filas.append({
+            "equipo": nombres.get(equipo_id, ""),
+            "puntos": conteos["puntos_actuales"][i],
+            "puntos_esperados": conteos["puntos"][i] / n,
+            "campeon": puestos[0] / n,
+            "descenso": sum(puestos[t - descensos:]) / n if descensos else 0.0,
+            "puesto_medio": sum((p + 1) * veces for p, veces in enumerate(puestos)) / n,
+        })
+    filas.sort(key=lambda f: f["puesto_medio"])
+    return filas
@@ -0,0 +1,51 @@
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+
+logger = logging.getLogger("core.rendimiento")
+
+
+def init_command(pragmas):
+    """Arma el init_command de SQLite ("PRAGMA a=b;PRAGMA c=d") desde un dict."""
+    return ";".join(f"PRAGMA {nombre}={valor}" for nombre, valor in pragmas.items())
+
+
+def bloqueada(error):
+    mensaje = str(error).lower()
+    return "database is locked" in mensaje or "database table is locked" in mensaje
+
+
+def reintentar_si_bloqueada(func):
+    """
+    Reintenta `func` (una transacción de escritura completa) si SQLite
+    responde "database is locked", con espera exponencial y algo de azar
+    para que los escritores no vuelvan a chocar. Con transaction_mode
+    IMMEDIATE el bloqueo se detecta al abrir la transacción, antes de
+    escribir nada, así que repetirla es seguro.
+
+    Dentro de una transacción externa no se reintenta (no se puede repetir
+    sólo una parte): el error se propaga para que la reintente quien la abrió.
+    """
+    @functools.wraps(func)
+    def envoltura(*args, **kwargs):
+        intentos = getattr(settings, "DB_REINTENTOS", 5)
+        espera = getattr(settings, "DB_REINTENTO_ESPERA_MS", 50) / 1000
+        for intento in range(intentos + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                if not bloqueada(e) or intento == intentos or connection.in_atomic_block:
+                    raise
+                pausa = espera * 2 ** intento * random.uniform(0.5, 1.5)
+                logger.warning(
+                    f"Base bloqueada en {func.__qualname__}; reintento {intento + 1}/{intentos} "
+                    f"en {pausa * 1000:.0f} ms"
+                )
+                time.sleep(pausa)
+
+    return envoltura
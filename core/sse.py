@@ -0,0 +1,57 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from . import eventos
+from .models import Torneo
+
+
+def formato_sse(evento):
+    """Un evento en el formato text/event-stream (id, event y data en una línea JSON)."""
+    datos = json.dumps(evento.datos, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {evento.id}\nevent: {evento.tipo}\ndata: {datos}\n\n"
+
+
+def ultimo_id(request):
+    """Last-Event-ID que manda EventSource al reconectarse (o ?ultimo= en la URL)."""
+    valor = request.headers.get("Last-Event-ID") or request.GET.get("ultimo") or ""
+    return int(valor) if valor.isdigit() else 0
+
+
+@login_required
+@require_GET
+async def torneo_eventos(request, pk):
+    """
+    Server-Sent Events con los cambios de resultado de un torneo. Consulta
+    la base una sola vez (que el torneo exista); después la conexión sólo
+    espera eventos del pub/sub (core/eventos.py) y manda un comentario de
+    latido cada EVENTOS_LATIDO_S segundos.
+
+    Bajo WSGI (runserver) un flujo infinito ocuparía un hilo para siempre:
+    se mandan los eventos pendientes y se cierra; EventSource se reconecta
+    solo después de `retry` ms y retoma desde el último id.
+    """
+    if not await Torneo.objects.filter(pk=pk).aexists():
+        raise Http404("No existe el torneo.")
+    desde = ultimo_id(request)
+    backend = eventos.backend()
+    retry = f"retry: {settings.EVENTOS_REINTENTO_MS}\n\n"
+
+    async def flujo():
+        yield retry
+        async for evento in backend.suscribir(pk, desde, latido=settings.EVENTOS_LATIDO_S):
+            yield ": latido\n\n" if evento is None else formato_sse(evento)
+
+    if isinstance(request, ASGIRequest):
+        contenido = flujo()
+    else:
+        contenido = [retry] + [formato_sse(e) for e in await backend.historial(pk, desde)]
+    response = StreamingHttpResponse(contenido, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # que un proxy (nginx) no junte los eventos en un buffer
+    response["X-Accel-Buffering"] = "no"
+    return response
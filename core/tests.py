@@ -1,3 +1,1688 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection
+from django.db.models import Q, Sum
+from django.test import Client, TestCase as DjangoTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    borrado, busqueda, cache_torneos, cupos, elo, estadisticas, eventos, instantaneas, montecarlo, trabajos,
+)
+from .bench import casos_desde_urls, comparar, medir
+from .eliminacion import generar_llave, orden_siembra, sembrar_equipos
+from .fixture import generar_fixture
+from .importacion import importar, leer_filas
+from .models import (
+    ELO_INICIAL, MAX_EQUIPOS_POR_TORNEO, MAX_JUGADORES_POR_EQUIPO,
+    Torneo, Equipo, Jugador, Partido, Posicion, EventoPartido, EstadisticaJugador, HistorialElo, Job,
+)
+from .planes import capturar_consultas, plan, problemas
+from .posiciones import recalcular_posiciones
+from .programacion import Restricciones, programar
+from .seed import sembrar
+from .simulacion import cargar_liga, probabilidades, simular_torneo
+from .sqlite import init_command, reintentar_si_bloqueada
+
+
+class TestCase(DjangoTestCase):
+    # La base se revierte entre tests, la caché no
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+def crear_torneo(nombre="Liga", n_equipos=4):
+    # bulk_create no reserva cupos: el contador va ya puesto
+    torneo = Torneo.objects.create(
+        nombre=nombre, fecha_inicio="2025-01-01",
+        max_equipos=max(MAX_EQUIPOS_POR_TORNEO, n_equipos), equipos_count=n_equipos,
+    )
+    Equipo.objects.bulk_create(
+        [Equipo(torneo=torneo, nombre=f"Equipo {i:02d}") for i in range(n_equipos)]
+    )
+    return torneo
+
+
+def archivos_de_trabajos(caso):
+    """Los archivos subidos para los trabajos van a un directorio temporal durante el test."""
+    directorio = tempfile.TemporaryDirectory()
+    caso.addCleanup(directorio.cleanup)
+    ajuste = override_settings(TRABAJOS_DIR_ARCHIVOS=directorio.name)
+    ajuste.enable()
+    caso.addCleanup(ajuste.disable)
+    return directorio.name
+
+
+class FixtureTests(TestCase):
+    def test_round_robin_simple(self):
+        torneo = crear_torneo(n_equipos=5)
+        creados = generar_fixture(torneo)
+        self.assertEqual(len(creados), 10)
+        parejas = {frozenset((p.equipo1_id, p.equipo2_id)) for p in Partido.objects.all()}
+        self.assertEqual(len(parejas), 10)
+
+    def test_ida_vuelta_y_fechas(self):
+        torneo = crear_torneo(n_equipos=4)
+        creados = generar_fixture(torneo, ida_vuelta=True, intervalo=timedelta(days=2))
+        self.assertEqual(len(creados), 12)
+        fechas = sorted({p.fecha for p in creados if p.equipo1_id < p.equipo2_id})
+        self.assertEqual(len(fechas), 3)
+        self.assertEqual(fechas[1] - fechas[0], timedelta(days=2))
+
+    def test_no_duplica_partidos_existentes(self):
+        torneo = crear_torneo(n_equipos=4)
+        generar_fixture(torneo)
+        self.assertEqual(generar_fixture(torneo), [])
+        self.assertEqual(Partido.objects.count(), 6)
+
+    def test_consultas_constantes(self):
+        torneo = crear_torneo(n_equipos=20)
+        # equipos + parejas existentes + savepoint + 5 lotes de INSERT
+        with self.assertNumQueries(9):
+            creados = generar_fixture(torneo, ida_vuelta=True)
+        self.assertEqual(len(creados), 380)
+
+    def test_requiere_dos_equipos(self):
+        torneo = crear_torneo(n_equipos=1)
+        with self.assertRaises(ValidationError):
+            generar_fixture(torneo)
+
+    def test_vista_generar(self):
+        torneo = crear_torneo(n_equipos=6)
+        user = User.objects.create_user("admin", password="x")
+        self.client.force_login(user)
+        url = reverse("partidos_generar")
+        resp = self.client.get(url, {"torneo": torneo.id, "ida_vuelta": "1", "inicio": "2025-03-01", "intervalo": "3"})
+        # la vista encola el trabajo y responde enseguida
+        job = Job.objects.get()
+        self.assertRedirects(resp, reverse("trabajo_detail", args=[job.pk]), fetch_redirect_response=False)
+        self.assertEqual(Partido.objects.filter(torneo=torneo).count(), 0)
+        self.assertEqual(trabajos.procesar("test"), 1)
+        self.assertEqual(Partido.objects.filter(torneo=torneo).count(), 30)
+        primera = Partido.objects.order_by("fecha").first()
+        self.assertEqual(primera.fecha.date().isoformat(), "2025-03-01")
+
+        resp = self.client.get(url, {"torneo": torneo.id, "intervalo": "0"})
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(Job.objects.count(), 1)  # parámetros inválidos: no se encola
+
+
+class PosicionesTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.torneo = crear_torneo(n_equipos=3)
+        self.a, self.b, self.c = Equipo.objects.order_by("id")
+
+    def jugar(self, e1, e2, m1, m2):
+        return Partido.objects.create(
+            torneo=self.torneo, equipo1=e1, equipo2=e2, estado="jugado", marcador1=m1, marcador2=m2
+        )
+
+    def fila(self, equipo):
+        p = Posicion.objects.get(equipo=equipo)
+        return (p.jugados, p.ganados, p.empatados, p.perdidos, p.goles_favor, p.goles_contra, p.puntos)
+
+    def test_incremental_y_reversion(self):
+        p = self.jugar(self.a, self.b, 2, 0)
+        self.assertEqual(self.fila(self.a), (1, 1, 0, 0, 2, 0, 3))
+        self.assertEqual(self.fila(self.b), (1, 0, 0, 1, 0, 2, 0))
+
+        # corregir el resultado revierte el anterior
+        p.marcador2 = 2
+        p.save()
+        self.assertEqual(self.fila(self.a), (1, 0, 1, 0, 2, 2, 1))
+        self.assertEqual(self.fila(self.b), (1, 0, 1, 0, 2, 2, 1))
+
+        # volver a pendiente lo quita de la tabla
+        p.estado = "pendiente"
+        p.save()
+        self.assertEqual(self.fila(self.a), (0, 0, 0, 0, 0, 0, 0))
+
+        p.estado = "jugado"
+        p.save()
+        p.delete()
+        self.assertEqual(self.fila(self.b), (0, 0, 0, 0, 0, 0, 0))
+
+    def test_borrar_equipo_recalcula_rivales(self):
+        self.jugar(self.a, self.b, 1, 0)
+        self.jugar(self.c, self.b, 3, 3)
+        self.a.delete()
+        self.assertEqual(self.fila(self.b), (1, 0, 1, 0, 3, 3, 1))
+
+    def test_recalcular_coincide_con_incremental(self):
+        self.jugar(self.a, self.b, 1, 0)
+        self.jugar(self.b, self.c, 2, 2)
+        self.jugar(self.c, self.a, 4, 1)
+        incremental = [self.fila(e) for e in (self.a, self.b, self.c)]
+        Posicion.objects.update(puntos=99)
+        self.assertEqual(recalcular_posiciones(self.torneo.id), 3)
+        self.assertEqual([self.fila(e) for e in (self.a, self.b, self.c)], incremental)
+
+    def test_vista_tabla(self):
+        self.jugar(self.a, self.b, 1, 0)
+        self.client.force_login(User.objects.create_user("admin", password="x"))
+        resp = self.client.get(reverse("torneo_tabla", args=[self.torneo.id]))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([e.id for e in resp.context["equipos"]][0], self.a.id)
+
+
+class PresupuestoConsultasMixin:
+    """
+    Arnés de presupuesto de consultas: siembra un volumen grande de datos una
+    vez por clase y permite afirmar que una vista ejecuta un número fijo de
+    consultas, sin importar cuántas filas haya. Si una vista vuelve a hacer
+    O(n) consultas, el test falla.
+    """
+    N_TORNEOS = 50
+    EQUIPOS_POR_TORNEO = 20
+    JUGADORES_POR_EQUIPO = 15
+    PARTIDOS_POR_TORNEO = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.torneos = sembrar(
+            cls.N_TORNEOS, cls.EQUIPOS_POR_TORNEO, cls.JUGADORES_POR_EQUIPO, cls.PARTIDOS_POR_TORNEO
+        )
+        cls.usuario = User.objects.create_user("presupuesto", password="x")
+
+    def assertConsultas(self, n, nombre_url, *args, params=None):
+        self.client.force_login(self.usuario)
+        with self.assertNumQueries(n):
+            resp = self.client.get(reverse(nombre_url, args=args), params or {})
+        self.assertEqual(resp.status_code, 200)
+        return resp
+
+
+class ConsultasVistasTests(PresupuestoConsultasMixin, TestCase):
+    # Cada vista autenticada paga 2 consultas fijas (sesión + usuario)
+
+    def test_equipos_list(self):
+        resp = self.assertConsultas(4, "equipos_list")
+        self.assertEqual(len(resp.context["equipos"]), self.N_TORNEOS * self.EQUIPOS_POR_TORNEO)
+        # las opciones de torneos ya quedaron en caché
+        self.assertConsultas(3, "equipos_list", params={"torneo": self.torneos[0].pk})
+
+    def test_jugadores_list(self):
+        # sin torneo elegido no se cargan las opciones de equipo
+        self.assertConsultas(4, "jugadores_list")
+        self.assertConsultas(4, "jugadores_list", params={"torneo": self.torneos[0].pk})
+
+    def test_partidos_list(self):
+        self.assertConsultas(4, "partidos_list")
+        self.assertConsultas(4, "partidos_list", params={"torneo": self.torneos[0].pk})
+
+    def test_torneos_list(self):
+        self.assertConsultas(3, "torneos_list")
+
+    def test_formularios(self):
+        # sólo se listan los equipos del torneo elegido, y sin Equipo.__str__
+        self.assertConsultas(3, "jugador_create")
+        self.assertConsultas(3, "partido_create")
+        self.assertConsultas(3, "equipo_create")
+        torneo = self.torneos[0]
+        resp = self.assertConsultas(5, "partido_create", params={"torneo": torneo.pk})
+        self.assertEqual(len(resp.context["form"].fields["equipo1"].choices), self.EQUIPOS_POR_TORNEO + 1)
+        equipo = Equipo.objects.filter(torneo=torneo).first()
+        resp = self.assertConsultas(5, "jugador_create", params={"equipo": equipo.pk})
+        self.assertEqual(resp.context["form"].initial["torneo"], torneo.pk)
+
+    def test_opciones_de_equipos(self):
+        torneo = self.torneos[0]
+        resp = self.assertConsultas(3, "api_equipos_opciones", params={"torneo": torneo.pk})
+        self.assertEqual(len(resp.json()["resultados"]), self.EQUIPOS_POR_TORNEO)
+        self.assertEqual(set(resp.json()["resultados"][0]), {"id", "nombre"})
+        # ya en caché, y con el ETag vigente responde 304
+        self.assertConsultas(2, "api_equipos_opciones", params={"torneo": torneo.pk})
+        resp = self.client.get(
+            reverse("api_equipos_opciones"), {"torneo": torneo.pk}, HTTP_IF_NONE_MATCH=resp["ETag"]
+        )
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(self.assertConsultas(2, "api_equipos_opciones").json()["resultados"], [])
+
+    def test_partido_resultado(self):
+        partido = Partido.objects.filter(torneo=self.torneos[0]).first()
+        self.assertConsultas(3, "partido_set_resultado", partido.pk)
+
+
+class PaginacionTests(PresupuestoConsultasMixin, TestCase):
+    N_TORNEOS = 3
+    EQUIPOS_POR_TORNEO = 12
+    JUGADORES_POR_EQUIPO = 10
+    PARTIDOS_POR_TORNEO = 40
+
+    def recorrer(self, nombre_url, clave, params):
+        """Sigue los cursores 'siguiente' hasta el final y luego vuelve con 'anterior'."""
+        self.client.force_login(self.usuario)
+        url = reverse(nombre_url)
+        paginas = []
+        resp = self.client.get(url, params)
+        while True:
+            pagina = resp.context[clave]
+            paginas.append([obj.pk for obj in pagina])
+            if not pagina.has_next():
+                break
+            resp = self.client.get(url, {"cursor": pagina.cursor_siguiente})
+        atras = [[obj.pk for obj in resp.context[clave]]]
+        while resp.context[clave].has_previous():
+            resp = self.client.get(url, {"cursor": resp.context[clave].cursor_anterior})
+            atras.append([obj.pk for obj in resp.context[clave]])
+        self.assertEqual(atras[::-1], paginas)
+        return [pk for pagina in paginas for pk in pagina]
+
+    def test_jugadores_orden_y_filtros(self):
+        torneo = self.torneos[1]
+        pks = self.recorrer("jugadores_list", "jugadores", {"torneo": torneo.pk})
+        esperado = list(
+            Jugador.objects.filter(equipo__torneo=torneo).order_by("nombre", "id").values_list("pk", flat=True)
+        )
+        self.assertEqual(pks, esperado)
+        self.assertGreater(len(esperado), 50)
+
+    def test_partidos_con_fechas_nulas(self):
+        torneo = self.torneos[0]
+        # mitad con fecha repetida, mitad sin fecha
+        ids = list(Partido.objects.filter(torneo=torneo).values_list("pk", flat=True))
+        Partido.objects.filter(pk__in=ids[::2]).update(fecha="2025-05-01T10:00:00Z")
+        Partido.objects.filter(pk__in=ids[1::2]).update(fecha=None)
+        pks = self.recorrer("partidos_list", "partidos", {})
+        self.assertEqual(len(pks), Partido.objects.count())
+        self.assertEqual(len(set(pks)), len(pks))
+
+    def test_cursor_invalido_o_de_otro_filtro(self):
+        self.client.force_login(self.usuario)
+        resp = self.client.get(reverse("partidos_list"), {"cursor": "no-es-un-cursor"})
+        self.assertEqual(resp.status_code, 200)
+        resp = self.client.get(reverse("jugadores_list"), {"torneo": self.torneos[0].pk})
+        cursor = resp.context["jugadores"].cursor_siguiente
+        resp = self.client.get(reverse("jugadores_list"), {"cursor": cursor, "torneo": self.torneos[1].pk})
+        self.assertFalse(resp.context["jugadores"].has_previous())
+        self.assertEqual(resp.context["torneo_id"], str(self.torneos[1].pk))
+
+
+class RendimientoMiddlewareTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        crear_torneo(n_equipos=3)
+        self.usuario = User.objects.create_user("staff", password="x", is_staff=True)
+        self.client.force_login(self.usuario)
+
+    def test_server_timing_y_log(self):
+        with self.assertLogs("core.rendimiento", "INFO") as logs:
+            resp = self.client.get(reverse("equipos_list"))
+        self.assertIn("total;dur=", resp["Server-Timing"])
+        self.assertIn('consultas"', resp["Server-Timing"])
+        datos = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(datos["ruta"], reverse("equipos_list"))
+        self.assertEqual(datos["bytes"], len(resp.content))
+        self.assertGreater(datos["consultas"], 0)
+
+    @override_settings(RENDIMIENTO_UMBRAL_LENTO_MS=0)
+    def test_peticion_lenta_incluye_sql_y_duplicadas(self):
+        torneo = Torneo.objects.get()
+        with self.assertLogs("core.rendimiento", "WARNING") as logs:
+            self.client.get(reverse("torneo_tabla", args=[torneo.pk]))
+        datos = json.loads(logs.records[-1].getMessage())
+        self.assertTrue(datos["lenta"])
+        self.assertEqual(len(datos["sql"]), datos["consultas"])
+        self.assertIn("duplicadas", datos)
+
+    def test_perfil_para_staff(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            with override_settings(RENDIMIENTO_DIR_PERFILES=directorio):
+                self.client.get(reverse("equipos_list"), {"_perfil": "1"})
+                self.assertEqual(len(os.listdir(directorio)), 1)
+                self.usuario.is_staff = False
+                self.usuario.save()
+                self.client.get(reverse("equipos_list"), {"_perfil": "1"})
+                self.assertEqual(len(os.listdir(directorio)), 1)
+
+
+class SemillaYBenchTests(TestCase):
+    def test_seed_tournaments_determinista(self):
+        call_command("seed_tournaments", torneos=2, equipos=4, jugadores=3, jugados=0.5, stdout=io.StringIO())
+        self.assertEqual(Jugador.objects.count(), 24)
+        self.assertEqual(Partido.objects.count(), 12)
+        marcadores = list(
+            Partido.objects.filter(estado="jugado").order_by("id").values_list("marcador1", "marcador2")
+        )
+        self.assertEqual(len(marcadores), 6)
+        self.assertEqual(Posicion.objects.aggregate(pj=Sum("jugados"))["pj"], 12)
+
+        Torneo.objects.all().delete()
+        call_command("seed_tournaments", torneos=2, equipos=4, jugadores=3, jugados=0.5, stdout=io.StringIO())
+        self.assertEqual(
+            list(Partido.objects.filter(estado="jugado").order_by("id").values_list("marcador1", "marcador2")),
+            marcadores,
+        )
+        with self.assertRaises(CommandError):
+            call_command("seed_tournaments", torneos=1, stdout=io.StringIO())
+
+    def test_medir_todas_las_urls(self):
+        torneos = sembrar(2, 4, 2, 6, jugados=0.5)
+        partido = Partido.objects.filter(torneo=torneos[0]).first()
+        client = Client()
+        client.force_login(User.objects.create_superuser("bench", password="x"))
+        casos = casos_desde_urls(torneos[0], partido.equipo1, partido, torneos[1])
+        resultados = medir(client, casos, repeticiones=2)
+        self.assertIn("partidos_list?torneo&equipo", resultados)
+        self.assertIn("partidos_generar", resultados)
+        for nombre, r in resultados.items():
+            self.assertIn(r["estado"], (200, 302), nombre)
+            self.assertLessEqual(r["p50_ms"], r["p99_ms"])
+        # el caso partidos_generar corre el trabajo que encola y no deja filas pendientes
+        self.assertEqual(Partido.objects.filter(torneo=torneos[1]).count(), 12)
+        self.assertEqual(list(Job.objects.values_list("tipo", "estado")), [("generar_fixture", "terminado")])
+
+        peor = {n: dict(r, p95_ms=r["p95_ms"] / 10, consultas=r["consultas"]) for n, r in resultados.items()}
+        self.assertTrue(any(c["regresion"] for c in comparar(resultados, peor).values()))
+
+
+class ImportacionTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.torneo = crear_torneo("Liga", n_equipos=MAX_EQUIPOS_POR_TORNEO - 1)
+        self.existente = Equipo.objects.order_by("id").first()
+        Jugador.objects.create(equipo=self.existente, nombre="Repetido")
+
+    def csv(self, *filas):
+        texto = "torneo,equipo,jugador,dorsal,email\n" + "\n".join(filas) + "\n"
+        return leer_filas(io.BytesIO(texto.encode()), "csv")
+
+    def test_crea_validas_y_reporta_errores(self):
+        filas = [f"Liga,Nuevo,Jugador {i},{i},j{i}@example.com" for i in range(MAX_JUGADORES_POR_EQUIPO + 1)]
+        filas += [
+            f"Liga,{self.existente.nombre},Repetido,,",
+            f"Liga,{self.existente.nombre},Otro,x,",
+            "Liga,Sobra,,,",
+            "Otra liga,Equipo,,,",
+            "Liga,Nuevo,Con email,,no-es-email",
+            # isdigit() los acepta pero no son un número entero válido
+            f"Liga,{self.existente.nombre},Superíndice,²,",
+            f"Liga,{self.existente.nombre},Negativo,-3,",
+        ]
+        # el conteo agrupado y los bulk_create no dependen de la cantidad de filas
+        with self.assertNumQueries(8):
+            resultado = importar(self.csv(*filas))
+        self.assertEqual(resultado.equipos_creados, 1)
+        self.assertEqual(resultado.jugadores_creados, MAX_JUGADORES_POR_EQUIPO)
+        self.assertEqual(sorted(linea for linea, _ in resultado.errores), [17, 18, 19, 20, 21, 22, 23, 24])
+        self.assertEqual(Equipo.objects.filter(torneo=self.torneo).count(), MAX_EQUIPOS_POR_TORNEO)
+        self.assertEqual(Jugador.objects.filter(equipo__nombre="Nuevo").count(), MAX_JUGADORES_POR_EQUIPO)
+
+    def test_json_y_vista(self):
+        archivos_de_trabajos(self)
+        contenido = b'{"torneo": "Liga", "equipo": "Desde JSON", "jugador": "Ana", "dorsal": 9}\n\nno es json\n'
+        self.client.force_login(User.objects.create_user("admin", password="x"))
+        archivo = SimpleUploadedFile("plantel.json", contenido)
+        resp = self.client.post(reverse("equipos_importar"), {"archivo": archivo, "formato": "json"})
+        self.assertEqual(resp.status_code, 302)
+        trabajos.procesar("test")
+        job = Job.objects.get()
+        self.assertEqual(job.estado, "terminado")
+        self.assertEqual(job.resultado["errores"], [[3, "Fila ilegible."]])
+        self.assertContains(self.client.get(resp.url), "Fila ilegible.")
+        self.assertTrue(Jugador.objects.filter(nombre="Ana", dorsal=9, equipo__nombre="Desde JSON").exists())
+
+
+class CuposTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.torneo = Torneo.objects.create(
+            nombre="Liga", fecha_inicio="2025-01-01", max_equipos=2, max_jugadores_por_equipo=1
+        )
+
+    def test_alta_sin_contar_y_rechazo_por_cupo(self):
+        with capturar_consultas() as consultas:
+            equipo = Equipo.objects.create(torneo=self.torneo, nombre="A")
+        self.assertFalse([sql for sql, _ in consultas if "COUNT(" in sql.upper()])
+        Equipo.objects.create(torneo=self.torneo, nombre="B")
+        with self.assertRaisesMessage(ValidationError, "ya tiene 2 equipos"):
+            Equipo.objects.create(torneo=self.torneo, nombre="C")
+        self.assertFalse(Equipo.objects.filter(nombre="C").exists())
+
+        Jugador.objects.create(equipo=equipo, nombre="Ana")
+        with self.assertRaisesMessage(ValidationError, "ya tiene 1 jugadores"):
+            Jugador.objects.create(equipo=equipo, nombre="Eva")
+        self.torneo.refresh_from_db()
+        equipo.refresh_from_db()
+        self.assertEqual((self.torneo.equipos_count, equipo.jugadores_count), (2, 1))
+
+    def test_cambio_de_equipo_y_borrados(self):
+        a = Equipo.objects.create(torneo=self.torneo, nombre="A")
+        b = Equipo.objects.create(torneo=self.torneo, nombre="B")
+        jugador = Jugador.objects.create(equipo=a, nombre="Ana")
+        jugador.equipo = b
+        jugador.save()
+        jugador.nombre = "Ana María"
+        jugador.save()  # sin cambiar de equipo no reserva otra vez
+        self.assertEqual(list(Equipo.objects.order_by("nombre").values_list("jugadores_count", flat=True)), [0, 1])
+
+        b.delete()
+        self.torneo.refresh_from_db()
+        self.assertEqual(self.torneo.equipos_count, 1)
+        # una instancia cargada antes no pisa el contador al guardarse
+        viejo = Torneo.objects.get(pk=self.torneo.pk)
+        Equipo.objects.create(torneo=self.torneo, nombre="C")
+        viejo.descripcion = "editado"
+        viejo.save()
+        self.torneo.refresh_from_db()
+        self.assertEqual(self.torneo.equipos_count, 2)
+
+    def test_reserva_en_bloque_y_limite_del_torneo(self):
+        with self.assertRaises(ValidationError):
+            cupos.reservar_equipos(self.torneo.pk, 3)
+        cupos.reservar_equipos(self.torneo.pk, 2)
+        self.torneo.refresh_from_db()
+        self.assertEqual(self.torneo.equipos_count, 2)
+
+        self.torneo.max_equipos = 1
+        with self.assertRaises(ValidationError):
+            self.torneo.full_clean()
+
+    def test_vista_y_reconciliacion(self):
+        Equipo.objects.create(torneo=self.torneo, nombre="A")
+        Equipo.objects.create(torneo=self.torneo, nombre="B")
+        self.client.force_login(User.objects.create_user("admin", password="x"))
+        resp = self.client.post(reverse("equipo_create"), {"torneo": self.torneo.pk, "nombre": "C"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("ya tiene 2 equipos", str(resp.context["form"].non_field_errors()))
+
+        Torneo.objects.filter(pk=self.torneo.pk).update(equipos_count=0)
+        Equipo.objects.update(jugadores_count=7)
+        salida = io.StringIO()
+        call_command("reconciliar_cupos", stdout=salida)
+        self.assertIn("1 torneos y 2 equipos", salida.getvalue())
+        self.torneo.refresh_from_db()
+        self.assertEqual(self.torneo.equipos_count, 2)
+        self.assertEqual(cupos.reconciliar(), (0, 0))
+
+
+class ExportacionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.torneos = sembrar(2, 4, 3, 6, jugados=0.5)
+        cls.usuario = User.objects.create_user("admin", password="x")
+
+    def descargar(self, nombre_url, params):
+        self.client.force_login(self.usuario)
+        resp = self.client.get(reverse(nombre_url), params)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        return b"".join(resp.streaming_content).decode()
+
+    def test_partidos_csv_con_filtros(self):
+        torneo = self.torneos[0]
+        texto = self.descargar("partidos_exportar", {"formato": "csv", "torneo": torneo.pk})
+        filas = list(csv.reader(io.StringIO(texto)))
+        self.assertEqual(filas[0][:3], ["id", "torneo", "equipo1"])
+        self.assertEqual(len(filas) - 1, Partido.objects.filter(torneo=torneo).count())
+        self.assertTrue(all(f[1] == torneo.nombre for f in filas[1:]))
+
+    def test_jugadores_y_equipos_ndjson(self):
+        equipo = Equipo.objects.order_by("id").first()
+        texto = self.descargar("jugadores_exportar", {"formato": "ndjson", "equipo": equipo.pk})
+        filas = [json.loads(linea) for linea in texto.splitlines()]
+        self.assertEqual({f["equipo"] for f in filas}, {equipo.nombre})
+        self.assertEqual(len(filas), 3)
+
+        texto = self.descargar("equipos_exportar", {"formato": "ndjson"})
+        filas = [json.loads(linea) for linea in texto.splitlines()]
+        self.assertEqual(len(filas), 8)
+        self.assertEqual({f["jugadores"] for f in filas}, {3})
+
+    def test_una_consulta_sin_importar_las_filas(self):
+        self.client.force_login(self.usuario)
+        resp = self.client.get(reverse("partidos_exportar"), {"formato": "ndjson"})
+        with self.assertNumQueries(1):
+            contenido = b"".join(resp.streaming_content)
+        self.assertEqual(len(contenido.splitlines()), Partido.objects.count())
+
+    def test_formato_invalido(self):
+        self.client.force_login(self.usuario)
+        resp = self.client.get(reverse("partidos_exportar"), {"formato": "xml"})
+        self.assertRedirects(resp, reverse("partidos_list"))
+
+
+class CacheTorneosTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.torneo = crear_torneo(n_equipos=4)
+        self.otro = crear_torneo("Copa", n_equipos=2)
+        self.usuario = User.objects.create_user("cache", password="x", is_staff=True)
+        self.client.force_login(self.usuario)
+
+    def test_segunda_peticion_sin_consultas_de_datos(self):
+        url = reverse("equipos_list")
+        self.client.get(url, {"torneo": self.torneo.pk})
+        # sólo sesión + usuario: listado y opciones salen de la caché
+        with self.assertNumQueries(2):
+            resp = self.client.get(url, {"torneo": self.torneo.pk})
+        self.assertEqual(len(resp.context["equipos"]), 4)
+
+    def test_invalidacion_por_guardar_y_borrar(self):
+        url = reverse("equipos_list")
+        self.client.get(url, {"torneo": self.torneo.pk})
+        Equipo.objects.create(torneo=self.torneo, nombre="Nuevo")
+        resp = self.client.get(url, {"torneo": self.torneo.pk})
+        self.assertEqual(len(resp.context["equipos"]), 5)
+        self.assertContains(resp, "Nuevo")
+
+        Equipo.objects.get(nombre="Nuevo").delete()
+        resp = self.client.get(url, {"torneo": self.torneo.pk})
+        self.assertEqual(len(resp.context["equipos"]), 4)
+
+    def test_invalidacion_por_torneo(self):
+        v_otro = cache_torneos.version(self.otro.pk)
+        v_torneo = cache_torneos.version(self.torneo.pk)
+        generar_fixture(self.torneo)  # bulk_create: invalida a mano
+        self.assertNotEqual(cache_torneos.version(self.torneo.pk), v_torneo)
+        self.assertEqual(cache_torneos.version(self.otro.pk), v_otro)
+
+        resp = self.client.get(reverse("partidos_list"), {"torneo": self.torneo.pk})
+        self.assertEqual(len(resp.context["partidos"]), 6)
+
+    def test_mover_equipo_o_jugador_invalida_el_torneo_anterior(self):
+        equipo = Equipo.objects.filter(torneo=self.torneo).first()
+        self.assertIn(equipo, cache_torneos.opciones_equipos(self.torneo.pk))
+        v_torneo = cache_torneos.version(self.torneo.pk)
+        equipo.torneo, equipo.nombre = self.otro, "Movido"
+        equipo.save()
+        self.assertNotEqual(cache_torneos.version(self.torneo.pk), v_torneo)
+        self.assertNotIn(equipo, cache_torneos.opciones_equipos(self.torneo.pk))
+
+        jugador = Jugador.objects.create(equipo=Equipo.objects.filter(torneo=self.torneo).first(), nombre="Ana")
+        v_torneo = cache_torneos.version(self.torneo.pk)
+        jugador.equipo = equipo
+        jugador.save()
+        self.assertNotEqual(cache_torneos.version(self.torneo.pk), v_torneo)
+
+    def test_estadisticas(self):
+        url = reverse("jugadores_list")
+        self.client.get(url)
+        self.client.get(url)
+        datos = self.client.get(reverse("cache_estadisticas")).json()
+        self.assertEqual(datos["jugadores"], {"aciertos": 1, "fallos": 1, "tasa_aciertos": 0.5})
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.torneo = crear_torneo(n_equipos=4)
+        generar_fixture(self.torneo)
+        self.otro = crear_torneo("Copa", n_equipos=2)
+        self.usuario = User.objects.create_user("api", password="x")
+        self.client.force_login(self.usuario)
+
+    def test_listado_filtrado(self):
+        resp = self.client.get(reverse("api_partidos"), {"torneo": self.torneo.pk})
+        self.assertEqual(resp.status_code, 200)
+        datos = resp.json()
+        self.assertEqual(len(datos["resultados"]), 6)
+        self.assertEqual(datos["resultados"][0]["torneo"], "Liga")
+        self.assertIsNone(datos["siguiente"])
+        resp = self.client.get(reverse("api_equipos"), {"torneo": self.otro.pk})
+        self.assertEqual([e["jugadores"] for e in resp.json()["resultados"]], [0, 0])
+
+    def test_304_sin_consultas(self):
+        url = reverse("api_partidos")
+        resp = self.client.get(url, {"torneo": self.torneo.pk})
+        etag = resp["ETag"]
+        # sólo sesión + usuario
+        with self.assertNumQueries(2):
+            resp = self.client.get(url, {"torneo": self.torneo.pk}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.content, b"")
+
+        resp = self.client.get(
+            url, {"torneo": self.torneo.pk}, HTTP_IF_MODIFIED_SINCE=resp["Last-Modified"]
+        )
+        self.assertEqual(resp.status_code, 304)
+
+    def test_cambio_en_el_torneo_invalida_el_etag(self):
+        url = reverse("api_partidos")
+        etag = self.client.get(url, {"torneo": self.torneo.pk})["ETag"]
+        etag_otro = self.client.get(url, {"torneo": self.otro.pk})["ETag"]
+
+        partido = Partido.objects.filter(torneo=self.torneo).first()
+        partido.estado = "jugado"
+        partido.marcador1, partido.marcador2 = 1, 0
+        partido.save()
+
+        resp = self.client.get(url, {"torneo": self.torneo.pk}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        resp = self.client.get(url, {"torneo": self.otro.pk}, HTTP_IF_NONE_MATCH=etag_otro)
+        self.assertEqual(resp.status_code, 304)
+
+    def test_gzip(self):
+        resp = self.client.get(reverse("api_jugadores"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(resp.status_code, 200)
+        sembrar(1, 10, 10, prefijo="Gzip")
+        resp = self.client.get(reverse("api_jugadores"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertTrue(resp["ETag"].startswith("W/"))
+
+    def test_solo_lectura(self):
+        self.assertEqual(self.client.post(reverse("api_torneos")).status_code, 405)
+
+
+class ResultadosJornadaTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.torneo = crear_torneo(n_equipos=20)
+        inicio = timezone.make_aware(datetime(2025, 3, 1, 18, 0))
+        generar_fixture(self.torneo, inicio=inicio)
+        self.usuario = User.objects.create_user("planilla", password="x")
+        self.client.force_login(self.usuario)
+        self.url = reverse("partidos_resultados") + f"?torneo={self.torneo.pk}"
+
+    def _datos(self, partidos, m1=2, m2=1):
+        datos = {}
+        for p in partidos:
+            datos[f"marcador1_{p.pk}"] = m1
+            datos[f"marcador2_{p.pk}"] = m2
+        return datos
+
+    def test_planilla_de_la_proxima_jornada(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context["partidos"]), 10)
+        self.assertEqual(resp.context["desde"].isoformat(), "2025-03-01")
+
+    def test_guardar_jornada_en_lote(self):
+        partidos = list(self.client.get(self.url).context["partidos"])
+        # sesión + usuario + torneo + primer pendiente + partidos
+        # + bulk_update + recálculo de la tabla (4) y del Elo (5) + savepoints (6),
+        # sin importar cuántos partidos tenga la jornada
+        with self.assertNumQueries(21):
+            resp = self.client.post(self.url, self._datos(partidos))
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(Partido.objects.filter(estado="jugado").count(), 10)
+        self.assertEqual(Posicion.objects.filter(torneo=self.torneo).count(), 20)
+        self.assertEqual(
+            Posicion.objects.filter(torneo=self.torneo).aggregate(Sum("puntos"))["puntos__sum"], 30
+        )
+        # la planilla pasa a la jornada siguiente
+        self.assertEqual(self.client.get(self.url).context["desde"].isoformat(), "2025-03-08")
+
+    def test_errores_no_guardan_nada(self):
+        partidos = list(self.client.get(self.url).context["partidos"])
+        datos = self._datos(partidos)
+        datos[f"marcador2_{partidos[0].pk}"] = ""
+        datos[f"marcador1_{partidos[1].pk}"] = "x"
+        resp = self.client.post(self.url, datos)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(list(resp.context["messages"])), 2)
+        self.assertFalse(Partido.objects.filter(estado="jugado").exists())
+
+    def test_corregir_resultado(self):
+        partidos = list(self.client.get(self.url).context["partidos"])
+        self.client.post(self.url, self._datos(partidos))
+        self.client.post(
+            self.url + "&desde=2025-03-01", self._datos(partidos, 1, 1)
+        )
+        pos = Posicion.objects.get(equipo=partidos[0].equipo1)
+        self.assertEqual((pos.jugados, pos.empatados, pos.puntos), (1, 1, 1))
+
+
+@override_settings(DB_REINTENTOS=3, DB_REINTENTO_ESPERA_MS=0)
+class ReintentosSqliteTests(TestCase):
+    def _falla(self, veces, mensaje="database is locked"):
+        llamadas = []
+
+        @reintentar_si_bloqueada
+        def escribir():
+            llamadas.append(1)
+            if len(llamadas) <= veces:
+                raise OperationalError(mensaje)
+            return "ok"
+
+        return escribir, llamadas
+
+    def test_reintenta_si_esta_bloqueada(self):
+        escribir, llamadas = self._falla(2)
+        # TestCase envuelve cada test en una transacción: se simula estar fuera
+        with mock.patch("core.sqlite.connection") as conexion:
+            conexion.in_atomic_block = False
+            self.assertEqual(escribir(), "ok")
+        self.assertEqual(len(llamadas), 3)
+
+    def test_se_rinde_tras_los_intentos(self):
+        escribir, llamadas = self._falla(10)
+        with mock.patch("core.sqlite.connection") as conexion:
+            conexion.in_atomic_block = False
+            with self.assertRaises(OperationalError):
+                escribir()
+        self.assertEqual(len(llamadas), 4)
+
+    def test_no_reintenta_otros_errores_ni_dentro_de_una_transaccion(self):
+        escribir, llamadas = self._falla(1, "no such table: x")
+        with self.assertRaises(OperationalError):
+            escribir()
+        escribir, llamadas = self._falla(1)
+        with self.assertRaises(OperationalError):
+            escribir()
+        self.assertEqual(len(llamadas), 1)
+
+    def test_init_command(self):
+        self.assertEqual(
+            init_command({"journal_mode": "WAL", "busy_timeout": 5000}),
+            "PRAGMA journal_mode=WAL;PRAGMA busy_timeout=5000",
+        )
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN es de SQLite")
+class PlanesConsultasTests(PresupuestoConsultasMixin, TestCase):
+    """
+    Corre EXPLAIN QUERY PLAN sobre cada consulta de los listados (HTML y
+    API, con y sin filtros, primera página y siguiente) con datos sembrados
+    y falla si alguna recorre una tabla entera o ordena en un B-tree temporal.
+    """
+    LISTADOS = (
+        "torneos_list", "equipos_list", "jugadores_list", "partidos_list",
+        "api_torneos", "api_equipos", "api_jugadores", "api_partidos",
+    )
+    # Jugadores de un torneo ordenados por nombre: el orden no puede salir de
+    # un índice (el torneo está en otra tabla) y ordenar a lo sumo
+    # max_equipos * max_jugadores_por_equipo filas (los cupos del torneo) es más barato
+    # que recorrer el índice por nombre de todos los jugadores.
+    PERMITIDOS = {("jugadores_list", "torneo"), ("api_jugadores", "torneo")}
+
+    def _variantes(self):
+        torneo = self.torneos[0]
+        equipo = Equipo.objects.filter(torneo=torneo).first()
+        return {
+            "": {},
+            "torneo": {"torneo": torneo.pk},
+            "torneo+equipo": {"torneo": torneo.pk, "equipo": equipo.pk},
+            "equipo": {"equipo": equipo.pk},
+        }
+
+    def test_listados_usan_indices(self):
+        self.client.force_login(self.usuario)
+        fallas = []
+        for nombre in self.LISTADOS:
+            for variante, params in self._variantes().items():
+                cache.clear()
+                url = reverse(nombre)
+                with capturar_consultas() as consultas:
+                    resp = self.client.get(url, params)
+                    # la página siguiente agrega la condición del cursor
+                    if nombre.startswith("api_"):
+                        siguiente = resp.json()["siguiente"]
+                    else:
+                        siguiente = getattr(resp.context.get("page_obj"), "cursor_siguiente", None)
+                    if siguiente:
+                        self.client.get(url, {"cursor": siguiente})
+                self.assertTrue(consultas, f"{nombre} no ejecutó consultas")
+                if (nombre, variante) in self.PERMITIDOS:
+                    continue
+                for sql, sql_params in consultas:
+                    malos = problemas(plan(sql, sql_params))
+                    if malos:
+                        fallas.append(f"{nombre} [{variante}]: {malos}\n  {sql}")
+        self.assertFalse(fallas, "\n".join(fallas))
+
+    def test_detecta_recorridos_y_ordenamientos(self):
+        self.assertEqual(
+            problemas(plan('SELECT * FROM "core_jugador" ORDER BY "email"')),
+            ["SCAN core_jugador", "USE TEMP B-TREE FOR ORDER BY"],
+        )
+
+
+class ProgramacionTests(TestCase):
+    def restricciones(self, **kwargs):
+        datos = {"sedes": ["Cancha 1", "Cancha 2"], "horarios": [time(18), time(20)],
+                 "inicio": date(2025, 3, 1)}
+        datos.update(kwargs)
+        return Restricciones(**datos)
+
+    def test_turnos_unicos_descanso_y_bloqueadas(self):
+        torneo = crear_torneo(n_equipos=8)
+        bloqueadas = {date(2025, 3, 3), date(2025, 3, 4)}
+        r = self.restricciones(bloqueadas=bloqueadas, descanso=3)
+        creados = generar_fixture(torneo, ida_vuelta=True, restricciones=r)
+        self.assertEqual(len(creados), 56)
+
+        turnos = [(p.fecha, p.sede) for p in Partido.objects.filter(torneo=torneo)]
+        self.assertEqual(len(turnos), len(set(turnos)))
+        self.assertTrue(all(sede in r.sedes for _, sede in turnos))
+        fechas = defaultdict(list)
+        for p in Partido.objects.filter(torneo=torneo):
+            dia = timezone.localtime(p.fecha).date()
+            self.assertNotIn(dia, bloqueadas)
+            self.assertIn(timezone.localtime(p.fecha).time(), r.horarios)
+            fechas[p.equipo1_id].append(dia)
+            fechas[p.equipo2_id].append(dia)
+        for dias in fechas.values():
+            dias.sort()
+            self.assertTrue(all((b - a).days >= 3 for a, b in zip(dias, dias[1:])))
+
+    def test_respeta_turnos_ocupados_por_otros_torneos(self):
+        otro = crear_torneo("Otra liga", n_equipos=2)
+        generar_fixture(otro, restricciones=self.restricciones(sedes=["Cancha 1"], horarios=[time(18)]))
+        tomado = Partido.objects.get(torneo=otro)
+
+        torneo = crear_torneo(n_equipos=4)
+        generar_fixture(torneo, restricciones=self.restricciones(sedes=["Cancha 1"], horarios=[time(18)]))
+        self.assertFalse(
+            Partido.objects.filter(torneo=torneo, fecha=tomado.fecha, sede=tomado.sede).exists()
+        )
+
+    def test_imposible_no_crea_nada(self):
+        torneo = crear_torneo(n_equipos=6)
+        r = self.restricciones(sedes=["Cancha 1"], horarios=[time(18)], fin=date(2025, 3, 5))
+        with self.assertRaises(ValidationError) as ctx:
+            generar_fixture(torneo, restricciones=r)
+        self.assertIn("sin turno", " ".join(ctx.exception.messages))
+        self.assertEqual(Partido.objects.filter(torneo=torneo).count(), 0)
+
+    def test_incompleta_informa_sin_apilar_turnos(self):
+        parejas = [(a, b) for a in range(6) for b in range(a + 1, 6)]
+        r = self.restricciones(sedes=["A"], horarios=[time(18)], fin=date(2025, 3, 7))
+        programacion = programar(parejas, r)
+        self.assertFalse(programacion.completa)
+        self.assertIn("no alcanzan para 15 partidos", programacion.problemas[0])
+        self.assertEqual(len(programacion.asignados) + len(programacion.sin_asignar), 15)
+        turnos = [(momento, sede) for _, _, momento, sede in programacion.asignados]
+        self.assertEqual(len(turnos), len(set(turnos)))
+
+    def test_vista_generar_con_sedes(self):
+        torneo = crear_torneo(n_equipos=4)
+        self.client.force_login(User.objects.create_user("admin", password="x"))
+        url = reverse("partidos_generar")
+        resp = self.client.get(url, {"torneo": torneo.id, "horarios": "25:00", "sedes": "A"})
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(Partido.objects.filter(torneo=torneo).count(), 0)
+
+        resp = self.client.get(url, {
+            "torneo": torneo.id, "inicio": "2025-03-01", "sedes": "A, B", "horarios": "18:00",
+            "descanso": "1", "dias": "5,6",
+        })
+        self.assertEqual(resp.status_code, 302)
+        trabajos.procesar("test")
+        partidos = Partido.objects.filter(torneo=torneo)
+        self.assertEqual(partidos.count(), 6)
+        self.assertEqual({p.sede for p in partidos}, {"A", "B"})
+        self.assertTrue(all(timezone.localtime(p.fecha).weekday() in (5, 6) for p in partidos))
+
+
+class EliminacionTests(TestCase):
+    def llave(self, n_equipos):
+        torneo = crear_torneo(n_equipos=n_equipos)
+        equipos = list(Equipo.objects.filter(torneo=torneo).order_by("id"))
+        return torneo, equipos, generar_llave(torneo, equipos)
+
+    def test_orden_siembra(self):
+        self.assertEqual(orden_siembra(8), [1, 8, 4, 5, 2, 7, 3, 6])
+        self.assertEqual(sorted(orden_siembra(64)), list(range(1, 65)))
+
+    def test_byes_para_los_mejores_sembrados(self):
+        torneo, equipos, creados = self.llave(6)
+        # 8 lugares, 2 byes: un partido menos por bye
+        self.assertEqual(len(creados), 5)
+        primera = Partido.objects.filter(torneo=torneo, ronda=1)
+        self.assertEqual(primera.count(), 2)
+        self.assertFalse(primera.filter(equipo1__in=equipos[:2]).exists())
+        semis = Partido.objects.filter(torneo=torneo, ronda=2).order_by("llave")
+        self.assertEqual([s.equipo1_id for s in semis], [equipos[0].id, equipos[1].id])
+        self.assertEqual([s.equipo2_id for s in semis], [None, None])
+        final = Partido.objects.get(torneo=torneo, ronda=3)
+        self.assertEqual({s.siguiente_id for s in semis}, {final.id})
+
+    def test_llave_grande_por_lotes(self):
+        torneo = crear_torneo(n_equipos=200)
+        equipos = list(Equipo.objects.filter(torneo=torneo).order_by("id"))
+        # existencia previa + savepoint + un lote por ronda (la primera en 2)
+        with self.assertNumQueries(11):
+            creados = generar_llave(torneo, equipos)
+        self.assertEqual(len(creados), 199)
+        self.assertEqual(Partido.objects.filter(torneo=torneo, ronda=8).count(), 1)
+        with self.assertRaises(ValidationError):
+            generar_llave(torneo, equipos)
+
+    def test_ganador_avanza_al_siguiente(self):
+        torneo, equipos, _ = self.llave(4)
+        semi = Partido.objects.get(torneo=torneo, ronda=1, llave=2)
+        self.client.force_login(User.objects.create_user("admin", password="x"))
+        url = reverse("partido_set_resultado", args=[semi.pk])
+        # el pase al siguiente es un único UPDATE (la 14, después del Elo), sin leer la llave
+        with self.assertNumQueries(15):
+            self.client.post(url, {"marcador1": 0, "marcador2": 2})
+        final = Partido.objects.get(torneo=torneo, ronda=2)
+        self.assertEqual(final.equipo2_id, semi.equipo2_id)
+        self.assertIsNone(final.equipo1_id)
+        # la llave no suma puntos en la tabla
+        self.assertFalse(Posicion.objects.filter(torneo=torneo, jugados__gt=0).exists())
+
+        # corrige el resultado antes de jugar la final: cambia el clasificado
+        self.client.post(url, {"marcador1": 3, "marcador2": 1})
+        final.refresh_from_db()
+        self.assertEqual(final.equipo2_id, semi.equipo1_id)
+
+    def test_editar_semifinal_con_la_final_jugada(self):
+        torneo, _, _ = self.llave(4)
+        self.client.force_login(User.objects.create_user("admin", password="x"))
+        for semi in Partido.objects.filter(torneo=torneo, ronda=1):
+            self.client.post(reverse("partido_set_resultado", args=[semi.pk]), {"marcador1": 2, "marcador2": 0})
+        final = Partido.objects.get(torneo=torneo, ronda=2)
+        self.client.post(reverse("partido_set_resultado", args=[final.pk]), {"marcador1": 1, "marcador2": 0})
+
+        # dar vuelta la semifinal cambiaría un finalista que ya jugó: error en el formulario, no un 500
+        semi = Partido.objects.get(torneo=torneo, ronda=1, llave=1)
+        resp = self.client.post(reverse("partido_update", args=[semi.pk]), {
+            "torneo": torneo.pk, "equipo1": semi.equipo1_id, "equipo2": semi.equipo2_id,
+            "estado": "jugado", "marcador1": 0, "marcador2": 2,
+        })
+        self.assertContains(resp, "ya se jugó con otro equipo")
+        semi.refresh_from_db()
+        self.assertEqual((semi.marcador1, semi.marcador2), (2, 0))
+
+    def test_empate_no_se_guarda(self):
+        torneo, _, _ = self.llave(2)
+        final = Partido.objects.get(torneo=torneo)
+        final.marcador1 = final.marcador2 = 1
+        final.estado = "jugado"
+        with self.assertRaises(ValidationError):
+            final.save()
+
+    def test_siembra_por_posiciones_y_manual(self):
+        torneo = crear_torneo(n_equipos=4)
+        a, b, c, d = Equipo.objects.filter(torneo=torneo).order_by("id")
+        Partido.objects.create(torneo=torneo, equipo1=d, equipo2=a, marcador1=2, marcador2=0, estado="jugado")
+        self.assertEqual(sembrar_equipos(torneo, cantidad=2)[0], d)
+        self.assertEqual(sembrar_equipos(torneo, orden=[c.id, b.id]), [c, b])
+        with self.assertRaises(ValidationError):
+            sembrar_equipos(torneo, orden=[c.id, 9999])
+
+    def test_vista_generar(self):
+        torneo = crear_torneo(n_equipos=5)
+        self.client.force_login(User.objects.create_user("admin", password="x"))
+        resp = self.client.get(reverse("torneo_llave_generar", args=[torneo.pk]), {"cantidad": "4"})
+        self.assertRedirects(resp, reverse("torneo_llave", args=[torneo.pk]))
+        self.assertEqual(Partido.objects.filter(torneo=torneo).count(), 3)
+        resp = self.client.get(reverse("torneo_llave", args=[torneo.pk]))
+        self.assertContains(resp, "Semifinal")
+        self.assertContains(resp, "Por definir")
+
+
+class EventosTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.torneo = crear_torneo(n_equipos=2)
+        self.usuario = User.objects.create_user("admin", password="x")
+        self.backend = eventos.MemoriaBackend()
+        parche = mock.patch("core.eventos._backend", self.backend)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    async def test_suscripcion_retoma_y_recibe_de_otro_hilo(self):
+        primero = self.backend.publicar(1, "resultado", {"n": 1})
+        self.backend.publicar(1, "resultado", {"n": 2})
+        self.backend.publicar(2, "resultado", {"otro": True})
+
+        flujo = self.backend.suscribir(1, primero.id, latido=0.05)
+        self.assertEqual((await anext(flujo)).datos, {"n": 2})
+        self.assertIsNone(await anext(flujo))  # latido
+        # publicar() se llama desde las vistas sincrónicas, en otro hilo
+        await asyncio.to_thread(self.backend.publicar, 1, "resultado", {"n": 3})
+        self.assertEqual((await anext(flujo)).datos, {"n": 3})
+        await flujo.aclose()
+        self.assertFalse(self.backend._suscriptores)
+
+    @override_settings(EVENTOS_INTERVALO_S=0.01)
+    async def test_backend_en_cache_para_varios_procesos(self):
+        # dos instancias = dos procesos que comparten la caché
+        publicador, lector = eventos.CacheBackend(), eventos.CacheBackend()
+        viejo = await asyncio.to_thread(publicador.publicar, 1, "resultado", {"n": 1})
+        flujo = lector.suscribir(1, viejo.id - 1, latido=1)
+        self.assertEqual((await anext(flujo)).id, viejo.id)
+        nuevo = await asyncio.to_thread(publicador.publicar, 1, "resultado", {"n": 2})
+        self.assertEqual(await anext(flujo), nuevo)
+        await flujo.aclose()
+
+    async def test_endpoint_sse(self):
+        evento = await asyncio.to_thread(self.backend.publicar, self.torneo.pk, "resultado", {"partido": 7})
+        await self.async_client.aforce_login(self.usuario)
+        url = reverse("torneo_eventos", args=[self.torneo.pk])
+
+        resp = await self.async_client.get(url, headers={"Last-Event-ID": str(evento.id - 1)})
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        contenido = resp.streaming_content
+        self.assertTrue((await anext(contenido)).startswith(b"retry:"))
+        self.assertEqual(
+            await anext(contenido),
+            f'id: {evento.id}\nevent: resultado\ndata: {{"partido":7}}\n\n'.encode(),
+        )
+        await contenido.aclose()
+
+        resp = await self.async_client.get(reverse("torneo_eventos", args=[9999]))
+        self.assertEqual(resp.status_code, 404)
+
+    def test_resultado_publica_al_confirmar(self):
+        p = Partido.objects.create(torneo=self.torneo, equipo1=self.torneo.equipos.first(),
+                                   equipo2=self.torneo.equipos.last())
+        self.client.force_login(self.usuario)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("partido_set_resultado", args=[p.pk]), {"marcador1": 2, "marcador2": 1})
+        guardados = list(self.backend._historial[self.torneo.pk])
+        self.assertEqual(len(guardados), 1)
+        self.assertEqual(guardados[0].datos["marcador1"], 2)
+        self.assertEqual(guardados[0].datos["estado"], "jugado")
+
+        # bajo WSGI se mandan los pendientes y se cierra (EventSource reconecta)
+        resp = self.client.get(reverse("torneo_eventos", args=[self.torneo.pk]))
+        cuerpo = b"".join(resp.streaming_content).decode()
+        self.assertIn(f"id: {guardados[0].id}", cuerpo)
+
+
+class BusquedaTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.torneo = Torneo.objects.create(nombre="Copa Andina", fecha_inicio="2025-01-01", ubicacion="Bogotá")
+        self.equipo = Equipo.objects.create(torneo=self.torneo, nombre="Atlético Nacional")
+        Jugador.objects.bulk_create([
+            Jugador(equipo=self.equipo, nombre="José Martínez", email="jmartinez@club.co"),
+            Jugador(equipo=self.equipo, nombre="María José Peña"),
+            Jugador(equipo=self.equipo, nombre="Pedro Gómez"),
+        ])
+
+    def nombres(self, texto, tipo=None):
+        return [obj.nombre for _, obj in busqueda.buscar(texto, tipo)]
+
+    def test_prefijo_y_sin_acentos(self):
+        self.assertEqual(self.nombres("atletico"), ["Atlético Nacional"])
+        self.assertEqual(sorted(self.nombres("jose")), ["José Martínez", "María José Peña"])
+        self.assertEqual(self.nombres("mart"), ["José Martínez"])
+        self.assertEqual(self.nombres("bogota"), ["Copa Andina"])
+        self.assertEqual(self.nombres("jmartinez"), ["José Martínez"])
+        self.assertEqual(self.nombres('jose" OR pedro'), [])  # sin sintaxis FTS del usuario
+
+    def test_ranking_y_tipo(self):
+        Torneo.objects.create(nombre="Liga", fecha_inicio="2025-01-01", descripcion="Cierre en Nacional")
+        # coincidencia en el nombre antes que en la descripción
+        self.assertEqual(self.nombres("nacional"), ["Atlético Nacional", "Liga"])
+        self.assertEqual(self.nombres("nacional", "torneo"), ["Liga"])
+
+    def test_triggers_y_reconstruccion(self):
+        self.equipo.nombre = "Deportivo Cali"
+        self.equipo.save()
+        self.assertEqual(self.nombres("atletico"), [])
+        self.assertEqual(self.nombres("cali"), ["Deportivo Cali"])
+        self.equipo.delete()  # borra también sus jugadores
+        self.assertEqual(self.nombres("jose"), [])
+
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM core_busqueda")
+        self.assertEqual(self.nombres("copa"), [])
+        out = io.StringIO()
+        call_command("rebuild_busqueda", stdout=out)
+        self.assertIn("1 filas", out.getvalue())
+        self.assertEqual(self.nombres("copa"), ["Copa Andina"])
+
+    def test_vistas(self):
+        self.client.force_login(User.objects.create_user("admin", password="x"))
+        resp = self.client.get(reverse("buscar"), {"q": "pena"})
+        self.assertContains(resp, "María José Peña")
+        resp = self.client.get(reverse("torneos_list"), {"q": "andina"})
+        self.assertEqual([t.nombre for t in resp.context["torneos"]], ["Copa Andina"])
+        resp = self.client.get(reverse("api_torneos"), {"q": "bogota"})
+        self.assertEqual(resp.json()["resultados"][0]["nombre"], "Copa Andina")
+
+
+class EstadisticasTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.torneo = crear_torneo(n_equipos=2)
+        self.local, self.visita = Equipo.objects.order_by("id")
+        self.ana = Jugador.objects.create(equipo=self.local, nombre="Ana")
+        self.eva = Jugador.objects.create(equipo=self.local, nombre="Eva")
+        self.ines = Jugador.objects.create(equipo=self.visita, nombre="Inés")
+        self.partido = Partido.objects.create(torneo=self.torneo, equipo1=self.local, equipo2=self.visita)
+
+    def evento(self, jugador, tipo, partido=None):
+        return EventoPartido.objects.create(partido=partido or self.partido, jugador=jugador, tipo=tipo)
+
+    def fila(self, jugador):
+        return EstadisticaJugador.objects.get(torneo=self.torneo, jugador=jugador)
+
+    def test_incremental_igual_a_recalcular(self):
+        gol = self.evento(self.ana, "gol")
+        self.evento(self.ana, "gol")
+        self.evento(self.eva, "asistencia")
+        self.evento(self.ines, "amarilla")
+        roja = self.evento(self.ines, "amarilla")
+        roja.tipo = "roja"
+        roja.save()
+        otro = Partido.objects.create(torneo=self.torneo, equipo1=self.visita, equipo2=self.local)
+        self.evento(self.ana, "cambio", otro)
+        gol.delete()
+
+        ana = self.fila(self.ana)
+        self.assertEqual((ana.goles, ana.partidos), (1, 2))
+        ines = self.fila(self.ines)
+        self.assertEqual((ines.amarillas, ines.rojas, ines.partidos), (1, 1, 1))
+        incremental = sorted(EstadisticaJugador.objects.values_list(
+            "jugador_id", "goles", "asistencias", "amarillas", "rojas", "partidos"
+        ))
+        call_command("rebuild_estadisticas", stdout=io.StringIO())
+        self.assertEqual(sorted(EstadisticaJugador.objects.values_list(
+            "jugador_id", "goles", "asistencias", "amarillas", "rojas", "partidos"
+        )), incremental)
+
+        otro.delete()  # sus eventos se borran en cascada
+        self.assertEqual(self.fila(self.ana).partidos, 1)
+
+    def test_jugador_de_otro_equipo(self):
+        ajeno = crear_torneo("Otra", n_equipos=1).equipos.get()
+        intruso = Jugador.objects.create(equipo=ajeno, nombre="Intruso")
+        with self.assertRaises(ValidationError):
+            self.evento(intruso, "gol")
+
+    def test_marcador_desde_goles_y_lideres(self):
+        self.client.force_login(User.objects.create_user("admin", password="x"))
+        url = reverse("partido_eventos", args=[self.partido.pk])
+        for jugador, tipo in ((self.ana, "gol"), (self.eva, "gol"), (self.ines, "autogol"), (self.ines, "gol")):
+            resp = self.client.post(url, {"jugador": jugador.pk, "tipo": tipo, "minuto": 10})
+            self.assertRedirects(resp, url)
+        self.partido.refresh_from_db()
+        self.assertEqual((self.partido.marcador1, self.partido.marcador2), (3, 1))
+
+        ultimo = EventoPartido.objects.filter(tipo="gol", jugador=self.ines).get()
+        self.client.post(reverse("evento_delete", args=[ultimo.pk]))
+        self.partido.refresh_from_db()
+        self.assertEqual(self.partido.marcador2, 0)
+
+        resp = self.client.get(reverse("torneo_estadisticas", args=[self.torneo.pk]), {"tabla": "goleadores"})
+        self.assertEqual([e.jugador.nombre for e in resp.context["filas"]], ["Ana", "Eva"])
+
+        # el top N sale del índice: sin recorrer la tabla ni ordenar aparte
+        for tabla in estadisticas.TABLAS:
+            sql, params = estadisticas.lideres(self.torneo.pk, tabla).query.sql_with_params()
+            self.assertEqual(problemas(plan(sql, params)), [], tabla)
+
+
+@override_settings(SIMULACION_SIMULACIONES=2000, SIMULACION_SIMULACIONES_SIN_NUMPY=500)
+class SimulacionTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.torneo = crear_torneo(n_equipos=4)
+        self.a, self.b, self.c, self.d = Equipo.objects.order_by("id")
+        for e1, e2, m1, m2 in ((self.a, self.b, 2, 0), (self.c, self.d, 1, 1), (self.a, self.c, 1, 0)):
+            Partido.objects.create(
+                torneo=self.torneo, equipo1=e1, equipo2=e2, estado="jugado", marcador1=m1, marcador2=m2
+            )
+
+    def test_sin_pendientes_es_la_tabla_actual(self):
+        liga = cargar_liga(self.torneo.pk)
+        self.assertEqual(liga.equipo1, ())
+        motores = ["python"] + (["numpy"] if montecarlo.np is not None else [])
+        for motor in motores:
+            conteos = montecarlo.simular(liga, 50, motor=motor)
+            conteos.update(equipos=list(liga.equipos), puntos_actuales=list(liga.puntos))
+            filas = probabilidades(conteos, descensos=1)
+            # A 6, D 1, C 1 (desempata la diferencia de gol), B 0
+            self.assertEqual([f["equipo"] for f in filas], ["Equipo 00", "Equipo 03", "Equipo 02", "Equipo 01"])
+            self.assertEqual([(f["campeon"], f["descenso"]) for f in filas],
+                             [(1.0, 0.0), (0.0, 0.0), (0.0, 0.0), (0.0, 1.0)])
+
+    def test_probabilidades_y_procesos(self):
+        Partido.objects.create(torneo=self.torneo, equipo1=self.b, equipo2=self.d)
+        Partido.objects.create(torneo=self.torneo, equipo1=self.c, equipo2=self.b)
+        liga = cargar_liga(self.torneo.pk)
+        uno = montecarlo.simular(liga, 400, semilla=7, motor="python")
+        dos = montecarlo.simular(liga, 400, semilla=7, procesos=2, motor="python")
+        self.assertEqual(dos, montecarlo.simular(liga, 400, semilla=7, procesos=2, motor="python"))
+        for conteos in (uno, dos):
+            self.assertEqual(conteos["simulaciones"], 400)
+            # cada simulación reparte un equipo por puesto
+            self.assertTrue(all(sum(fila) == 400 for fila in conteos["posiciones"]))
+            self.assertTrue(all(sum(columna) == 400 for columna in zip(*conteos["posiciones"])))
+        # a A (6 puntos) sólo puede alcanzarlo B, que juega los dos partidos
+        self.assertEqual(sum(uno["posiciones"][0][:2]), 400)
+
+    def test_vista_cacheada_y_comando(self):
+        Partido.objects.create(torneo=self.torneo, equipo1=self.b, equipo2=self.d)
+        self.client.force_login(User.objects.create_user("admin", password="x"))
+        url = reverse("torneo_simulacion", args=[self.torneo.pk])
+        resp = self.client.get(url, {"descensos": "1"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context["filas"]), 4)
+        self.assertEqual(resp.context["conteos"]["pendientes"], 1)
+        self.assertAlmostEqual(sum(f["campeon"] for f in resp.context["filas"]), 1.0)
+
+        # la segunda vez sale de la caché; un resultado nuevo la invalida
+        conteos = simular_torneo(self.torneo)
+        with self.assertNumQueries(0):
+            self.assertEqual(simular_torneo(self.torneo), conteos)
+        Partido.objects.filter(estado="pendiente").get().delete()
+        self.assertEqual(simular_torneo(self.torneo)["pendientes"], 0)
+
+        salida = io.StringIO()
+        call_command("simular_torneo", self.torneo.pk, "--simulaciones", "100", "--motor", "python", stdout=salida)
+        self.assertIn("100 simulaciones", salida.getvalue())
+        self.assertIn("sim/s", salida.getvalue())
+
+    @override_settings(SIMULACION_SIMULACIONES_SIN_NUMPY=300, SIMULACION_UMBRAL_PROCESOS=1)
+    def test_vista_acota_simulaciones_y_no_usa_procesos(self):
+        Partido.objects.create(torneo=self.torneo, equipo1=self.b, equipo2=self.d)
+        url = reverse("torneo_simulacion", args=[self.torneo.pk])
+        usuario = User.objects.create_user("admin", password="x")
+        self.client.force_login(usuario)
+        with mock.patch("core.montecarlo.ProcessPoolExecutor") as pool:
+            # ?n sólo para staff
+            resp = self.client.get(url, {"n": "1000000"})
+            self.assertEqual(resp.context["conteos"]["simulaciones"], simular_torneo(self.torneo)["simulaciones"])
+            usuario.is_staff = True
+            usuario.save()
+            self.assertEqual(simular_torneo(self.torneo, 10**9, motor="python")["simulaciones"], 300)
+            resp = self.client.get(url, {"n": "150"})
+            self.assertEqual(resp.context["conteos"]["simulaciones"], 150)
+        pool.assert_not_called()
+
+    @skipUnless(montecarlo.np is not None, "NumPy no está instalado")
+    def test_motores_numpy_y_python_coinciden(self):
+        Partido.objects.create(torneo=self.torneo, equipo1=self.b, equipo2=self.d)
+        Partido.objects.create(torneo=self.torneo, equipo1=self.c, equipo2=self.b)
+        liga = cargar_liga(self.torneo.pk)
+        n = 20_000
+        numpy_ = montecarlo.simular(liga, n, semilla=3, motor="numpy")
+        python = montecarlo.simular(liga, n, semilla=3, motor="python")
+        self.assertEqual(numpy_["simulaciones"], python["simulaciones"])
+        # mismo modelo, distinto generador: las frecuencias coinciden dentro del error de muestreo
+        for fila_numpy, fila_python in zip(numpy_["posiciones"], python["posiciones"]):
+            for a, b in zip(fila_numpy, fila_python):
+                self.assertAlmostEqual(a / n, b / n, delta=0.02)
+        for a, b in zip(numpy_["puntos"], python["puntos"]):
+            self.assertAlmostEqual(a / n, b / n, delta=0.1)
+
+
+class EloTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.torneo = crear_torneo(n_equipos=3)
+        self.a, self.b, self.c = Equipo.objects.order_by("id")
+
+    def jugar(self, e1, e2, m1, m2, dia):
+        return Partido.objects.create(
+            torneo=self.torneo, equipo1=e1, equipo2=e2, estado="jugado", marcador1=m1, marcador2=m2,
+            fecha=timezone.make_aware(datetime(2025, 1, dia)),
+        )
+
+    def elos(self):
+        return [round(e, 6) for e in Equipo.objects.order_by("id").values_list("elo", flat=True)]
+
+    def test_incremental_igual_a_recalcular(self):
+        p = self.jugar(self.a, self.b, 1, 0, 1)
+        self.assertEqual(self.elos(), [1510.0, 1490.0, 1500.0])
+        self.jugar(self.b, self.c, 3, 0, 2)
+        self.jugar(self.c, self.a, 1, 1, 3)
+        incremental = self.elos()
+        self.assertAlmostEqual(sum(incremental), 4500.0)
+        salida = io.StringIO()
+        call_command("rebuild_elo", stdout=salida)
+        self.assertIn("3 partidos", salida.getvalue())
+        self.assertEqual(self.elos(), incremental)
+
+        # borrar un partido revierte exactamente su cambio
+        ultimo = Partido.objects.get(equipo1=self.c, equipo2=self.a)
+        cambio = ultimo.historial_elo.cambio
+        ultimo.delete()
+        self.assertAlmostEqual(Equipo.objects.get(pk=self.a.pk).elo, incremental[0] + cambio, places=4)
+        self.assertEqual(HistorialElo.objects.count(), 2)
+
+        # corregir un resultado viejo: aproximado en el acto, exacto con el recálculo
+        p.marcador1 = 0
+        p.save()
+        aproximado = self.elos()
+        elo.recalcular_elo(self.torneo.pk)
+        self.assertNotEqual(self.elos(), aproximado)
+        self.assertAlmostEqual(sum(self.elos()), 4500.0)
+
+        # editar el equipo con una instancia vieja no pisa el rating
+        actual = Equipo.objects.get(pk=self.b.pk).elo
+        self.assertNotEqual(actual, self.b.elo)
+        self.b.nombre = "Renombrado"
+        self.b.save()
+        self.assertEqual(Equipo.objects.get(pk=self.b.pk).elo, actual)
+
+    def test_recalcular_en_una_pasada(self):
+        for dia in range(1, 11):
+            self.jugar(self.a, self.b, dia % 3, 1, dia)
+        # lectura en una sola consulta ordenada por el índice (torneo, fecha)
+        with capturar_consultas() as consultas:
+            self.assertEqual(elo.recalcular_elo(self.torneo.pk), 10)
+        lecturas = [(sql, params) for sql, params in consultas if "ORDER BY" in sql]
+        self.assertEqual(len(lecturas), 1)
+        self.assertEqual(problemas(plan(*lecturas[0])), [])
+        self.assertEqual(HistorialElo.objects.filter(partido__torneo=self.torneo).count(), 10)
+
+        # la siembra por Elo ordena por rating
+        sembrados = sembrar_equipos(self.torneo, por_elo=True)
+        self.assertEqual([e.pk for e in sembrados], list(
+            Equipo.objects.filter(torneo=self.torneo).order_by("-elo", "nombre").values_list("pk", flat=True)
+        ))
+
+
+class BorradoTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.torneo = crear_torneo("Copa", n_equipos=4)
+        self.equipos = list(Equipo.objects.filter(torneo=self.torneo).order_by("id"))
+        for equipo in self.equipos:
+            cupos.reservar_jugadores(equipo.pk, 3)
+            Jugador.objects.bulk_create([Jugador(equipo=equipo, nombre=f"{equipo.nombre} J{i}") for i in range(3)])
+        a, b, c, d = self.equipos
+        generar_fixture(self.torneo)
+        for p in Partido.objects.filter(torneo=self.torneo)[:4]:
+            p.estado, p.marcador1, p.marcador2 = "jugado", 2, 1
+            p.save()
+            EventoPartido.objects.create(partido=p, jugador=p.equipo1.jugadores.first(), tipo="gol")
+        # la llave: el partido de la final apunta desde las semifinales
+        generar_llave(self.torneo, self.equipos)
+        self.otro = crear_torneo("Otro", n_equipos=2)
+
+    def filas(self, torneo):
+        return (
+            Equipo.objects.filter(torneo=torneo).count(),
+            Jugador.objects.filter(equipo__torneo=torneo).count(),
+            Partido.objects.filter(torneo=torneo).count(),
+            EventoPartido.objects.filter(partido__torneo=torneo).count(),
+        )
+
+    def test_borrar_torneo_en_lotes_sin_cargar_filas(self):
+        equipos, jugadores, partidos, eventos_ = self.filas(self.torneo)
+        self.assertEqual(borrado.dependientes_torneo(self.torneo), {
+            "equipos": equipos, "jugadores": jugadores, "partidos": partidos, "eventos": eventos_,
+        })
+        otro = self.filas(self.otro)
+        self.client.force_login(User.objects.create_user("admin", password="x"))
+        url = reverse("torneo_delete", args=[self.torneo.pk])
+        self.assertContains(self.client.get(url), f"{partidos} partidos")
+
+        with capturar_consultas() as consultas:
+            borradas = borrado.borrar_torneo(self.torneo, lote=2)
+        # sólo DELETE (y el UPDATE de los `siguiente`): ni un SELECT de filas dependientes
+        self.assertEqual(consultas, [])
+        self.assertEqual(borradas["partidos"], partidos)
+        self.assertFalse(Torneo.objects.filter(pk=self.torneo.pk).exists())
+        self.assertEqual(self.filas(self.torneo), (0, 0, 0, 0))
+        for modelo in (Posicion, EstadisticaJugador, HistorialElo):
+            self.assertFalse(modelo.objects.exists(), modelo.__name__)
+        self.assertEqual(self.filas(self.otro), otro)
+        # los triggers sacan las filas del índice de búsqueda
+        self.assertEqual(busqueda.buscar("copa"), [])
+
+    def test_borrar_equipo_como_delete(self):
+        a = self.equipos[0]
+        dependientes = borrado.dependientes_equipo(a)
+        self.assertEqual(dependientes["jugadores"], 3)
+        self.client.force_login(User.objects.create_user("admin", password="x"))
+        resp = self.client.post(reverse("equipo_delete", args=[a.pk]))
+        self.assertRedirects(resp, reverse("equipos_list") + f"?torneo={self.torneo.pk}", fetch_redirect_response=False)
+
+        self.assertFalse(Equipo.objects.filter(pk=a.pk).exists())
+        self.assertFalse(Partido.objects.filter(Q(equipo1=a) | Q(equipo2=a)).exists())
+        self.torneo.refresh_from_db()
+        self.assertEqual(self.torneo.equipos_count, 3)
+        # la tabla, las estadísticas y el Elo quedan como tras recalcular
+        tabla = sorted(Posicion.objects.filter(torneo=self.torneo).values_list("equipo_id", "jugados", "puntos"))
+        recalcular_posiciones(self.torneo.pk)
+        self.assertEqual(
+            sorted(Posicion.objects.filter(torneo=self.torneo).values_list("equipo_id", "jugados", "puntos")), tabla
+        )
+        self.assertFalse(EstadisticaJugador.objects.filter(jugador__equipo=a).exists())
+        self.assertEqual(
+            HistorialElo.objects.filter(partido__torneo=self.torneo).count(),
+            Partido.objects.filter(torneo=self.torneo, estado="jugado").count(),
+        )
+
+
+class TrabajosTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.torneo = crear_torneo(n_equipos=4)
+        self.client.force_login(User.objects.create_user("admin", password="x"))
+
+    def test_reclamar_es_exclusivo_y_vence(self):
+        primero = trabajos.encolar("recalcular", torneo=self.torneo.pk)
+        segundo = trabajos.encolar("recalcular")
+        self.assertEqual(trabajos.reclamar("a").pk, primero.pk)
+        self.assertEqual(trabajos.reclamar("b").pk, segundo.pk)
+        self.assertIsNone(trabajos.reclamar("c"))
+
+        # el trabajador "a" dejó de responder: al vencer el arriendo lo toma otro
+        Job.objects.filter(pk=primero.pk).update(vence=timezone.now() - timedelta(seconds=1))
+        job = trabajos.reclamar("c")
+        self.assertEqual((job.pk, job.intentos, job.trabajador), (primero.pk, 2, "c"))
+        # "a" ya no puede escribir sobre él
+        primero.refresh_from_db()
+        primero.trabajador = "a"
+        trabajos.ejecutar(primero)
+        self.assertEqual(Job.objects.get(pk=primero.pk).estado, "en_curso")
+        trabajos.ejecutar(job)
+        self.assertEqual(Job.objects.get(pk=primero.pk).estado, "terminado")
+
+        with override_settings(TRABAJOS_MAX_INTENTOS=1):
+            Job.objects.filter(pk=segundo.pk).update(vence=timezone.now() - timedelta(seconds=1))
+            self.assertIsNone(trabajos.reclamar("d"))
+        self.assertEqual(Job.objects.get(pk=segundo.pk).estado, "error")
+
+    def test_borrar_torneo_en_segundo_plano_con_avance(self):
+        resp = self.client.post(reverse("torneo_delete", args=[self.torneo.pk]))
+        job = Job.objects.get()
+        self.assertRedirects(resp, reverse("trabajo_detail", args=[job.pk]), fetch_redirect_response=False)
+        self.assertContains(self.client.get(resp.url), "En cola")
+        estado = self.client.get(reverse("trabajo_estado", args=[job.pk])).json()
+        self.assertEqual((estado["estado"], estado["progreso"]), ("pendiente", None))
+
+        salida = io.StringIO()
+        call_command("run_worker", "--una-vez", "--hilos", "1", stdout=salida)
+        self.assertIn("Trabajos ejecutados: 1", salida.getvalue())
+        self.assertFalse(Torneo.objects.filter(pk=self.torneo.pk).exists())
+        estado = self.client.get(reverse("trabajo_estado", args=[job.pk])).json()
+        self.assertEqual((estado["estado"], estado["progreso"], estado["hechos"]), ("terminado", 100, 8))
+        self.assertIn("4 equipos", estado["resultado"]["mensaje"])
+
+    def test_error_queda_en_el_trabajo(self):
+        job = trabajos.encolar("generar_fixture", torneo=crear_torneo("Solo", n_equipos=1).pk, parametros={})
+        trabajos.procesar("test")
+        job.refresh_from_db()
+        self.assertEqual((job.estado, job.error), ("error", "Se necesitan al menos 2 equipos en el torneo."))
+        self.assertContains(self.client.get(reverse("trabajo_detail", args=[job.pk])), job.error)
+        with self.assertRaises(ValueError):
+            trabajos.encolar("no_existe")
+
+    def test_recalcular_desde_el_torneo(self):
+        url = reverse("torneo_recalcular", args=[self.torneo.pk])
+        self.assertContains(self.client.get(reverse("torneo_detail", args=[self.torneo.pk])), url)
+        self.assertRedirects(self.client.get(url), reverse("torneo_detail", args=[self.torneo.pk]))
+        self.assertFalse(Job.objects.exists())
+        resp = self.client.post(url)
+        job = Job.objects.get()
+        self.assertRedirects(resp, reverse("trabajo_detail", args=[job.pk]))
+        self.assertEqual((job.tipo, job.parametros), ("recalcular", {"torneo": self.torneo.pk}))
+        trabajos.procesar("test")
+        job.refresh_from_db()
+        self.assertEqual(job.estado, "terminado")
+
+    def test_error_inesperado_queda_en_el_log(self):
+        job = trabajos.encolar("recalcular", torneo=self.torneo.pk)
+        with mock.patch("core.cupos.reconciliar", side_effect=ValueError("bug")), \
+                self.assertLogs("core.trabajos", "ERROR") as registro:
+            trabajos.procesar("test")
+        job.refresh_from_db()
+        self.assertEqual((job.estado, job.error), ("error", "Error inesperado: bug"))
+        self.assertIn("Traceback", registro.output[0])
+
+        job = trabajos.encolar("generar_fixture", torneo=self.torneo.pk, parametros={"intervalo": "x"})
+        trabajos.procesar("test")
+        job.refresh_from_db()
+        self.assertEqual(job.error, "Intervalo inválido: 'x'.")
+
+    def test_archivo_subido_fuera_de_la_fila_y_purga(self):
+        directorio = archivos_de_trabajos(self)
+        url = reverse("equipos_importar")
+        archivo = SimpleUploadedFile("plantel.csv", "torneo,equipo\nLiga,Nuevo\n".encode())
+        self.client.post(url, {"archivo": archivo, "formato": "csv"})
+        job = Job.objects.get()
+        # la fila lleva sólo el nombre del archivo guardado
+        self.assertEqual(set(job.parametros), {"archivo", "formato"})
+        self.assertTrue(os.path.exists(os.path.join(directorio, job.parametros["archivo"])))
+        with capturar_consultas() as consultas:
+            self.client.get(reverse("trabajo_estado", args=[job.pk]))
+        self.assertNotIn('"parametros"', consultas[0][0])
+
+        trabajos.procesar("test")
+        self.assertEqual(Job.objects.get().estado, "terminado")
+        self.assertTrue(Equipo.objects.filter(torneo=self.torneo, nombre="Nuevo").exists())
+        self.assertEqual(os.listdir(directorio), [])
+
+        archivo = SimpleUploadedFile("plantel.csv", b"torneo,equipo\nLiga,\xff\xfe\n")
+        self.client.post(url, {"archivo": archivo, "formato": "csv"})
+        trabajos.procesar("test")
+        self.assertEqual(Job.objects.latest("id").error, "El archivo debe estar en UTF-8.")
+
+        self.assertEqual(trabajos.purgar(), 0)
+        Job.objects.filter(pk=job.pk).update(fin=timezone.now() - timedelta(days=31))
+        self.assertEqual(trabajos.purgar(), 1)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_base_bloqueada_vuelve_a_la_cola(self):
+        job = trabajos.encolar("recalcular", torneo=self.torneo.pk)
+        bloqueo = OperationalError("database is locked")
+        with mock.patch("core.cupos.reconciliar", side_effect=bloqueo), \
+                override_settings(TRABAJOS_MAX_INTENTOS=2):
+            with self.assertLogs("core.trabajos", "WARNING"):
+                trabajos.ejecutar(trabajos.reclamar("a"))
+            self.assertEqual(Job.objects.get(pk=job.pk).estado, "pendiente")
+            with self.assertLogs("core.trabajos", "ERROR"):
+                trabajos.ejecutar(trabajos.reclamar("a"))
+        job.refresh_from_db()
+        self.assertEqual((job.estado, job.intentos), ("error", 2))
+
+
+class InstantaneasTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.torneo = crear_torneo("Liga 2025", n_equipos=4)
+        self.equipos = list(Equipo.objects.filter(torneo=self.torneo).order_by("id"))
+        for equipo in self.equipos:
+            cupos.reservar_jugadores(equipo.pk, 3)
+            Jugador.objects.bulk_create(
+                [Jugador(equipo=equipo, nombre=f"{equipo.nombre} J{i}", dorsal=i + 1) for i in range(3)]
+            )
+        generar_fixture(self.torneo)
+        for p in Partido.objects.filter(torneo=self.torneo).order_by("id")[:3]:
+            p.estado, p.marcador1, p.marcador2 = "jugado", 2, 1
+            p.save()
+        generar_llave(self.torneo, self.equipos)
+        self.client.force_login(User.objects.create_user("admin", password="x"))
+
+    def exportar(self):
+        resp = self.client.get(reverse("torneo_instantanea", args=[self.torneo.pk]))
+        self.assertEqual(resp["Content-Type"], "application/gzip")
+        return b"".join(resp.streaming_content)
+
+    def contenido(self, torneo):
+        return (
+            sorted(Equipo.objects.filter(torneo=torneo).values_list("nombre", "jugadores_count", "elo")),
+            sorted(Jugador.objects.filter(equipo__torneo=torneo).values_list("equipo__nombre", "nombre", "dorsal")),
+            sorted(
+                Partido.objects.filter(torneo=torneo).values_list(
+                    "equipo1__nombre", "equipo2__nombre", "fecha", "estado", "marcador1", "ronda", "llave",
+                    "siguiente__ronda", "siguiente__llave", "lado_siguiente",
+                ),
+                key=str,
+            ),
+            sorted(Posicion.objects.filter(torneo=torneo).values_list("equipo__nombre", "puntos", "goles_favor")),
+        )
+
+    def test_exportar_e_importar_ida_y_vuelta(self):
+        datos = self.exportar()
+        cabecera = json.loads(gzip.decompress(datos).splitlines()[0])
+        self.assertEqual(
+            (cabecera["version"], cabecera["equipo"], cabecera["jugador"], cabecera["partido"]),
+            (instantaneas.VERSION, 4, 12, Partido.objects.filter(torneo=self.torneo).count()),
+        )
+
+        avance = []
+        with self.assertNumQueries(31):
+            copia, cantidades = instantaneas.importar_instantanea(
+                io.BytesIO(datos), "Copia", progreso=lambda hechas, total: avance.append((hechas, total))
+            )
+        self.assertEqual(cantidades["jugadores"], 12)
+        self.assertEqual(avance[-1], (cabecera["equipo"] + 12 + cabecera["partido"],) * 2)
+        self.assertEqual(copia.equipos_count, 4)
+        self.assertEqual(self.contenido(copia), self.contenido(self.torneo))
+        self.assertEqual(busqueda.buscar("copia", tipo="torneo"), [("torneo", copia)])
+
+    def test_importar_rechaza_instantaneas_invalidas(self):
+        datos = gzip.decompress(self.exportar()).splitlines(keepends=True)
+        malas = [
+            (b"no es gzip", "gzip"),
+            (gzip.compress(datos[0].replace(b'"version": 1', b'"version": 99')), "Versión"),
+            # sin nombre nuevo choca con el torneo original
+            (gzip.compress(b"".join(datos)), "Ya existe"),
+            # cortada: faltan los partidos que anuncia la cabecera
+            (gzip.compress(b"".join(datos[:-2])), "incompleta"),
+            (gzip.compress(b"".join(datos[:6] + datos[5:])), "repetidos"),
+        ]
+        for contenido, mensaje in malas:
+            nombre = None if mensaje == "Ya existe" else "Otra"
+            with self.subTest(mensaje), self.assertRaisesMessage(ValidationError, mensaje):
+                instantaneas.importar_instantanea(io.BytesIO(contenido), nombre)
+        self.assertEqual(Torneo.objects.count(), 1)
+
+        # desde la vista, en segundo plano: el archivo va al disco, no a la fila
+        directorio = archivos_de_trabajos(self)
+        archivo = SimpleUploadedFile("liga.ndjson.gz", gzip.compress(b"".join(datos)))
+        resp = self.client.post(reverse("torneos_importar"), {"archivo": archivo, "nombre": "Liga B"})
+        self.assertEqual(set(Job.objects.get().parametros), {"archivo", "nombre"})
+        trabajos.procesar("test")
+        job = Job.objects.get()
+        self.assertEqual(os.listdir(directorio), [])
+        self.assertRedirects(resp, reverse("trabajo_detail", args=[job.pk]), fetch_redirect_response=False)
+        nuevo = Torneo.objects.get(nombre="Liga B")
+        self.assertEqual((job.estado, job.progreso), ("terminado", 100))
+        self.assertEqual(job.resultado["volver"], reverse("torneo_detail", args=[nuevo.pk]))
+
+    def test_clonar_temporada_sin_cargar_filas(self):
+        url = reverse("torneo_clonar", args=[self.torneo.pk])
+        resp = self.client.get(url)
+        self.assertContains(resp, 'value="Liga 2026"')
+        self.assertContains(resp, 'value="2026-01-01"')
+
+        with capturar_consultas() as consultas:
+            nuevo, cantidades = instantaneas.clonar_torneo(self.torneo, "Liga 2026", date(2026, 1, 1))
+        # valida el nombre y reconcilia los contadores; no lee ni equipos ni jugadores
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(cantidades, {"equipos": 4, "jugadores": 12})
+        equipos, jugadores, _, _ = self.contenido(nuevo)
+        self.assertEqual(equipos, [(e.nombre, 3, ELO_INICIAL) for e in self.equipos])
+        self.assertEqual(jugadores, self.contenido(self.torneo)[1])
+        self.assertEqual(nuevo.equipos_count, 4)
+        self.assertFalse(Partido.objects.filter(torneo=nuevo).exists())
+
+        resp = self.client.post(url, {"nombre": "Liga 2026", "fecha_inicio": "2026-01-01"})
+        self.assertContains(resp, "Ya existe")
+        resp = self.client.post(url, {"nombre": "Liga 2027", "fecha_inicio": "2027-01-01"})
+        otro = Torneo.objects.get(nombre="Liga 2027")
+        self.assertRedirects(resp, reverse("torneo_detail", args=[otro.pk]), fetch_redirect_response=False)
+        self.assertEqual((otro.equipos_count, Jugador.objects.filter(equipo__torneo=otro).count()), (4, 0))
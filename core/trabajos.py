@@ -0,0 +1,297 @@
+import logging
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
+from django.db import OperationalError
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Job, Torneo
+from .sqlite import bloqueada, reintentar_si_bloqueada
+
+
+# Cola de trabajos en la base (sólo SQLite, sin broker): encolar() inserta
+# una fila y el trabajador (`run_worker`) la toma con un UPDATE condicional
+# sobre su estado. Si dos hilos o procesos eligen el mismo trabajo, sólo al
+# primero le cambia una fila; el otro busca el siguiente. El trabajo queda
+# arrendado hasta `vence`: si el trabajador muere, al vencer lo toma otro.
+# Los archivos subidos no van en los parámetros (JSON en la fila): se
+# guardan con guardar_archivo() en TRABAJOS_DIR_ARCHIVOS y el parámetro
+# "archivo" lleva su nombre; se borran cuando el trabajo termina.
+
+logger = logging.getLogger("core.trabajos")
+
+# tipo -> (función, título). La función recibe el Job y sus parámetros y
+# devuelve un dict serializable con "mensaje" (y opcionalmente "errores" y
+# "volver", la URL a la que conviene ir al terminar).
+TAREAS = {}
+
+# Segundos mínimos entre dos escrituras del avance de un mismo trabajo
+INTERVALO_AVANCE_S = 0.5
+
+
+def tarea(tipo, titulo):
+    def registrar(funcion):
+        TAREAS[tipo] = (funcion, titulo)
+        return funcion
+    return registrar
+
+
+def titulo(tipo):
+    return TAREAS[tipo][1] if tipo in TAREAS else tipo
+
+
+def encolar(tipo, **parametros):
+    """Crea un trabajo pendiente de `tipo` y lo devuelve (no espera a que corra)."""
+    if tipo not in TAREAS:
+        raise ValueError(f"Tipo de trabajo desconocido: '{tipo}'.")
+    return Job.objects.create(tipo=tipo, parametros=parametros)
+
+
+def _almacen():
+    return FileSystemStorage(location=settings.TRABAJOS_DIR_ARCHIVOS)
+
+
+def guardar_archivo(archivo):
+    """Guarda un archivo subido para un trabajo y devuelve el nombre que se encola."""
+    return _almacen().save(f"{uuid.uuid4().hex}{Path(archivo.name).suffix}", archivo)
+
+
+def abrir_archivo(nombre):
+    return _almacen().open(nombre, "rb")
+
+
+def _borrar_archivo(parametros):
+    if parametros.get("archivo"):
+        _almacen().delete(parametros["archivo"])
+
+
+def purgar(dias=None):
+    """
+    Borra los trabajos terminados (o con error) hace más de `dias` (por
+    defecto TRABAJOS_RETENCION_DIAS) y sus archivos. Devuelve cuántos borró.
+    """
+    dias = settings.TRABAJOS_RETENCION_DIAS if dias is None else dias
+    viejos = Job.objects.filter(estado__in=("terminado", "error"), fin__lt=timezone.now() - timedelta(days=dias))
+    for parametros in viejos.values_list("parametros", flat=True).iterator():
+        _borrar_archivo(parametros)
+    return viejos.delete()[0]
+
+
+def _plazo(ahora):
+    return ahora + timedelta(seconds=settings.TRABAJOS_PLAZO_S)
+
+
+@reintentar_si_bloqueada
+def reclamar(trabajador):
+    """
+    Toma el trabajo pendiente más antiguo (o uno cuyo arriendo venció) para
+    `trabajador` y lo devuelve, o None si no hay ninguno. Los vencidos que
+    ya agotaron TRABAJOS_MAX_INTENTOS pasan a error.
+    """
+    ahora = timezone.now()
+    vencidos = Job.objects.filter(estado="en_curso", vence__lt=ahora)
+    vencidos.filter(intentos__gte=settings.TRABAJOS_MAX_INTENTOS).update(
+        estado="error", fin=ahora, error="El trabajador que lo ejecutaba dejó de responder."
+    )
+    for candidatos in (Job.objects.filter(estado="pendiente"), vencidos):
+        for pk in candidatos.order_by("id").values_list("pk", flat=True)[:10]:
+            tomado = candidatos.filter(pk=pk).update(
+                estado="en_curso", trabajador=trabajador, inicio=ahora, vence=_plazo(ahora),
+                intentos=F("intentos") + 1,
+            )
+            if tomado:
+                return Job.objects.get(pk=pk)
+    return None
+
+
+def _mio(job):
+    # sólo escribe quien tiene el arriendo (si venció y lo tomó otro, no pisa nada)
+    return Job.objects.filter(pk=job.pk, estado="en_curso", trabajador=job.trabajador)
+
+
+def avanzar(job, hechos, total=None):
+    """
+    Informa el avance de un trabajo en curso y renueva su arriendo. Las
+    llamadas seguidas se agrupan: escribe como mucho cada INTERVALO_AVANCE_S.
+    """
+    job.hechos = hechos
+    if total is not None:
+        job.total = total
+    ahora = time.monotonic()
+    if ahora - getattr(job, "_ultimo_avance", 0) < INTERVALO_AVANCE_S:
+        return
+    job._ultimo_avance = ahora
+    reintentar_si_bloqueada(_mio(job).update)(
+        hechos=job.hechos, total=job.total, vence=_plazo(timezone.now())
+    )
+
+
+@reintentar_si_bloqueada
+def _terminar(job, estado, resultado=None, error=""):
+    campos = {"estado": estado, "resultado": resultado, "error": error, "fin": timezone.now(), "vence": None}
+    if estado == "terminado" and job.total:
+        campos["hechos"] = job.total
+    if _mio(job).update(**campos):
+        _borrar_archivo(job.parametros)
+
+
+@reintentar_si_bloqueada
+def _devolver(job):
+    # vuelve a la cola; cuenta como intento, así no se repite para siempre
+    _mio(job).update(estado="pendiente", vence=None)
+
+
+def ejecutar(job):
+    """
+    Corre un trabajo ya reclamado y guarda su resultado o su error. Los
+    errores de validación se muestran tal cual; cualquier otro se registra
+    en el log con su traza. Si la base siguió bloqueada después de los
+    reintentos (otro proceso escribiendo), el trabajo vuelve a la cola
+    mientras le queden intentos.
+    """
+    inicio = time.perf_counter()
+    try:
+        if job.tipo not in TAREAS:
+            raise ValidationError(f"Tipo de trabajo desconocido: '{job.tipo}'.")
+        resultado = TAREAS[job.tipo][0](job, **job.parametros)
+    except OperationalError as e:
+        if not bloqueada(e) or job.intentos >= settings.TRABAJOS_MAX_INTENTOS:
+            logger.exception(f"Falló el trabajo {job}")
+            _terminar(job, "error", error=f"Error inesperado: {e}")
+        else:
+            logger.warning(f"{job}: base bloqueada, vuelve a la cola")
+            _devolver(job)
+    except ValidationError as e:
+        _terminar(job, "error", error=" ".join(e.messages))
+    except Exception as e:
+        logger.exception(f"Falló el trabajo {job}")
+        _terminar(job, "error", error=f"Error inesperado: {e}")
+    else:
+        _terminar(job, "terminado", resultado=resultado)
+    logger.info(f"{job} en {time.perf_counter() - inicio:.2f} s")
+
+
+def procesar(trabajador, detener=None, espera=None):
+    """
+    Bucle de un hilo del trabajador: reclama y ejecuta trabajos hasta que se
+    pida `detener` (un threading.Event); sin trabajos, espera `espera`
+    segundos antes de volver a buscar. Sin `detener`, ejecuta lo pendiente
+    y vuelve. Devuelve cuántos trabajos ejecutó.
+    """
+    espera = settings.TRABAJOS_ESPERA_S if espera is None else espera
+    hechos = 0
+    while detener is None or not detener.is_set():
+        job = reclamar(trabajador)
+        if job is None:
+            if detener is None:
+                break
+            detener.wait(espera)
+            continue
+        ejecutar(job)
+        hechos += 1
+    return hechos
+
+
+# Tareas
+
+@tarea("generar_fixture", "Generar fixture")
+def _generar_fixture(job, torneo, parametros):
+    """`parametros` son los de la vista partidos_generar (ya validados al encolar)."""
+    from .fixture import generar_fixture, parse_inicio, parse_intervalo
+    from .programacion import leer_restricciones
+
+    torneo = Torneo.objects.get(pk=torneo)
+    try:
+        inicio = parse_inicio(parametros.get("inicio"))
+        intervalo = parse_intervalo(parametros.get("intervalo"))
+        restricciones = leer_restricciones(parametros, inicio)
+    except ValueError as e:
+        raise ValidationError(str(e))
+    creados = generar_fixture(
+        torneo,
+        ida_vuelta=parametros.get("ida_vuelta", "").lower() in ("1", "true", "on", "si"),
+        inicio=inicio,
+        intervalo=intervalo,
+        restricciones=restricciones,
+    )
+    return {
+        "mensaje": f"Fixture generado: {len(creados)} partidos.",
+        "volver": reverse("partidos_list") + f"?torneo={torneo.pk}",
+    }
+
+
+@tarea("importar_equipos", "Importar equipos y jugadores")
+def _importar_equipos(job, archivo, formato):
+    from .importacion import importar, leer_filas
+
+    with abrir_archivo(archivo) as datos:
+        try:
+            resultado = importar(leer_filas(datos, formato))
+        except UnicodeDecodeError:
+            raise ValidationError("El archivo debe estar en UTF-8.")
+    return {
+        "mensaje": (
+            f"Importación: {resultado.equipos_creados} equipos y {resultado.jugadores_creados} "
+            f"jugadores creados, {len(resultado.errores)} filas con errores."
+        ),
+        "errores": resultado.errores,
+        "volver": reverse("equipos_list"),
+    }
+
+
+@tarea("importar_instantanea", "Importar instantánea de torneo")
+def _importar_instantanea(job, archivo, nombre=""):
+    """`archivo` es el .ndjson.gz subido, guardado con guardar_archivo."""
+    from .instantaneas import importar_instantanea
+
+    with abrir_archivo(archivo) as datos:
+        torneo, cantidades = importar_instantanea(
+            datos, nombre or None,
+            progreso=lambda hechas, total: avanzar(job, hechas, total),
+        )
+    return {
+        "mensaje": (
+            f"Torneo '{torneo.nombre}' importado con {cantidades['equipos']} equipos, "
+            f"{cantidades['jugadores']} jugadores y {cantidades['partidos']} partidos."
+        ),
+        "volver": reverse("torneo_detail", args=[torneo.pk]),
+    }
+
+
+@tarea("borrar_torneo", "Eliminar torneo")
+def _borrar_torneo(job, torneo):
+    from .borrado import borrar_torneo
+
+    torneo = Torneo.objects.filter(pk=torneo).first()
+    if torneo is None:
+        return {"mensaje": "El torneo ya no existe.", "volver": reverse("torneos_list")}
+    borradas = borrar_torneo(torneo, progreso=lambda hechas, total: avanzar(job, hechas, total))
+    return {
+        "mensaje": (
+            f"Torneo '{torneo.nombre}' eliminado con {borradas['equipos']} equipos, "
+            f"{borradas['jugadores']} jugadores y {borradas['partidos']} partidos."
+        ),
+        "volver": reverse("torneos_list"),
+    }
+
+
+@tarea("recalcular", "Recalcular datos derivados")
+def _recalcular(job, torneo=None):
+    """Rehace la tabla, las estadísticas, el Elo y los cupos (de un torneo o de todos)."""
+    from .cupos import reconciliar
+    from .elo import recalcular_elo
+    from .estadisticas import recalcular_estadisticas
+    from .posiciones import recalcular_posiciones
+
+    pasos = (recalcular_posiciones, recalcular_estadisticas, recalcular_elo, reconciliar)
+    for hechos, paso in enumerate(pasos):
+        avanzar(job, hechos, len(pasos))
+        paso(torneo)
+    return {"mensaje": "Tabla, estadísticas, Elo y cupos recalculados."}
@@ -1,12 +1,34 @@
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
 from django.contrib import messages
 from django.db import transaction
-from datetime import datetime, timedelta
+from django.core.exceptions import ValidationError
+from datetime import datetime
 from django.contrib.auth.decorators import login_required
-from .models import Torneo, Jugador, Equipo,Partido
-from .forms import TorneoForm, JugadorForm, PartidoForm, EquipoForm
-from django.db.models import Q
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import never_cache
+from .models import Torneo, Jugador, Equipo,Partido, EventoPartido, Job
+from . import borrado, busqueda, cache_torneos, eventos, trabajos
+from .forms import (
+    TorneoForm, JugadorForm, PartidoForm, EquipoForm, EventoPartidoForm, ImportarForm,
+    ClonarTorneoForm, InstantaneaForm,
+)
+from .exportacion import (
+    COLUMNAS_EQUIPOS, COLUMNAS_JUGADORES, COLUMNAS_PARTIDOS, FORMATOS_EXPORTACION, respuesta_exportacion,
+)
+from .instantaneas import clonar_torneo, comprimir, lineas, temporada_siguiente
+from .filtros import filtrar_equipos, filtrar_jugadores, filtrar_partidos
+from .estadisticas import TABLAS, lideres, sincronizar_marcador
+from .eliminacion import generar_llave, parse_orden, rondas_de_llave, sembrar_equipos
+from .fixture import inicio_por_defecto, parse_inicio, parse_intervalo
+from .programacion import leer_restricciones
+from .paginacion import leer_cursor, paginar
+from .posiciones import equipos_en_orden
+from .simulacion import DESCENSOS, probabilidades, simular_torneo
+from .sqlite import reintentar_si_bloqueada
+from .resultados import cargar_resultados, leer_marcadores, parse_fecha, partidos_de_jornada, rango_jornada
 
 
 def home(request):
@@ -15,16 +37,117 @@ def home(request):
 @login_required
 def torneos_list(request):
     q = request.GET.get("q", "")
-    torneos = Torneo.objects.all()
-    if q:
-        torneos = torneos.filter(nombre__icontains=q)
+
+    def buscar():
+        torneos = Torneo.objects.all()
+        if q:
+            # índice FTS5 (core/busqueda.py) en vez de LIKE sobre toda la tabla
+            torneos = busqueda.filtrar_por_texto(torneos, q, "torneo")
+        return list(torneos)
+
+    torneos = cache_torneos.obtener(cache_torneos.clave("torneos", None, q), buscar)
     return render(request, "core/torneos_list.html", {"torneos": torneos, "q": q})
 
+@login_required
+def buscar(request):
+    """Búsqueda en torneos, equipos y jugadores (?q=texto&tipo=torneo|equipo|jugador)."""
+    q = request.GET.get("q", "").strip()
+    tipo = request.GET.get("tipo") or None
+    if tipo not in busqueda.TIPOS:
+        tipo = None
+    resultados = busqueda.buscar(q, tipo) if q else []
+    return render(request, "core/buscar.html", {
+        "q": q, "tipo": tipo, "tipos": list(busqueda.TIPOS), "resultados": resultados,
+    })
+
 @login_required
 def torneo_detail(request, pk):
     torneo = get_object_or_404(Torneo, pk=pk)
     return render(request, "core/torneo_detail.html", {"torneo": torneo})
 
+@login_required
+def torneo_tabla(request, pk):
+    torneo = get_object_or_404(Torneo, pk=pk)
+    # Lee la tabla materializada; los equipos sin partidos jugados aparecen en cero
+    equipos = equipos_en_orden(torneo.id)
+    return render(request, "core/torneo_tabla.html", {"torneo": torneo, "equipos": equipos})
+
+@login_required
+def torneo_estadisticas(request, pk):
+    """Tablas de líderes del torneo (goleadores, asistencias, tarjetas, partidos)."""
+    torneo = get_object_or_404(Torneo, pk=pk)
+    tabla = request.GET.get("tabla")
+    if tabla not in TABLAS:
+        tabla = "goleadores"
+    return render(request, "core/torneo_estadisticas.html", {
+        "torneo": torneo,
+        "tabla": tabla,
+        "titulo": TABLAS[tabla][0],
+        "tablas": [(nombre, titulo) for nombre, (titulo, _) in TABLAS.items()],
+        "filas": lideres(torneo.id, tabla),
+    })
+
+@login_required
+def torneo_simulacion(request, pk):
+    """
+    Probabilidades de salir campeón y de descender según lo que falta de la
+    liga (simulación de Monte Carlo, cacheada hasta el próximo resultado).
+    Parámetros opcionales (GET): n=simulaciones (sólo staff, con el tope de
+    simular_torneo) y descensos=puestos que descienden.
+    """
+    torneo = get_object_or_404(Torneo, pk=pk)
+    n = request.GET.get("n", "")
+    n = int(n) if n.isdigit() and request.user.is_staff else None
+    descensos = request.GET.get("descensos", "")
+    descensos = int(descensos) if descensos.isdigit() else DESCENSOS
+    conteos = simular_torneo(torneo, n)
+    return render(request, "core/torneo_simulacion.html", {
+        "torneo": torneo,
+        "conteos": conteos,
+        "descensos": descensos,
+        "filas": probabilidades(conteos, descensos),
+    })
+
+@login_required
+def torneo_llave(request, pk):
+    """Llave de eliminación del torneo, ronda por ronda."""
+    torneo = get_object_or_404(Torneo, pk=pk)
+    return render(request, "core/torneo_llave.html", {"torneo": torneo, "rondas": rondas_de_llave(torneo)})
+
+@login_required
+def torneo_llave_generar(request, pk):
+    """
+    Genera la llave de eliminación directa del torneo.
+    Parámetros opcionales (GET):
+      - orden=ID,ID,... siembra manual (entran sólo esos equipos, en ese orden);
+        sin orden, la siembra sale de la tabla de posiciones (o del Elo con siembra=elo).
+      - cantidad=N toma sólo los N primeros sembrados.
+      - inicio=YYYY-MM-DD[THH:MM] fecha de la primera ronda e intervalo=N días entre rondas.
+    """
+    torneo = get_object_or_404(Torneo, pk=pk)
+    volver = reverse("torneo_llave", args=[torneo.pk])
+    try:
+        orden = parse_orden(request.GET.get("orden"))
+        cantidad = request.GET.get("cantidad") or None
+        if cantidad is not None:
+            if not cantidad.isdigit():
+                raise ValueError(f"Cantidad inválida: '{cantidad}'.")
+            cantidad = int(cantidad)
+        inicio = parse_inicio(request.GET.get("inicio"))
+        intervalo = parse_intervalo(request.GET.get("intervalo"))
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect(volver)
+
+    try:
+        equipos = sembrar_equipos(torneo, orden, cantidad, por_elo=request.GET.get("siembra") == "elo")
+        creados = generar_llave(torneo, equipos, inicio=inicio, intervalo=intervalo)
+    except ValidationError as e:
+        messages.error(request, " ".join(e.messages))
+        return redirect(volver)
+    messages.success(request, f"Llave generada: {len(equipos)} equipos, {len(creados)} partidos.")
+    return redirect(volver)
+
 @login_required
 def torneo_create(request):
     if request.method == "POST":
@@ -54,34 +177,89 @@ def torneo_update(request, pk):
 def torneo_delete(request, pk):
     torneo = get_object_or_404(Torneo, pk=pk)
     if request.method == "POST":
-        torneo.delete()
-        messages.success(request, "Torneo eliminado.")
-        return redirect("torneos_list")
-    return render(request, "core/torneo_confirm_delete.html", {"torneo": torneo})
+        # en segundo plano: DELETE por lotes, sin cargar los equipos, jugadores y partidos (ver core/borrado.py)
+        job = trabajos.encolar("borrar_torneo", torneo=torneo.pk)
+        return redirect("trabajo_detail", job.pk)
+    return render(request, "core/torneo_confirm_delete.html", {
+        "torneo": torneo, "dependientes": borrado.dependientes_torneo(torneo),
+    })
 
 @login_required
-def jugadores_list(request):
-    torneo_id = request.GET.get("torneo") or ""
-    equipo_id = request.GET.get("equipo") or ""
+def torneo_recalcular(request, pk):
+    """Rehace en segundo plano la tabla, las estadísticas, el Elo y los cupos del torneo."""
+    torneo = get_object_or_404(Torneo, pk=pk)
+    if request.method != "POST":
+        return redirect("torneo_detail", torneo.pk)
+    job = trabajos.encolar("recalcular", torneo=torneo.pk)
+    return redirect("trabajo_detail", job.pk)
 
-    
-    jugadores = Jugador.objects.select_related("equipo", "equipo__torneo")
+@login_required
+def torneo_instantanea(request, pk):
+    """Descarga la instantánea del torneo (.ndjson.gz), generada en streaming."""
+    torneo = get_object_or_404(Torneo, pk=pk)
+    respuesta = StreamingHttpResponse(comprimir(lineas(torneo)), content_type="application/gzip")
+    respuesta["Content-Disposition"] = f'attachment; filename="torneo-{torneo.pk}.ndjson.gz"'
+    return respuesta
 
-    
-    torneos = Torneo.objects.all().order_by("nombre")
-    if torneo_id:
-        equipos = Equipo.objects.filter(torneo_id=torneo_id).order_by("nombre")
-        jugadores = jugadores.filter(equipo__torneo_id=torneo_id)
+@login_required
+def torneos_importar(request):
+    """Crea un torneo desde una instantánea (en segundo plano)."""
+    if request.method == "POST":
+        form = InstantaneaForm(request.POST, request.FILES)
+        if form.is_valid():
+            job = trabajos.encolar(
+                "importar_instantanea",
+                archivo=trabajos.guardar_archivo(form.cleaned_data["archivo"]),
+                nombre=form.cleaned_data["nombre"],
+            )
+            return redirect("trabajo_detail", job.pk)
     else:
-        equipos = Equipo.objects.all().order_by("nombre")
+        form = InstantaneaForm()
+    return render(request, "core/torneo_importar.html", {"form": form})
 
-    if equipo_id:
-        jugadores = jugadores.filter(equipo_id=equipo_id)
+@login_required
+def torneo_clonar(request, pk):
+    """Nueva temporada del torneo: copia los equipos y, si se pide, sus jugadores."""
+    torneo = get_object_or_404(Torneo, pk=pk)
+    if request.method == "POST":
+        form = ClonarTorneoForm(request.POST)
+        if form.is_valid():
+            try:
+                nuevo, cantidades = clonar_torneo(torneo, **form.cleaned_data)
+            except ValidationError as e:
+                messages.error(request, " ".join(e.messages))
+            else:
+                messages.success(
+                    request,
+                    f"Temporada creada con {cantidades['equipos']} equipos y {cantidades['jugadores']} jugadores.",
+                )
+                return redirect("torneo_detail", nuevo.pk)
+    else:
+        form = ClonarTorneoForm(initial=temporada_siguiente(torneo))
+    return render(request, "core/torneo_clonar.html", {"form": form, "torneo": torneo})
 
+@login_required
+def jugadores_list(request):
+    filtros, cursor = leer_cursor(request, ("torneo", "equipo"))
+    torneo_id = filtros["torneo"]
+    equipo_id = filtros["equipo"]
+
+    def pagina_jugadores():
+        jugadores = Jugador.objects.select_related("equipo", "equipo__torneo").only(
+            "nombre", "email", "equipo__nombre", "equipo__torneo__nombre"
+        )
+        jugadores = filtrar_jugadores(jugadores, torneo_id, equipo_id)
+        return paginar(jugadores, "nombre", cursor, filtros)
+
+    clave = cache_torneos.clave("jugadores", torneo_id, equipo_id, cursor and cursor["k"], cursor and cursor["d"])
+    pagina = cache_torneos.obtener(clave, pagina_jugadores)
     ctx = {
-        "jugadores": jugadores,
-        "torneos": torneos,
-        "equipos": equipos,
+        "jugadores": pagina,
+        "page_obj": pagina,
+        "clave_tabla": clave,
+        "cache_timeout": cache_torneos.timeout(),
+        "torneos": cache_torneos.opciones_torneos(),
+        "equipos": cache_torneos.opciones_equipos(torneo_id, equipo_id),
         "torneo_id": str(torneo_id),
         "equipo_id": str(equipo_id),
     }
@@ -93,21 +271,22 @@ def jugador_create(request):
     if request.method == "POST":
         form = JugadorForm(request.POST)
         if form.is_valid():
-            j = form.save()
-            messages.success(request, "Jugador creado.")
-            # Vuelve al listado respetando filtros (por torneo)
-            return redirect(reverse("jugadores_list") + f"?torneo={j.equipo.torneo_id}&equipo={j.equipo_id}")
+            try:
+                j = form.save()  # reserva el cupo del equipo
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                messages.success(request, "Jugador creado.")
+                # Vuelve al listado respetando filtros (por torneo)
+                return redirect(reverse("jugadores_list") + f"?torneo={j.equipo.torneo_id}&equipo={j.equipo_id}")
     else:
+        # si vienen ?torneo y/o ?equipo en la URL, precarga (el form sólo
+        # lista los equipos del torneo elegido)
         initial = {}
-        # si vienen ?torneo y/o ?equipo en la URL, precarga
-        torneo_id = request.GET.get("torneo")
-        equipo_id = request.GET.get("equipo")
-        if equipo_id:
-            initial["equipo"] = equipo_id
+        for campo in ("torneo", "equipo"):
+            if request.GET.get(campo):
+                initial[campo] = request.GET[campo]
         form = JugadorForm(initial=initial)
-        # (opcional) si quieres filtrar el queryset de equipos del form por torneo:
-        if torneo_id:
-            form.fields["equipo"].queryset = Equipo.objects.filter(torneo_id=torneo_id)
 
     return render(request, "core/jugador_form.html", {"form": form})
 
@@ -115,24 +294,27 @@ def jugador_create(request):
 
 @login_required
 def partidos_list(request):
-    torneo_id = request.GET.get("torneo") or ""
-    equipo_id = request.GET.get("equipo") or ""
-
-    partidos = Partido.objects.select_related("torneo", "equipo1", "equipo2")
-    torneos = Torneo.objects.all().order_by("nombre")
-    equipos = Equipo.objects.all().order_by("nombre")
-
-    if torneo_id:
-        partidos = partidos.filter(torneo_id=torneo_id)
-        equipos = equipos.filter(torneo_id=torneo_id)
-
-    if equipo_id:
-        partidos = partidos.filter(Q(equipo1_id=equipo_id) | Q(equipo2_id=equipo_id))
-
+    filtros, cursor = leer_cursor(request, ("torneo", "equipo"))
+    torneo_id = filtros["torneo"]
+    equipo_id = filtros["equipo"]
+
+    def pagina_partidos():
+        partidos = Partido.objects.select_related("torneo", "equipo1", "equipo2").only(
+            "fecha", "sede", "estado", "marcador1", "marcador2",
+            "torneo__nombre", "equipo1__nombre", "equipo2__nombre",
+        )
+        partidos = filtrar_partidos(partidos, torneo_id, equipo_id)
+        return paginar(partidos, "fecha", cursor, filtros)
+
+    clave = cache_torneos.clave("partidos", torneo_id, equipo_id, cursor and cursor["k"], cursor and cursor["d"])
+    pagina = cache_torneos.obtener(clave, pagina_partidos)
     ctx = {
-        "partidos": partidos.order_by("fecha", "id"),
-        "torneos": torneos,
-        "equipos": equipos,
+        "partidos": pagina,
+        "page_obj": pagina,
+        "clave_tabla": clave,
+        "cache_timeout": cache_torneos.timeout(),
+        "torneos": cache_torneos.opciones_torneos(),
+        "equipos": cache_torneos.opciones_equipos(torneo_id, equipo_id),
         "torneo_id": str(torneo_id),
         "equipo_id": str(equipo_id),
     }
@@ -156,13 +338,19 @@ def partido_create(request):
 
 @login_required
 def partido_update(request, pk):
-    p = get_object_or_404(Partido, pk=pk)
+    p = get_object_or_404(Partido.objects.select_related("torneo", "equipo1", "equipo2"), pk=pk)
     if request.method == "POST":
         form = PartidoForm(request.POST, instance=p)
         if form.is_valid():
-            p = form.save()
-            messages.success(request, "Partido actualizado.")
-            return redirect(reverse("partidos_list") + f"?torneo={p.torneo_id}")
+            try:
+                # en la llave, el ganador pasa al partido siguiente (ver core/eliminacion.py)
+                p = form.save()
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                eventos.publicar_resultados([p])
+                messages.success(request, "Partido actualizado.")
+                return redirect(reverse("partidos_list") + f"?torneo={p.torneo_id}")
     else:
         form = PartidoForm(instance=p)
     return render(request, "core/partido_form.html", {"form": form})
@@ -170,7 +358,7 @@ def partido_update(request, pk):
 @login_required
 def partido_set_resultado(request, pk):
     """Vista rápida para marcar como 'jugado' y poner marcador/fecha."""
-    p = get_object_or_404(Partido, pk=pk)
+    p = get_object_or_404(Partido.objects.select_related("torneo", "equipo1", "equipo2"), pk=pk)
     if request.method == "POST":
         p.marcador1 = int(request.POST.get("marcador1") or 0)
         p.marcador2 = int(request.POST.get("marcador2") or 0)
@@ -179,18 +367,124 @@ def partido_set_resultado(request, pk):
             # from input type=datetime-local (YYYY-MM-DDTHH:MM)
             p.fecha = datetime.fromisoformat(fecha_str)
         p.estado = "jugado"
-        p.save()
+        try:
+            reintentar_si_bloqueada(p.save)()
+            eventos.publicar_resultados([p])
+        except ValidationError as e:
+            messages.error(request, " ".join(e.messages))
+            return render(request, "core/partido_set_resultado.html", {"p": p})
         messages.success(request, "Resultado guardado.")
         return redirect(reverse("partidos_list") + f"?torneo={p.torneo_id}")
     return render(request, "core/partido_set_resultado.html", {"p": p})
 
-@transaction.atomic
+@login_required
+def partido_eventos(request, pk):
+    """
+    Goles, asistencias, tarjetas y cambios de un partido. Al cargar o
+    borrar un gol el marcador del partido pasa a ser el que dan los goles.
+    """
+    p = get_object_or_404(Partido.objects.select_related("torneo", "equipo1", "equipo2"), pk=pk)
+    volver = reverse("partido_eventos", args=[p.pk])
+    if request.method == "POST":
+        form = EventoPartidoForm(request.POST, partido=p)
+        if form.is_valid():
+            try:
+                with transaction.atomic():
+                    evento = form.save()
+                    if evento.tipo in ("gol", "autogol") and sincronizar_marcador(p):
+                        eventos.publicar_resultados([p])
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                messages.success(request, "Evento agregado.")
+                return redirect(volver)
+    else:
+        form = EventoPartidoForm(partido=p)
+    lista = p.eventos.select_related("jugador", "equipo").only(
+        "tipo", "minuto", "jugador__nombre", "equipo__nombre"
+    )
+    return render(request, "core/partido_eventos.html", {"p": p, "form": form, "eventos": lista})
+
+@login_required
+def evento_delete(request, pk):
+    evento = get_object_or_404(EventoPartido.objects.select_related("partido"), pk=pk)
+    p = evento.partido
+    if request.method == "POST":
+        try:
+            with transaction.atomic():
+                evento.delete()
+                if evento.tipo in ("gol", "autogol") and sincronizar_marcador(p):
+                    eventos.publicar_resultados([p])
+        except ValidationError as e:
+            messages.error(request, " ".join(e.messages))
+        else:
+            messages.success(request, "Evento eliminado.")
+    return redirect(reverse("partido_eventos", args=[p.pk]))
+
+@login_required
+def partidos_resultados(request):
+    """
+    Planilla de resultados de una jornada: todos los marcadores de los
+    partidos entre ?desde y ?hasta (por defecto, la próxima jornada
+    pendiente) se envían y guardan juntos.
+    """
+    torneo_id = request.GET.get("torneo")
+    if not torneo_id:
+        messages.error(request, "Debes seleccionar un torneo (?torneo=ID).")
+        return redirect("partidos_list")
+
+    torneo = get_object_or_404(Torneo, pk=torneo_id)
+    volver = reverse("partidos_list") + f"?torneo={torneo.id}"
+    try:
+        desde = parse_fecha(request.GET.get("desde"))
+        hasta = parse_fecha(request.GET.get("hasta"))
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect(volver)
+    desde, hasta = rango_jornada(torneo, desde, hasta)
+    partidos = partidos_de_jornada(torneo, desde, hasta)
+
+    if request.method == "POST":
+        marcadores, errores = leer_marcadores(request.POST, partidos)
+        if not errores:
+            try:
+                guardados = cargar_resultados(torneo, partidos, marcadores)
+            except ValidationError as e:
+                errores = e.messages
+        if not errores:
+            messages.success(request, f"Resultados guardados: {len(guardados)} partidos.")
+            return redirect(volver)
+        for error in errores:
+            messages.error(request, error)
+        # se vuelve a mostrar la planilla con lo que se envió
+        for p in partidos:
+            p.valor1 = request.POST.get(f"marcador1_{p.pk}", "")
+            p.valor2 = request.POST.get(f"marcador2_{p.pk}", "")
+    else:
+        for p in partidos:
+            p.valor1 = "" if p.marcador1 is None else p.marcador1
+            p.valor2 = "" if p.marcador2 is None else p.marcador2
+
+    return render(request, "core/partidos_resultados.html", {
+        "torneo": torneo,
+        "partidos": partidos,
+        "desde": desde,
+        "hasta": hasta,
+    })
+
 @login_required
 def partidos_generar(request):
     """
     Genera fixture round-robin para un torneo: todos contra todos una vez.
-    Si deseas ida y vuelta, cambia ida_vuelta=True.
-    Asigna fechas cada 7 días empezando hoy si no indicas otra cosa.
+    Parámetros opcionales (GET):
+      - ida_vuelta=1 para doble ronda.
+      - inicio=YYYY-MM-DD[THH:MM] fecha de la primera jornada (por defecto hoy).
+      - intervalo=N días entre jornadas (por defecto 7).
+      - sedes=Cancha 1,Cancha 2 y horarios=18:00,20:00: con alguno de los
+        dos, cada partido recibe fecha, hora y sede respetando además
+        descanso=N días entre partidos de un equipo, bloqueadas=YYYY-MM-DD,...,
+        fin=YYYY-MM-DD (fecha límite) y dias=5,6 (días de la semana, 0 = lunes).
+    Los parámetros se validan acá; el fixture se genera en segundo plano.
     """
     torneo_id = request.GET.get("torneo")
     if not torneo_id:
@@ -198,66 +492,35 @@ def partidos_generar(request):
         return redirect("partidos_list")
 
     torneo = get_object_or_404(Torneo, pk=torneo_id)
-    equipos = list(Equipo.objects.filter(torneo=torneo).order_by("id"))
-    n = len(equipos)
-    if n < 2:
-        messages.error(request, "Se necesitan al menos 2 equipos en el torneo.")
-        return redirect(reverse("partidos_list") + f"?torneo={torneo.id}")
-
-    ida_vuelta = False  # cambia a True si quieres doble ronda
-    start_date = datetime.now().replace(microsecond=0, second=0, minute=0)  # hoy a la hora redondeada
-    delta = timedelta(days=7)  # cada jornada, 7 días después
-
-    # Algoritmo círculo (round-robin)
-    # si impar, agregamos "bye" (None)
-    bye = None
-    es_impar = (n % 2 == 1)
-    if es_impar:
-        equipos.append(bye)
-        n += 1
-
-    jornadas = n - 1
-    mitad = n // 2
-    arr = equipos[:]
-
-    created = 0
-    fecha = start_date
-    for ronda in range(jornadas):
-        parejas = []
-        for i in range(mitad):
-            a = arr[i]
-            b = arr[-(i+1)]
-            if a is not None and b is not None:
-                parejas.append((a, b))
-        # crear partidos de esta ronda
-        for (e1, e2) in parejas:
-            # normaliza orden por id para respetar la unique constraint
-            e1n, e2n = (e1, e2) if e1.id < e2.id else (e2, e1)
-            # evita duplicados si ya existen
-            if not Partido.objects.filter(torneo=torneo, equipo1=e1n, equipo2=e2n).exists():
-                Partido.objects.create(torneo=torneo, equipo1=e1n, equipo2=e2n, fecha=fecha, estado="pendiente")
-                created += 1
-            if ida_vuelta:
-                # segundo partido invertido (otra fecha)
-                fecha2 = fecha + timedelta(days=3)  # misma semana
-                if not Partido.objects.filter(torneo=torneo, equipo1=e2n, equipo2=e1n).exists():
-                    Partido.objects.create(torneo=torneo, equipo1=e2n, equipo2=e1n, fecha=fecha2, estado="pendiente")
-                    created += 1
-        # rotación
-        arr = [arr[0]] + [arr[-1]] + arr[1:-1]
-        fecha += delta
-
-    messages.success(request, f"Fixture generado: {created} partidos.")
-    return redirect(reverse("partidos_list") + f"?torneo={torneo.id}")
-    
+    volver = reverse("partidos_list") + f"?torneo={torneo.id}"
+
+    try:
+        inicio = parse_inicio(request.GET.get("inicio"))
+        parse_intervalo(request.GET.get("intervalo"))
+        leer_restricciones(request.GET, inicio)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect(volver)
+
+    parametros = request.GET.dict()
+    if inicio is None:
+        # el día en que se pidió, no el día en que corre el trabajo
+        parametros["inicio"] = inicio_por_defecto().isoformat(timespec="minutes")
+    job = trabajos.encolar("generar_fixture", torneo=torneo.pk, parametros=parametros)
+    return redirect("trabajo_detail", job.pk)
+
 @login_required
 def equipo_create(request):
     if request.method == "POST":
         form = EquipoForm(request.POST)
         if form.is_valid():
-            equipo = form.save()  # valida límite de 20 en clean()
-            messages.success(request, "Equipo creado correctamente.")
-            return redirect(reverse("equipos_list") + f"?torneo={equipo.torneo_id}")
+            try:
+                equipo = form.save()  # reserva el cupo del torneo (ver core/cupos.py)
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                messages.success(request, "Equipo creado correctamente.")
+                return redirect(reverse("equipos_list") + f"?torneo={equipo.torneo_id}")
     else:
         # si vienes con ?torneo=ID, lo ponemos como initial
         initial = {}
@@ -273,9 +536,13 @@ def equipo_update(request, pk):
     if request.method == "POST":
         form = EquipoForm(request.POST, instance=equipo)
         if form.is_valid():
-            equipo = form.save()
-            messages.success(request, "Equipo actualizado.")
-            return redirect(reverse("equipos_list") + f"?torneo={equipo.torneo_id}")
+            try:
+                equipo = form.save()
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                messages.success(request, "Equipo actualizado.")
+                return redirect(reverse("equipos_list") + f"?torneo={equipo.torneo_id}")
     else:
         form = EquipoForm(instance=equipo)
     return render(request, "core/equipo_form.html", {"form": form})
@@ -283,23 +550,111 @@ def equipo_update(request, pk):
 
 @login_required
 def equipo_delete(request, pk):
-    equipo = get_object_or_404(Equipo, pk=pk)
+    equipo = get_object_or_404(Equipo.objects.select_related("torneo"), pk=pk)
     if request.method == "POST":
         torneo_id = equipo.torneo_id
-        equipo.delete()
+        borrado.borrar_equipo(equipo)
         messages.success(request, "Equipo eliminado.")
         return redirect(reverse("equipos_list") + f"?torneo={torneo_id}")
-    return render(request, "core/equipo_confirm_delete.html", {"equipo": equipo})
+    return render(request, "core/equipo_confirm_delete.html", {
+        "equipo": equipo, "dependientes": borrado.dependientes_equipo(equipo),
+    })
 
 @login_required
 def equipos_list(request):
     torneo_id = request.GET.get("torneo")
-    torneos = Torneo.objects.all()
-    equipos = Equipo.objects.select_related("torneo")
-    if torneo_id:
-        equipos = equipos.filter(torneo_id=torneo_id)
+
+    def listar_equipos():
+        # la cantidad de jugadores es el contador del equipo: sin COUNT ni GROUP BY
+        equipos = Equipo.objects.select_related("torneo").only("nombre", "jugadores_count", "torneo__nombre")
+        return list(filtrar_equipos(equipos, torneo_id))
+
+    clave = cache_torneos.clave("equipos", torneo_id)
     return render(request, "core/equipos_list.html", {
-        "equipos": equipos,
-        "torneos": torneos,
+        "equipos": cache_torneos.obtener(clave, listar_equipos),
+        "clave_tabla": clave,
+        "cache_timeout": cache_torneos.timeout(),
+        "torneos": cache_torneos.opciones_torneos(),
         "torneo_id": torneo_id,
     })
+
+@staff_member_required
+def cache_estadisticas(request):
+    """Aciertos/fallos de la caché por torneo, para verificar que sirve."""
+    return JsonResponse(cache_torneos.estadisticas())
+
+@login_required
+def equipos_importar(request):
+    """Alta masiva de equipos y jugadores desde un archivo CSV/JSON (en segundo plano)."""
+    if request.method == "POST":
+        form = ImportarForm(request.POST, request.FILES)
+        if form.is_valid():
+            job = trabajos.encolar(
+                "importar_equipos",
+                archivo=trabajos.guardar_archivo(form.cleaned_data["archivo"]),
+                formato=form.cleaned_data["formato"],
+            )
+            return redirect("trabajo_detail", job.pk)
+    else:
+        form = ImportarForm()
+    return render(request, "core/importar.html", {"form": form})
+
+# TRABAJOS EN SEGUNDO PLANO
+
+def _estado_trabajo(job):
+    return {
+        "id": job.pk,
+        "tipo": job.tipo,
+        "titulo": trabajos.titulo(job.tipo),
+        "estado": job.estado,
+        "terminado": job.terminado,
+        "hechos": job.hechos,
+        "total": job.total,
+        "progreso": job.progreso,
+        "resultado": job.resultado,
+        "error": job.error,
+    }
+
+@login_required
+def trabajo_detail(request, pk):
+    """Estado de un trabajo; mientras corre, la página consulta trabajo_estado."""
+    job = get_object_or_404(Job.objects.defer("parametros"), pk=pk)
+    return render(request, "core/trabajo_detail.html", {"job": job, "estado": _estado_trabajo(job)})
+
+@never_cache
+@login_required
+def trabajo_estado(request, pk):
+    """Avance de un trabajo en JSON, para consultarlo cada tanto."""
+    # se consulta cada segundo: sin los parámetros, que no se muestran
+    return JsonResponse(_estado_trabajo(get_object_or_404(Job.objects.defer("parametros"), pk=pk)))
+
+# EXPORTACIONES (mismos filtros que los listados)
+
+def _exportar(request, queryset, columnas, nombre, volver):
+    formato = request.GET.get("formato", "csv")
+    if formato not in FORMATOS_EXPORTACION:
+        messages.error(request, f"Formato de exportación no soportado: '{formato}'.")
+        return redirect(volver)
+    return respuesta_exportacion(queryset, columnas, formato, nombre)
+
+@login_required
+def partidos_exportar(request):
+    torneo_id = request.GET.get("torneo") or ""
+    equipo_id = request.GET.get("equipo") or ""
+    partidos = filtrar_partidos(Partido.objects.order_by("fecha", "id"), torneo_id, equipo_id)
+    return _exportar(request, partidos, COLUMNAS_PARTIDOS, "partidos", "partidos_list")
+
+@login_required
+def jugadores_exportar(request):
+    torneo_id = request.GET.get("torneo") or ""
+    equipo_id = request.GET.get("equipo") or ""
+    jugadores = filtrar_jugadores(Jugador.objects.order_by("nombre", "id"), torneo_id, equipo_id)
+    return _exportar(request, jugadores, COLUMNAS_JUGADORES, "jugadores", "jugadores_list")
+
+@login_required
+def equipos_exportar(request):
+    torneo_id = request.GET.get("torneo") or ""
+    equipos = filtrar_equipos(
+        Equipo.objects.order_by("nombre", "id"), torneo_id
+    )
+    return _exportar(request, equipos, COLUMNAS_EQUIPOS, "equipos", "equipos_list")
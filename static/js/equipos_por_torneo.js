@@ -0,0 +1,26 @@
+// <select> de equipos que dependen del torneo elegido en el mismo formulario
+// (ver EquiposPorTorneoSelect en core/forms.py): al cambiar el torneo se piden
+// sus equipos a la API y se reemplazan las opciones.
+document.addEventListener("DOMContentLoaded", function () {
+  document.querySelectorAll("select[data-torneo]").forEach(function (select) {
+    var torneo = select.form && select.form.elements[select.dataset.torneo];
+    if (!torneo) return;
+    var vacia = select.options.length && select.options[0].value === "" ? select.options[0] : null;
+
+    torneo.addEventListener("change", function () {
+      var elegido = select.value;
+      var pedido = torneo.value;
+      select.length = 0;
+      if (vacia) select.add(vacia);
+      if (!pedido) return;
+      fetch(select.dataset.url + "?torneo=" + encodeURIComponent(pedido), { credentials: "same-origin" })
+        .then(function (r) { return r.ok ? r.json() : { resultados: [] }; })
+        .then(function (datos) {
+          if (torneo.value !== pedido) return;  // el torneo cambió mientras tanto
+          datos.resultados.forEach(function (e) {
+            select.add(new Option(e.nombre, e.id, false, String(e.id) === elegido));
+          });
+        });
+    });
+  });
+});
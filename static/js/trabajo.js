@@ -0,0 +1,23 @@
+// Página de un trabajo en segundo plano (core/trabajos.py): mientras no
+// termina, consulta su estado cada segundo y actualiza la barra de avance;
+// al terminar recarga la página para mostrar el resultado.
+(function () {
+  var caja = document.getElementById("trabajo");
+  if (!caja || caja.dataset.terminado === "1") return;
+  var barra = caja.querySelector("progress");
+
+  function consultar() {
+    fetch(caja.dataset.url, { credentials: "same-origin" })
+      .then(function (r) { return r.ok ? r.json() : null; })
+      .then(function (estado) {
+        if (estado && estado.terminado) {
+          window.location.reload();
+          return;
+        }
+        if (estado && barra && estado.progreso !== null) barra.value = estado.progreso;
+        setTimeout(consultar, 1000);
+      })
+      .catch(function () { setTimeout(consultar, 5000); });
+  }
+  setTimeout(consultar, 1000);
+})();